@@ -0,0 +1,66 @@
+"""
+Batch AI execution
+/api/ai/batch takes a list of heterogeneous AI operations and runs them on a
+shared thread pool sized to the host (AI_BATCH_WORKERS, default one per
+CPU), so one authenticated request replaces hundreds of single-text calls.
+Results come back in request order with per-item errors, either as one JSON
+document or streamed as NDJSON lines while later items are still running.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_SIZE = 1000
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('AI_BATCH_WORKERS', os.cpu_count() or 4)),
+                              thread_name_prefix='ai-batch')
+
+
+class InvalidBatch(ValueError):
+    """Raised when the batch body itself (not one of its items) is malformed"""
+
+
+def parse_batch(data):
+    """List of operation dicts from a request body"""
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list):
+        raise InvalidBatch('operations must be a list')
+    if len(operations) > MAX_BATCH_SIZE:
+        raise InvalidBatch(f'at most {MAX_BATCH_SIZE} operations per batch')
+    return operations
+
+
+def _run_one(registry, item):
+    if not isinstance(item, dict):
+        raise ValueError('operation must be an object')
+    name = item.get('op')
+    if name not in registry:
+        raise ValueError(f'unknown op: {name}')
+    func, text_param, params = registry[name]
+    text = item.get(text_param)
+    if not isinstance(text, str) or not text:
+        raise ValueError(f'{text_param} is required')
+    kwargs = {param: item[param] for param in params if param in item}
+    return func(text, **kwargs)
+
+
+def _result(index, future):
+    try:
+        return {'index': index, 'success': True, 'result': future.result()}
+    except Exception as e:
+        return {'index': index, 'success': False, 'error': str(e)}
+
+
+def run_batch(registry, operations):
+    """Yield one result dict per operation, in order, as soon as it is ready.
+
+    registry maps op name -> (func, text_param, optional keyword params).
+    """
+    futures = [executor.submit(_run_one, registry, item) for item in operations]
+    try:
+        for index, future in enumerate(futures):
+            yield _result(index, future)
+    finally:
+        # Client went away mid-stream: drop work that has not started yet
+        for future in futures:
+            future.cancel()
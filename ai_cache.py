@@ -0,0 +1,167 @@
+"""
+AI result cache
+ChromeNanoAPI fallbacks are pure functions of their inputs, so results are
+cached under a SHA-256 of (operation, parameters, text). Each process keeps a
+bounded LRU with a TTL. If AI_CACHE_PATH names a SQLite file, misses also
+consult (and results are written through to) that file, so gunicorn workers
+on one host share their work.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 3600  # seconds
+
+
+class SharedStore:
+    """Cross-process cache table in a local SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS ai_cache '
+                               '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_ai_cache_expires_at ON ai_cache (expires_at)')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        row = self._connection().execute('SELECT value, expires_at FROM ai_cache WHERE key = ?',
+                                         (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                           (key, json.dumps(value), expires_at))
+        connection.execute('DELETE FROM ai_cache WHERE expires_at <= ?', (time.time(),))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM ai_cache')
+
+
+class AICache:
+    """Thread-safe LRU with per-entry TTL and hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=DEFAULT_SIZE, ttl=DEFAULT_TTL, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.shared_hits = 0
+
+    @staticmethod
+    def make_key(operation, params, text):
+        payload = json.dumps([operation, params], sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode())
+        digest.update(b'\0')
+        digest.update(str(text).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """(found, value) for key, promoting it to most recently used"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[0]
+                del self._entries[key]
+                self.evictions += 1
+
+        shared = self.shared.get(key, now) if self.shared else None
+        with self._lock:
+            if shared is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.shared_hits += 1
+            self._store(key, *shared)
+        return True, shared[0]
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.shared:
+            self.shared.set(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.shared_hits = 0
+        if self.shared:
+            self.shared.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'shared': self.shared.path if self.shared else None,
+            }
+
+    def cached(self, operation, text_param='text'):
+        """Decorator caching a function by its bound arguments"""
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params = dict(bound.arguments)
+                text = params.pop(text_param, '')
+                key = self.make_key(operation, params, text)
+                found, value = self.get(key)
+                if found:
+                    return value
+                value = func(*args, **kwargs)
+                self.set(key, value)
+                return value
+            return wrapper
+        return decorator
+
+
+def _from_environment():
+    path = os.environ.get('AI_CACHE_PATH')
+    return AICache(maxsize=int(os.environ.get('AI_CACHE_SIZE', DEFAULT_SIZE)),
+                   ttl=float(os.environ.get('AI_CACHE_TTL', DEFAULT_TTL)),
+                   shared=SharedStore(path) if path else None)
+
+
+ai_cache = _from_environment()
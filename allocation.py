@@ -0,0 +1,218 @@
+"""
+Resource allocation
+One planning cycle matches available Resource stock to the outstanding
+needs of open reports and missions and writes the result as pending
+Distribution rows. Needs ask for DEMAND_UNITS of each category their text
+mentions; stock already planned in earlier cycles is subtracted on both
+sides, so cycles can be rerun safely. Per category, needs are served in
+priority order from the nearest resource with stock left. Distances are
+computed with NumPy for NEED_BATCH needs against every resource at once,
+and the new rows are inserted with one multi-row INSERT.
+"""
+
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func
+
+from conditional import bump_versions
+from models import db, Distribution, Mission, Report, Resource
+from spatial import haversine_matrix
+
+SEVERITY_PRIORITY = {'low': 0.25, 'medium': 0.5, 'high': 0.75, 'critical': 1.0}
+DEMAND_UNITS = {'low': 5, 'medium': 10, 'high': 25, 'critical': 50}  # per category a need asks for
+AGE_PER_HOUR = 0.01  # priority added per hour a need waits; triage ages reports at the same rate
+UNKNOWN_DISTANCE_KM = 50.0  # assumed when coordinates are missing and the text locations differ
+NEED_BATCH = 2048  # needs per distance matrix
+INSERT_BATCH = 1000
+
+NEED_KEYWORDS = {
+    'medical': ('injur', 'medical', 'bleed', 'wound', 'ambulance', 'hospital', 'medicine', 'sick', 'casualt'),
+    'water': ('water', 'thirst', 'dehydrat', 'drink'),
+    'food': ('food', 'hungry', 'starv', 'meal', 'ration'),
+    'shelter': ('shelter', 'homeless', 'displaced', 'blanket', 'collapsed', 'destroyed', 'freezing'),
+    'transport': ('stranded', 'trapped', 'transport', 'vehicle', 'evacuat'),
+}
+DEFAULT_NEEDS = ('food', 'water')  # needs whose text names no category
+_NEED_PATTERNS = {category: re.compile('|'.join(map(re.escape, words))) for category, words in NEED_KEYWORDS.items()}
+
+OPEN_REPORT_STATUSES = ('pending', 'verified')
+OPEN_MISSION_STATUSES = ('active',)
+PLANNED_STATUSES = ('pending', 'distributed')  # distribution statuses that hold stock
+
+
+def need_categories(text):
+    """Resource categories a free-text need asks for"""
+    text = (text or '').lower()
+    return [category for category, pattern in _NEED_PATTERNS.items() if pattern.search(text)] or list(DEFAULT_NEEDS)
+
+
+def _priority(severity, score, created_at, now):
+    """Score (severity when unscored) plus waiting time; for a triage-scored report
+    this is triage.current_priority of its triage_key"""
+    base = score if score is not None else SEVERITY_PRIORITY.get(severity, 0.5)
+    age_hours = (now - created_at).total_seconds() / 3600 if created_at else 0
+    return base + AGE_PER_HOUR * max(age_hours, 0)
+
+
+def _load_needs(now):
+    """[(kind, id, recipient, severity, priority, location, lat, lon, categories)] of open reports and missions"""
+    needs = []
+    for row in db.session.query(Report.id, Report.user_id, Report.title, Report.description, Report.severity,
+                                Report.ai_priority_score, Report.created_at, Report.location,
+                                Report.latitude, Report.longitude) \
+            .filter(Report.status.in_(OPEN_REPORT_STATUSES)):
+        needs.append(('report', row.id, row.user_id, row.severity,
+                      _priority(row.severity, row.ai_priority_score, row.created_at, now),
+                      row.location, row.latitude, row.longitude, need_categories(f'{row.title} {row.description}')))
+    for row in db.session.query(Mission.id, Mission.assigned_to, Mission.created_by, Mission.title,
+                                Mission.description, Mission.priority, Mission.created_at, Mission.location,
+                                Mission.latitude, Mission.longitude) \
+            .filter(Mission.status.in_(OPEN_MISSION_STATUSES)):
+        needs.append(('mission', row.id, row.assigned_to or row.created_by, row.priority,
+                      _priority(row.priority, None, row.created_at, now),
+                      row.location, row.latitude, row.longitude, need_categories(f'{row.title} {row.description}')))
+    return needs
+
+
+def _planned_for_needs():
+    """{(kind, need id, category): units already planned}"""
+    planned = defaultdict(int)
+    for kind, column in (('report', Distribution.report_id), ('mission', Distribution.mission_id)):
+        rows = db.session.query(column, Resource.category, func.sum(Distribution.quantity)) \
+            .join(Resource, Resource.id == Distribution.resource_id) \
+            .filter(column.isnot(None), Distribution.status.in_(PLANNED_STATUSES)) \
+            .group_by(column, Resource.category)
+        for need_id, category, quantity in rows:
+            planned[(kind, need_id, category)] += quantity or 0
+    return planned
+
+
+def _load_stock():
+    """{category: (ids, available units, locations, lats, lons)} of resources with stock left"""
+    planned = dict(db.session.query(Distribution.resource_id, func.sum(Distribution.quantity))
+                   .filter(Distribution.status.in_(PLANNED_STATUSES)).group_by(Distribution.resource_id))
+    stock = defaultdict(list)
+    for row in db.session.query(Resource.id, Resource.category, Resource.quantity, Resource.location,
+                                Resource.latitude, Resource.longitude) \
+            .filter(Resource.status == 'available'):
+        available = (row.quantity or 0) - (planned.get(row.id) or 0)
+        if available > 0:
+            stock[row.category].append((row.id, available, row.location, row.latitude, row.longitude))
+    return {
+        category: (
+            np.array([r[0] for r in rows]),
+            np.array([r[1] for r in rows], dtype=np.int64),
+            [r[2] for r in rows],
+            np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=float),
+            np.array([np.nan if r[4] is None else r[4] for r in rows], dtype=float),
+        )
+        for category, rows in stock.items()
+    }
+
+
+def distance_matrix(need_lats, need_lons, need_places, resource_lats, resource_lons, resource_places):
+    """Haversine km between every need and resource; text locations where coordinates are missing"""
+    distances = haversine_matrix(need_lats, need_lons, resource_lats, resource_lons)
+    unknown = np.isnan(distances)
+    if unknown.any():
+        same_place = need_places[:, None] == resource_places[None, :]
+        distances[unknown] = np.where(same_place, 0.0, UNKNOWN_DISTANCE_KM)[unknown]
+    return distances
+
+
+def _place_codes(needs_places, resource_places):
+    """Integer codes for text locations, so equality is a vectorised comparison"""
+    codes = {}
+
+    def encode(places):
+        return np.array([codes.setdefault((place or '').strip().lower(), len(codes)) for place in places])
+
+    return encode(needs_places), encode(resource_places)
+
+
+def _allocate(needs, demand, stock, now):
+    """Distribution rows for one category; needs are sorted by priority, demand is what each still needs"""
+    ids, available, places, lats, lons = stock
+    need_places, resource_places = _place_codes([n[5] for n in needs], places)
+    need_lats = np.array([np.nan if n[6] is None else n[6] for n in needs], dtype=float)
+    need_lons = np.array([np.nan if n[7] is None else n[7] for n in needs], dtype=float)
+
+    rows = []
+    for start in range(0, len(needs), NEED_BATCH):
+        stop = min(start + NEED_BATCH, len(needs))
+        distances = distance_matrix(need_lats[start:stop], need_lons[start:stop], need_places[start:stop],
+                                    lats, lons, resource_places)
+        order = np.argsort(distances, axis=1, kind='stable')
+        for offset in range(stop - start):
+            if not available.any():
+                return rows
+            kind, need_id, recipient, _, priority, location = needs[start + offset][:6]
+            wanted = demand[start + offset]
+            for j in order[offset]:
+                if wanted <= 0:
+                    break
+                if available[j] <= 0:
+                    continue
+                take = int(min(wanted, available[j]))
+                available[j] -= take
+                wanted -= take
+                distance = float(distances[offset, j])
+                rows.append({
+                    'resource_id': int(ids[j]), 'recipient_id': recipient,
+                    'report_id': need_id if kind == 'report' else None,
+                    'mission_id': need_id if kind == 'mission' else None,
+                    'quantity': take, 'location': location, 'status': 'pending',
+                    'ai_priority_score': round(priority, 4),
+                    'ai_optimal_route': f'{places[j]} -> {location} ({distance:.1f} km)',
+                    'created_at': now,
+                })
+    return rows
+
+
+def plan_distributions():
+    """Run one allocation cycle; returns a summary of what was planned"""
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    connection = db.session.connection()
+    # Versioning first takes the write lock, so concurrent cycles cannot plan the same stock twice
+    bump_versions(connection, {Distribution.__tablename__})
+
+    needs = _load_needs(now)
+    planned = _planned_for_needs()
+    stock = _load_stock()
+
+    by_category = defaultdict(list)
+    for need in needs:
+        if need[2] is None:
+            continue  # no one to deliver to
+        for category in need[8]:
+            outstanding = DEMAND_UNITS.get(need[3], 10) - planned.get((need[0], need[1], category), 0)
+            if outstanding > 0:
+                by_category[category].append((need, outstanding))
+
+    rows, summary = [], {}
+    for category, entries in by_category.items():
+        entries.sort(key=lambda entry: -entry[0][4])
+        demand = np.array([outstanding for _, outstanding in entries], dtype=np.int64)
+        category_rows = _allocate([need for need, _ in entries], demand, stock[category], now) \
+            if category in stock else []
+        allocated = sum(row['quantity'] for row in category_rows)
+        summary[category] = {'needs': len(entries), 'demand': int(demand.sum()), 'allocated': allocated,
+                             'distributions': len(category_rows)}
+        rows.extend(category_rows)
+
+    for start in range(0, len(rows), INSERT_BATCH):
+        connection.execute(Distribution.__table__.insert(), rows[start:start + INSERT_BATCH])
+    db.session.commit()
+    return {
+        'distributions': len(rows),
+        'quantity': sum(row['quantity'] for row in rows),
+        'needs': len(needs),
+        'unmet': sum(entry['demand'] - entry['allocated'] for entry in summary.values()),
+        'by_category': summary,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
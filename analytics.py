@@ -0,0 +1,252 @@
+"""
+Analytics rollups
+Keeps hourly/daily counts per severity, status, category and location up to
+date as reports, alerts, missions and resources are written, so analytics
+queries scale with the number of buckets instead of the number of rows.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Report, Alert, Mission, Resource, AnalyticsRollup
+
+GRANULARITIES = ('hour', 'day')
+
+# entity name and dimension -> model attribute for every rolled-up model
+ROLLUP_SOURCES = {
+    Report: ('report', {'severity': 'severity', 'status': 'status', 'location': 'location'}),
+    Alert: ('alert', {'severity': 'severity', 'category': 'alert_type'}),
+    Mission: ('mission', {'severity': 'priority', 'status': 'status', 'location': 'location'}),
+    Resource: ('resource', {'category': 'category', 'status': 'status', 'location': 'location'}),
+}
+
+ENTITIES = tuple(entity for entity, _ in ROLLUP_SOURCES.values())
+
+_PENDING_KEY = 'analytics_rollup_deltas'
+
+
+def bucket_start(moment, granularity):
+    """Truncate a datetime to the start of its hour or day bucket"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _contributions(entity, dimensions, values, created_at, quantity):
+    """Rollup cells a single row counts towards"""
+    cells = {}
+    for granularity in GRANULARITIES:
+        start = bucket_start(created_at, granularity)
+        for dimension, attr in dimensions.items():
+            value = values.get(attr)
+            key = (granularity, start, entity, dimension, str(value) if value is not None else 'unknown')
+            cells[key] = (1, quantity or 0)
+    return cells
+
+
+def _row_values(obj, dimensions, previous=False):
+    """Current (or pre-flush) values of the rolled-up attributes of obj"""
+    state = sa_inspect(obj)
+    values = {}
+    for attr in list(dimensions.values()) + ['quantity']:
+        if attr not in state.attrs:
+            continue
+        if previous:
+            history = state.attrs[attr].history
+            if history.deleted:
+                values[attr] = history.deleted[0]
+                continue
+        values[attr] = getattr(obj, attr)
+    return values
+
+
+def _pin_defaults(obj, attrs):
+    """Apply scalar column defaults now, so a new row is counted under the value it is stored with"""
+    columns = sa_inspect(type(obj)).columns
+    for attr in attrs:
+        column = columns.get(attr)
+        if getattr(obj, attr) is None and column is not None and column.default is not None \
+                and column.default.is_scalar:
+            setattr(obj, attr, column.default.arg)
+
+
+def _accumulate(deltas, cells, sign):
+    for key, (count, quantity) in cells.items():
+        total = deltas[key]
+        total[0] += sign * count
+        total[1] += sign * quantity
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault(_PENDING_KEY, defaultdict(lambda: [0, 0]))
+    with session.no_autoflush:
+        for obj in session.new:
+            source = ROLLUP_SOURCES.get(type(obj))
+            if source is None:
+                continue
+            entity, dimensions = source
+            if obj.created_at is None:
+                # Pin the default now so the bucket matches the stored value
+                obj.created_at = datetime.utcnow()
+            _pin_defaults(obj, dimensions.values())
+            values = _row_values(obj, dimensions)
+            _accumulate(deltas, _contributions(entity, dimensions, values, obj.created_at,
+                                               values.get('quantity')), 1)
+
+        for obj in session.dirty:
+            source = ROLLUP_SOURCES.get(type(obj))
+            if source is None or not session.is_modified(obj):
+                continue
+            entity, dimensions = source
+            state = sa_inspect(obj)
+            tracked = list(dimensions.values()) + ['quantity']
+            if not any(attr in state.attrs and state.attrs[attr].history.has_changes() for attr in tracked):
+                continue
+            old_values = _row_values(obj, dimensions, previous=True)
+            new_values = _row_values(obj, dimensions)
+            _accumulate(deltas, _contributions(entity, dimensions, old_values, obj.created_at,
+                                               old_values.get('quantity')), -1)
+            _accumulate(deltas, _contributions(entity, dimensions, new_values, obj.created_at,
+                                               new_values.get('quantity')), 1)
+
+        for obj in session.deleted:
+            source = ROLLUP_SOURCES.get(type(obj))
+            if source is None or obj.created_at is None:
+                continue
+            entity, dimensions = source
+            values = _row_values(obj, dimensions, previous=True)
+            _accumulate(deltas, _contributions(entity, dimensions, values, obj.created_at,
+                                               values.get('quantity')), -1)
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def _discard_deltas(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def apply_deltas(connection, deltas):
+    """Add count/quantity deltas to their rollup cells in the current transaction"""
+    table = AnalyticsRollup.__table__
+    rows = [
+        {'granularity': key[0], 'bucket_start': key[1], 'entity': key[2], 'dimension': key[3],
+         'value': key[4], 'count': count, 'quantity': quantity}
+        for key, (count, quantity) in deltas.items()
+        if count or quantity
+    ]
+    if not rows:
+        return
+
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'entity', 'dimension', 'value'],
+            set_={'count': table.c.count + stmt.excluded.count,
+                  'quantity': table.c.quantity + stmt.excluded.quantity}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Portable fallback: increment existing cells, insert the missing ones
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.granularity == row['granularity'],
+                   table.c.bucket_start == row['bucket_start'],
+                   table.c.entity == row['entity'],
+                   table.c.dimension == row['dimension'],
+                   table.c.value == row['value'])
+            .values(count=table.c.count + row['count'], quantity=table.c.quantity + row['quantity'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), [row])
+
+
+def record_bulk_insert(connection, model, rows):
+    """Roll up rows inserted with Core statements, which bypass the flush hooks"""
+    entity, dimensions = ROLLUP_SOURCES[model]
+    deltas = defaultdict(lambda: [0, 0])
+    for row in rows:
+        _accumulate(deltas, _contributions(entity, dimensions, row, row['created_at'], row.get('quantity')), 1)
+    apply_deltas(connection, deltas)
+
+
+def rebuild_rollups():
+    """Recompute every rollup cell from the source tables (backfill / repair)"""
+    deltas = defaultdict(lambda: [0, 0])
+    for model, (entity, dimensions) in ROLLUP_SOURCES.items():
+        attrs = list(dimensions.values())
+        columns = [getattr(model, attr) for attr in attrs] + [model.created_at]
+        if hasattr(model, 'quantity'):
+            columns.append(model.quantity)
+        for row in db.session.query(*columns).yield_per(1000):
+            values = dict(zip(attrs, row))
+            created_at = row[len(attrs)] or datetime.utcnow()
+            quantity = row[len(attrs) + 1] if hasattr(model, 'quantity') else 0
+            _accumulate(deltas, _contributions(entity, dimensions, values, created_at, quantity), 1)
+
+    connection = db.session.connection()
+    connection.execute(AnalyticsRollup.__table__.delete())
+    apply_deltas(connection, deltas)
+    db.session.commit()
+
+
+def query_rollups(granularity='day', start=None, end=None, entity=None, dimension=None):
+    """Time series and totals for a range, read only from the rollup table"""
+    filters = [AnalyticsRollup.granularity == granularity, AnalyticsRollup.count != 0]
+    if start is not None:
+        filters.append(AnalyticsRollup.bucket_start >= bucket_start(start, granularity))
+    if end is not None:
+        filters.append(AnalyticsRollup.bucket_start <= end)
+    if entity:
+        filters.append(AnalyticsRollup.entity == entity)
+    if dimension:
+        filters.append(AnalyticsRollup.dimension == dimension)
+
+    series = db.session.query(
+        AnalyticsRollup.bucket_start, AnalyticsRollup.entity, AnalyticsRollup.dimension,
+        AnalyticsRollup.value, AnalyticsRollup.count, AnalyticsRollup.quantity
+    ).filter(*filters).order_by(AnalyticsRollup.bucket_start, AnalyticsRollup.entity,
+                                AnalyticsRollup.dimension, AnalyticsRollup.value).all()
+
+    totals = defaultdict(lambda: defaultdict(dict))
+    for row in db.session.query(
+        AnalyticsRollup.entity, AnalyticsRollup.dimension, AnalyticsRollup.value,
+        func.sum(AnalyticsRollup.count), func.sum(AnalyticsRollup.quantity)
+    ).filter(*filters).group_by(AnalyticsRollup.entity, AnalyticsRollup.dimension,
+                                AnalyticsRollup.value):
+        totals[row[0]][row[1]][row[2]] = {'count': int(row[3]), 'quantity': int(row[4])}
+
+    return {
+        'series': [{
+            'bucket_start': row.bucket_start.isoformat(),
+            'entity': row.entity,
+            'dimension': row.dimension,
+            'value': row.value,
+            'count': row.count,
+            'quantity': row.quantity
+        } for row in series],
+        'totals': {entity_name: dict(dims) for entity_name, dims in totals.items()}
+    }
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the previous value on assignment so updates can move counts between cells
+for _model, (_entity, _dimensions) in ROLLUP_SOURCES.items():
+    for _attr in list(_dimensions.values()) + (['quantity'] if hasattr(_model, 'quantity') else []):
+        event.listen(getattr(_model, _attr), 'set', _keep_old_value, active_history=True, retval=True)
+
+event.listen(db.session, 'before_flush', _before_flush)
+event.listen(db.session, 'after_flush', _after_flush)
+event.listen(db.session, 'after_soft_rollback', _discard_deltas)
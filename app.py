@@ -1,10 +1,30 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Report, Alert, Mission, Distribution, Safehouse, Resource, Team
-from extensions import login_manager
+from models import db, User, Report, Alert, Mission, Distribution, Safehouse, Resource, Team, EnrichmentJob, upgrade_schema
+from extensions import login_manager, issue_api_token, API_TOKEN_TTL
+from analytics import query_rollups, GRANULARITIES, ENTITIES
+from pagination import page_args, keyset_page, InvalidCursor
+from sync import sync_since, sync_page, sync_envelope, InvalidSyncToken
+from conditional import conditional_get
+from ble_ingest import ingest_reports
+import enrichment
+from streaming import broadcaster, event_stream, events_after, CHANNELS as STREAM_CHANNELS
+import translation
+import text_pipeline
+import strategies
+from ai_cache import ai_cache
+from ai_batch import parse_batch, run_batch, InvalidBatch
+from serialization import ListSchema, init_json, stream_response
+from compression import init_compression, transfer_stats
+from spatial import parse_coordinates, nearest_safehouses, nearest_resources, safehouse_index, InvalidCoordinates, MAX_NEAREST
+import occupancy
+import allocation
+import assignment
+import triage
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import func
 import json
 
 def create_app():
@@ -16,10 +36,13 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
+    init_json(app)
+    init_compression(app)
     
-    # Create tables
+    # Create tables; data backfills run once per deploy from backfill.py
     with app.app_context():
         db.create_all()
+        upgrade_schema()
     
     return app
 
@@ -28,6 +51,7 @@ app = create_app()
 # Chrome Nano AI API Integration
 class ChromeNanoAPI:
     @staticmethod
+    @ai_cache.cached('summarize')
     def summarize_text(text, max_length=100, style="concise"):
         """Generate summary using Chrome's built-in AI"""
         try:
@@ -71,6 +95,7 @@ class ChromeNanoAPI:
             return ' '.join(words[:max_length]) + '...'
     
     @staticmethod
+    @ai_cache.cached('proofread')
     def proofread_text(text, language="en", style="formal"):
         """Clean and format text using Chrome's Proofreader API"""
         try:
@@ -78,26 +103,14 @@ class ChromeNanoAPI:
                 # This would call the real Chrome Nano API from frontend
                 pass
             
-            # Enhanced fallback implementation
-            import re
-            # Remove extra whitespace
-            cleaned = re.sub(r'\s+', ' ', text.strip())
-            
-            # Basic formatting improvements
-            if style == "formal":
-                # Capitalize first letter of sentences
-                cleaned = re.sub(r'(?:^|[.!?])\s*([a-z])', lambda m: m.group(0).upper(), cleaned)
-                # Ensure proper punctuation
-                if cleaned and not cleaned[-1] in '.!?':
-                    cleaned += '.'
-            
-            return cleaned
+            # Fallback: precompiled text pipeline
+            return text_pipeline.proofread(text, style)
         except Exception as e:
             print(f"Chrome Nano Proofreader error: {e}")
-            import re
-            return re.sub(r'\s+', ' ', text.strip())
+            return text_pipeline.normalise_whitespace(text)
     
     @staticmethod
+    @ai_cache.cached('rewrite')
     def rewrite_text(text, tone="professional", style="clear", audience="general"):
         """Rewrite text for clarity using Chrome's Rewriter API"""
         try:
@@ -105,38 +118,14 @@ class ChromeNanoAPI:
                 # This would call the real Chrome Nano API from frontend
                 pass
             
-            # Enhanced fallback implementation
-            rewritten = text
-            
-            # Emergency/disaster context improvements
-            emergency_replacements = {
-                "urgent": "critical",
-                "help": "assistance",
-                "problem": "emergency situation",
-                "bad": "concerning",
-                "need": "require",
-                "quickly": "immediately",
-                "ASAP": "immediately",
-                "broken": "damaged"
-            }
-            
-            for old, new in emergency_replacements.items():
-                rewritten = rewritten.replace(old, new)
-                rewritten = rewritten.replace(old.title(), new.title())
-                rewritten = rewritten.replace(old.upper(), new.upper())
-            
-            # Tone adjustments
-            if tone == "professional":
-                rewritten = rewritten.replace("can't", "cannot")
-                rewritten = rewritten.replace("won't", "will not")
-                rewritten = rewritten.replace("don't", "do not")
-            
-            return rewritten
+            # Fallback: single-pass vocabulary rewrite (see text_pipeline.py)
+            return text_pipeline.rewrite(text, tone)
         except Exception as e:
             print(f"Chrome Nano Rewriter error: {e}")
-            return text.replace("urgent", "critical").replace("help", "assistance")
+            return text
     
     @staticmethod
+    @ai_cache.cached('translate')
     def translate_text(text, target_language="en", source_language="auto"):
         """Translate text using Chrome's Translator API"""
         try:
@@ -144,45 +133,14 @@ class ChromeNanoAPI:
                 # This would call the real Chrome Nano API from frontend
                 pass
             
-            # Enhanced fallback implementation with basic translations
-            emergency_translations = {
-                'es': {  # Spanish
-                    'emergency': 'emergencia',
-                    'evacuation': 'evacuación',
-                    'help': 'ayuda',
-                    'danger': 'peligro',
-                    'safety': 'seguridad',
-                    'shelter': 'refugio',
-                    'flood': 'inundación',
-                    'fire': 'fuego',
-                    'earthquake': 'terremoto'
-                },
-                'fr': {  # French
-                    'emergency': 'urgence',
-                    'evacuation': 'évacuation',
-                    'help': 'aide',
-                    'danger': 'danger',
-                    'safety': 'sécurité',
-                    'shelter': 'abri',
-                    'flood': 'inondation',
-                    'fire': 'feu',
-                    'earthquake': 'tremblement de terre'
-                }
-            }
-            
-            if target_language in emergency_translations:
-                translated = text.lower()
-                for en_word, translated_word in emergency_translations[target_language].items():
-                    translated = translated.replace(en_word, translated_word)
-                return translated
-            else:
-                # Return original text if no translation available
-                return text
+            # Fallback: dictionary-based phrase translation (see translation.py)
+            return translation.translate(text, target_language)
         except Exception as e:
             print(f"Chrome Nano Translator error: {e}")
             return text
     
     @staticmethod
+    @ai_cache.cached('generate_prompt', text_param='context')
     def generate_prompt(context, task_type="rescue", role="coordinator"):
         """Generate AI strategies using Chrome's Prompt API"""
         try:
@@ -190,41 +148,91 @@ class ChromeNanoAPI:
                 # This would call the real Chrome Nano API from frontend
                 pass
             
-            # Enhanced fallback implementation with comprehensive strategies
-            emergency_strategies = {
-                "rescue": {
-                    "coordinator": f"RESCUE COORDINATION STRATEGY for {context}:\n\n1. IMMEDIATE ASSESSMENT\n   • Evaluate life-threatening situations and prioritize by severity\n   • Assess accessibility of affected areas and identify safe approach routes\n   • Determine resource requirements and available rescue teams\n\n2. RESOURCE DEPLOYMENT\n   • Deploy specialized rescue teams based on situation type\n   • Coordinate equipment distribution (medical, extraction, safety)\n   • Establish communication protocols between teams\n\n3. SAFETY PROTOCOLS\n   • Implement safety measures for all responders\n   • Set up emergency evacuation routes for rescue teams\n   • Monitor environmental hazards and changing conditions\n\n4. COORDINATION ACTIVITIES\n   • Establish command center and communication hub\n   • Coordinate with other emergency services\n   • Document rescue operations and maintain situational awareness",
-                    
-                    "responder": f"FIELD RESCUE OPERATIONS for {context}:\n\n1. SITUATION ASSESSMENT\n   • Conduct initial scene survey and identify immediate dangers\n   • Assess victim conditions and prioritize rescue order\n   • Evaluate structural integrity and environmental hazards\n\n2. RESCUE EXECUTION\n   • Follow established safety protocols throughout operation\n   • Use appropriate rescue techniques and equipment\n   • Maintain constant communication with command center\n\n3. MEDICAL PRIORITIES\n   • Provide immediate life-saving interventions\n   • Stabilize victims before transport\n   • Coordinate with medical teams for advanced care",
-                },
-                
-                "distribution": {
-                    "coordinator": f"RESOURCE DISTRIBUTION STRATEGY for {context}:\n\n1. NEEDS ASSESSMENT\n   • Calculate demand based on affected population and duration\n   • Identify vulnerable populations requiring priority assistance\n   • Assess geographic distribution of need across affected areas\n\n2. SUPPLY CHAIN OPTIMIZATION\n   • Identify efficient distribution routes and checkpoints\n   • Coordinate with suppliers and transportation resources\n   • Implement inventory tracking and allocation systems\n\n3. EQUITY AND ACCESS\n   • Ensure fair distribution across all affected communities\n   • Address accessibility challenges for disabled individuals\n   • Provide multilingual support and cultural considerations\n\n4. MONITORING AND ADJUSTMENT\n   • Track distribution progress and identify bottlenecks\n   • Adjust allocation based on changing needs and feedback\n   • Coordinate with other agencies to avoid duplication",
-                },
-                
-                "evacuation": {
-                    "coordinator": f"EVACUATION STRATEGY for {context}:\n\n1. THREAT ASSESSMENT\n   • Analyze immediate and projected threat levels\n   • Determine evacuation timeline and urgency levels\n   • Identify areas of highest risk requiring immediate evacuation\n\n2. ROUTE PLANNING\n   • Map safe evacuation routes and alternative pathways\n   • Identify assembly points and temporary shelters\n   • Coordinate transportation resources and capacity\n\n3. COMMUNICATION\n   • Issue clear evacuation orders through multiple channels\n   • Provide regular updates on evacuation progress\n   • Ensure accessibility for hearing and vision impaired individuals\n\n4. SPECIAL POPULATIONS\n   • Prioritize evacuation of hospitals, schools, and care facilities\n   • Provide assistance for elderly and disabled residents\n   • Account for pets and livestock in evacuation planning",
-                },
-                
-                "communication": {
-                    "coordinator": f"COMMUNICATION STRATEGY for {context}:\n\n1. INFORMATION MANAGEMENT\n   • Establish centralized information collection and verification\n   • Create standardized reporting formats for all agencies\n   • Implement real-time information sharing systems\n\n2. PUBLIC COMMUNICATION\n   • Develop clear, consistent public messaging\n   • Use multiple communication channels (radio, social media, sirens)\n   • Provide regular updates and instructions to affected populations\n\n3. INTERAGENCY COORDINATION\n   • Establish communication protocols between all response agencies\n   • Create backup communication systems for redundancy\n   • Train personnel on emergency communication procedures\n\n4. COMMUNITY ENGAGEMENT\n   • Engage community leaders as communication liaisons\n   • Provide multilingual communication support\n   • Address misinformation and provide accurate updates"
-                }
-            }
-            
-            # Get the appropriate strategy
-            if task_type in emergency_strategies and role in emergency_strategies[task_type]:
-                return emergency_strategies[task_type][role]
-            elif task_type in emergency_strategies:
-                # Default to coordinator if specific role not found
-                return emergency_strategies[task_type].get("coordinator", f"Strategy for {context}: Assess situation, deploy resources, ensure safety, coordinate response.")
-            else:
-                # Generic strategy for unknown task types
-                return f"EMERGENCY RESPONSE STRATEGY for {context}:\n\n1. SITUATION ANALYSIS\n   • Assess immediate threats and prioritize response actions\n   • Evaluate available resources and response capabilities\n   • Identify key stakeholders and coordination requirements\n\n2. RESPONSE COORDINATION\n   • Deploy appropriate resources based on situation needs\n   • Establish clear command and control structure\n   • Implement safety protocols for all personnel\n\n3. ONGOING MANAGEMENT\n   • Monitor situation development and adjust response\n   • Maintain situational awareness and communication\n   • Document actions taken and lessons learned"
-                
+            # Fallback: precompiled strategy templates (see strategies.py)
+            return strategies.render(context, task_type, role)
         except Exception as e:
             print(f"Chrome Nano Prompt Generator error: {e}")
             return f"Based on {context}, here's the recommended strategy: 1) Assess immediate risks, 2) Prioritize critical needs, 3) Coordinate resources effectively."
 
+# Operations accepted by /api/ai/batch: op -> (function, text field, optional fields)
+AI_BATCH_OPERATIONS = {
+    'summarize': (ChromeNanoAPI.summarize_text, 'text', ('max_length', 'style')),
+    'proofread': (ChromeNanoAPI.proofread_text, 'text', ('language', 'style')),
+    'rewrite': (ChromeNanoAPI.rewrite_text, 'text', ('tone', 'style', 'audience')),
+    'translate': (ChromeNanoAPI.translate_text, 'text', ('target_language', 'source_language')),
+    'generate_prompt': (ChromeNanoAPI.generate_prompt, 'context', ('task_type', 'role')),
+}
+
+# Languages every new alert is translated into when it is created
+SOURCE_LANGUAGE = 'en'
+ALERT_LANGUAGES = [language for language in os.environ.get(
+    'ALERT_LANGUAGES', ','.join(sorted(translation.TRANSLATORS))).split(',') if language]
+
+def translate_alert(text):
+    """Stored translations of an alert message: {language: text}"""
+    return {language: ChromeNanoAPI.translate_text(text, language, SOURCE_LANGUAGE)
+            for language in ALERT_LANGUAGES}
+
+def reader_language():
+    """Language to serve alerts in: ?lang=, the user's preference, then Accept-Language"""
+    available = [SOURCE_LANGUAGE] + ALERT_LANGUAGES
+    for language in (request.args.get('lang'), getattr(current_user, 'preferred_language', None)):
+        if language in available:
+            return language
+    return request.accept_languages.best_match(available) or SOURCE_LANGUAGE
+
+def localized_alert_message(alert, language):
+    """Stored translation, or the source text for English and older alerts"""
+    translations = alert.translated_messages or {}
+    return translations.get(language) or alert.rewritten_message or alert.message
+
+def localized_alert_column(language):
+    """SQL form of localized_alert_message, reading one key of translated_messages"""
+    return func.coalesce(func.nullif(Alert.translated_messages[language].as_string(), ''),
+                         func.nullif(Alert.rewritten_message, ''), Alert.message)
+
+# Columns each list API returns; rows are read as tuples, not ORM instances
+REPORT_LIST = ListSchema(Report, ('id', 'title', 'description', 'location', 'latitude', 'longitude',
+                                  'severity', 'status', 'ai_summary', 'created_at'))
+ALERT_LIST = ListSchema(Alert, ('id', 'title', 'message', 'rewritten_message', 'alert_type', 'severity',
+                                'created_at'),
+                        extra={'language': lambda row, language: language,
+                               'localized_message': lambda row, language: row.localized_message})
+MISSION_LIST = ListSchema(Mission, ('id', 'title', 'description', 'location', 'latitude', 'longitude',
+                                    'priority', 'status', 'ai_strategy', 'created_at'))
+SAFEHOUSE_LIST = ListSchema(Safehouse, ('id', 'name', 'location', 'latitude', 'longitude', 'capacity',
+                                        'current_occupancy', 'facilities', 'contact_info'),
+                            extra={'availability': lambda row: row.capacity - row.current_occupancy})
+RESOURCE_LIST = ListSchema(Resource, ('id', 'name', 'category', 'quantity', 'location', 'latitude',
+                                      'longitude', 'status'))
+DISTRIBUTION_LIST = ListSchema(Distribution, ('id', 'resource_id', 'recipient_id', 'report_id', 'mission_id',
+                                              'quantity', 'location', 'status', 'ai_priority_score',
+                                              'ai_optimal_route', 'created_at'))
+TEAM_LIST = ListSchema(Team, ('id', 'name', 'team_type', 'leader_id', 'status', 'latitude', 'longitude',
+                              'ai_team_efficiency', 'ai_optimal_assignments'))
+TRIAGE_LIST = ListSchema(Report, ('id', 'title', 'location', 'latitude', 'longitude', 'severity', 'status',
+                                  'ai_priority_score', 'created_at'))
+
+# Whole tables government users can export: entity -> (schema, model)
+EXPORTS = {
+    'report': (REPORT_LIST, Report),
+    'alert': (ALERT_LIST, Alert),
+    'mission': (MISSION_LIST, Mission),
+    'safehouse': (SAFEHOUSE_LIST, Safehouse),
+    'resource': (RESOURCE_LIST, Resource),
+}
+
+@app.errorhandler(InvalidCursor)
+@app.errorhandler(InvalidSyncToken)
+@app.errorhandler(InvalidBatch)
+@app.errorhandler(InvalidCoordinates)
+def invalid_list_parameter(error):
+    return jsonify({'error': str(error)}), 400
+
+@app.errorhandler(occupancy.OccupancyConflict)
+def occupancy_conflict(error):
+    return jsonify({'error': str(error)}), error.status
+
 # Authentication routes
 @app.route('/')
 def index():
@@ -263,6 +271,7 @@ def register():
             email=email,
             name=name,
             role=role,
+            preferred_language=request.form.get('language') or None,
             password_hash=generate_password_hash(password)
         )
         db.session.add(user)
@@ -279,43 +288,71 @@ def logout():
     logout_user()
     return redirect(url_for('login'))
 
+@app.route('/api/auth/token', methods=['POST'])
+def api_token():
+    """Issue a bearer token for email/password, or for the current session or token"""
+    data = request.get_json(silent=True) or {}
+    if data.get('email'):
+        user = User.query.filter_by(email=data['email']).first()
+        if not user or not check_password_hash(user.password_hash, data.get('password') or ''):
+            return jsonify({'error': 'invalid email or password'}), 401
+    elif current_user.is_authenticated:
+        # Bearer identities are rebuilt from token claims, so renewal re-reads
+        # the account: a disabled or re-roled user has to sign in again
+        user = db.session.get(User, current_user.id)
+        if user is not None and user.role != current_user.role:
+            return jsonify({'error': 'role changed, sign in again'}), 401
+    else:
+        return jsonify({'error': 'email and password required'}), 401
+    if user is None or user.is_active is False:
+        return jsonify({'error': 'account disabled'}), 403
+    return jsonify({'token': issue_api_token(user), 'token_type': 'Bearer', 'expires_in': API_TOKEN_TTL})
+
 @app.route('/dashboard')
 @login_required
+@conditional_get('user')
 def dashboard():
     return render_template('dashboard.html', user=current_user)
 
 @app.route('/reports')
 @login_required
+@conditional_get('user')
 def reports():
     return render_template('reports.html', user=current_user)
 
 @app.route('/alerts')
 @login_required
+@conditional_get('user')
 def alerts():
     return render_template('alerts.html', user=current_user)
 
 @app.route('/missions')
 @login_required
+@conditional_get('user')
 def missions():
     return render_template('missions.html', user=current_user)
 
 @app.route('/distribution')
 @login_required
+@conditional_get('user')
 def distribution():
     return render_template('distribution.html', user=current_user)
 
 @app.route('/analytics')
 @login_required
+@conditional_get('user')
 def analytics():
     return render_template('analytics.html', user=current_user)
 
 @app.route('/ble-mesh')
 @login_required
+@conditional_get('user')
 def ble_mesh():
     return render_template('ble_mesh.html', user=current_user)
 
 @app.route('/safehouses')
 @login_required
+@conditional_get('user')
 def safehouses():
     return render_template('safehouses.html', user=current_user)
 
@@ -326,41 +363,50 @@ def offline():
 # API Routes
 @app.route('/api/reports', methods=['GET', 'POST'])
 @login_required
+@conditional_get('report')
 def reports_api():
     if request.method == 'POST':
         data = request.get_json()
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'), required=False)
         report = Report(
             title=data['title'],
             description=data['description'],
             location=data['location'],
+            latitude=latitude,
+            longitude=longitude,
             severity=data.get('severity', 'medium'),
             user_id=current_user.id,
             status='pending'
         )
         db.session.add(report)
-        db.session.commit()
+        db.session.flush()
         
-        # Generate AI summary
-        summary = ChromeNanoAPI.summarize_text(report.description)
-        report.ai_summary = summary
+        # AI summary is generated in the background
+        job = enrichment.enqueue('report', report.id)
         db.session.commit()
+        enrichment.notify_workers()
         
-        return jsonify({'id': report.id, 'ai_summary': summary})
+        return jsonify({'id': report.id, 'enrichment': enrichment.job_status(job)})
     
-    reports = Report.query.filter_by(user_id=current_user.id).all()
-    return jsonify([{
-        'id': r.id,
-        'title': r.title,
-        'description': r.description,
-        'location': r.location,
-        'severity': r.severity,
-        'status': r.status,
-        'ai_summary': r.ai_summary,
-        'created_at': r.created_at.isoformat()
-    } for r in reports])
+    limit, after = page_args()
+    reports, next_cursor, deleted = sync_page(REPORT_LIST.query(Report.user_id == current_user.id), Report, limit, after, sync_since(), current_user.id)
+    return jsonify(sync_envelope(REPORT_LIST.dump(reports), next_cursor, deleted, after))
+
+@app.route('/api/reports/triage', methods=['GET'])
+@login_required
+@conditional_get('report')
+def reports_triage_api():
+    """The k most urgent pending reports, read off the triage index (scores are kept at write time)"""
+    if current_user.role not in ['government', 'rescuer']:
+        return jsonify({'error': 'rescuer or government role required'}), 403
+    k = min(max(request.args.get('k', 20, type=int), 1), triage.MAX_TRIAGE)
+    reports = TRIAGE_LIST.query(Report.status == triage.QUEUE_STATUS, Report.triage_key.isnot(None)) \
+        .order_by(Report.triage_key.desc(), Report.id.desc()).limit(k).all()
+    return jsonify({'items': TRIAGE_LIST.dump(reports)})
 
 @app.route('/api/alerts', methods=['GET', 'POST'])
 @login_required
+@conditional_get('alert', 'user')
 def alerts_api():
     if request.method == 'POST' and current_user.role in ['government', 'rescuer']:
         data = request.get_json()
@@ -371,71 +417,69 @@ def alerts_api():
             severity=data.get('severity', 'medium'),
             created_by=current_user.id
         )
-        db.session.add(alert)
-        db.session.commit()
-        
         # Rewrite for clarity (using fallback for now)
-        rewritten_message = alert.message.replace("urgent", "critical").replace("help", "assistance")
-        alert.rewritten_message = rewritten_message
+        alert.rewritten_message = text_pipeline.rewrite(alert.message)
+        # Translate once here rather than once per reader
+        alert.translated_messages = translate_alert(alert.rewritten_message)
+        db.session.add(alert)
         db.session.commit()
         
-        return jsonify({'id': alert.id, 'rewritten_message': rewritten_message})
+        return jsonify({
+            'id': alert.id,
+            'rewritten_message': alert.rewritten_message,
+            'translated_messages': alert.translated_messages
+        })
     
-    alerts = Alert.query.order_by(Alert.created_at.desc()).limit(50).all()
-    return jsonify([{
-        'id': a.id,
-        'title': a.title,
-        'message': a.message,
-        'rewritten_message': a.rewritten_message,
-        'alert_type': a.alert_type,
-        'severity': a.severity,
-        'created_at': a.created_at.isoformat()
-    } for a in alerts])
+    language = reader_language()
+    limit, after = page_args()
+    query = ALERT_LIST.query(localized_message=localized_alert_column(language))
+    alerts, next_cursor, deleted = sync_page(query, Alert, limit, after, sync_since())
+    return jsonify(sync_envelope(ALERT_LIST.dump(alerts, language=language), next_cursor, deleted, after))
 
 @app.route('/api/missions', methods=['GET', 'POST'])
 @login_required
+@conditional_get('mission')
 def missions_api():
     if request.method == 'POST' and current_user.role in ['government', 'rescuer']:
         data = request.get_json()
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'), required=False)
         mission = Mission(
             title=data['title'],
             description=data['description'],
             location=data['location'],
+            latitude=latitude,
+            longitude=longitude,
             priority=data.get('priority', 'medium'),
             assigned_to=data.get('assigned_to'),
             created_by=current_user.id,
             status='active'
         )
         db.session.add(mission)
-        db.session.commit()
+        db.session.flush()
         
-        # Generate AI strategy
-        strategy = ChromeNanoAPI.generate_prompt(mission.description, 'rescue')
-        mission.ai_strategy = strategy
+        # AI strategy is generated in the background
+        job = enrichment.enqueue('mission', mission.id)
         db.session.commit()
+        enrichment.notify_workers()
         
-        return jsonify({'id': mission.id, 'ai_strategy': strategy})
+        return jsonify({'id': mission.id, 'enrichment': enrichment.job_status(job)})
     
-    missions = Mission.query.filter_by(assigned_to=current_user.id).all()
-    return jsonify([{
-        'id': m.id,
-        'title': m.title,
-        'description': m.description,
-        'location': m.location,
-        'priority': m.priority,
-        'status': m.status,
-        'ai_strategy': m.ai_strategy,
-        'created_at': m.created_at.isoformat()
-    } for m in missions])
+    limit, after = page_args()
+    missions, next_cursor, deleted = sync_page(MISSION_LIST.query(Mission.assigned_to == current_user.id), Mission, limit, after, sync_since(), current_user.id)
+    return jsonify(sync_envelope(MISSION_LIST.dump(missions), next_cursor, deleted, after))
 
 @app.route('/api/safehouses', methods=['GET', 'POST'])
 @login_required
+@conditional_get('safehouse')
 def safehouses_api():
     if request.method == 'POST' and current_user.role in ['government']:
         data = request.get_json()
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'), required=False)
         safehouse = Safehouse(
             name=data['name'],
             location=data['location'],
+            latitude=latitude,
+            longitude=longitude,
             capacity=data['capacity'],
             current_occupancy=data.get('current_occupancy', 0),
             facilities=data.get('facilities', ''),
@@ -445,68 +489,335 @@ def safehouses_api():
         db.session.commit()
         return jsonify({'id': safehouse.id})
     
-    safehouses = Safehouse.query.all()
-    return jsonify([{
-        'id': s.id,
-        'name': s.name,
-        'location': s.location,
-        'capacity': s.capacity,
-        'current_occupancy': s.current_occupancy,
-        'facilities': s.facilities,
-        'contact_info': s.contact_info,
-        'availability': s.capacity - s.current_occupancy
-    } for s in safehouses])
+    limit, after = page_args()
+    safehouses, next_cursor, deleted = sync_page(SAFEHOUSE_LIST.query(), Safehouse, limit, after, sync_since())
+    return jsonify(sync_envelope(SAFEHOUSE_LIST.dump(safehouses), next_cursor, deleted, after))
+
+def _nearest_args():
+    latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lon'))
+    k = max(1, min(request.args.get('k', 5, type=int), MAX_NEAREST))
+    max_km = request.args.get('max_km', type=float)
+    return latitude, longitude, k, max_km
+
+@app.route('/api/safehouses/nearest', methods=['GET'])
+@login_required
+def nearest_safehouses_api():
+    """Closest safehouses with at least min_free places, from the in-memory spatial index"""
+    latitude, longitude, k, max_km = _nearest_args()
+    min_free = max(0, request.args.get('min_free', 1, type=int))
+    return jsonify({'items': nearest_safehouses(latitude, longitude, k, min_free, max_km)})
+
+@app.route('/api/safehouses/<int:safehouse_id>/check-in', methods=['POST'])
+@login_required
+def safehouse_check_in(safehouse_id):
+    """Admit count people if they fit (atomic; never exceeds capacity)"""
+    if current_user.role not in ['government', 'rescuer']:
+        return jsonify({'error': 'rescuer or government role required'}), 403
+    data = request.get_json(silent=True) or {}
+    return jsonify(occupancy.check_in(safehouse_id, data.get('count', 1)))
+
+@app.route('/api/safehouses/<int:safehouse_id>/check-out', methods=['POST'])
+@login_required
+def safehouse_check_out(safehouse_id):
+    """Release count places (atomic; never below zero)"""
+    if current_user.role not in ['government', 'rescuer']:
+        return jsonify({'error': 'rescuer or government role required'}), 403
+    data = request.get_json(silent=True) or {}
+    return jsonify(occupancy.check_out(safehouse_id, data.get('count', 1)))
+
+@app.route('/api/safehouses/availability', methods=['GET'])
+@login_required
+def safehouse_availability_api():
+    """Free places per safehouse and in total, from the in-memory index"""
+    return jsonify(occupancy.availability_summary())
+
+@app.route('/api/safehouses/<int:safehouse_id>/availability', methods=['GET'])
+@login_required
+def safehouse_availability(safehouse_id):
+    record = safehouse_index.get(safehouse_id)
+    if record is None:
+        return jsonify({'error': 'safehouse not found'}), 404
+    return jsonify(occupancy.availability(record))
 
 @app.route('/api/resources', methods=['GET', 'POST'])
 @login_required
+@conditional_get('resource')
 def resources_api():
     if request.method == 'POST' and current_user.role in ['government', 'rescuer']:
         data = request.get_json()
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'), required=False)
         resource = Resource(
             name=data['name'],
             category=data['category'],
             quantity=data['quantity'],
             location=data['location'],
+            latitude=latitude,
+            longitude=longitude,
             status=data.get('status', 'available')
         )
         db.session.add(resource)
         db.session.commit()
         return jsonify({'id': resource.id})
     
-    resources = Resource.query.all()
-    return jsonify([{
-        'id': r.id,
-        'name': r.name,
-        'category': r.category,
-        'quantity': r.quantity,
-        'location': r.location,
-        'status': r.status
-    } for r in resources])
+    limit, after = page_args()
+    resources, next_cursor, deleted = sync_page(RESOURCE_LIST.query(), Resource, limit, after, sync_since())
+    return jsonify(sync_envelope(RESOURCE_LIST.dump(resources), next_cursor, deleted, after))
+
+@app.route('/api/resources/nearest', methods=['GET'])
+@login_required
+def nearest_resources_api():
+    """Closest available resource caches, optionally of one category"""
+    latitude, longitude, k, max_km = _nearest_args()
+    min_quantity = max(0, request.args.get('min_quantity', 1, type=int))
+    return jsonify({'items': nearest_resources(latitude, longitude, k, request.args.get('category'),
+                                               min_quantity, max_km)})
+
+@app.route('/api/distributions', methods=['GET'])
+@login_required
+@conditional_get('distribution')
+def distributions_api():
+    """Planned and completed distributions, newest first; citizens see their own"""
+    query = DISTRIBUTION_LIST.query()
+    if current_user.role not in ['government', 'rescuer']:
+        query = query.filter(Distribution.recipient_id == current_user.id)
+    limit, after = page_args()
+    distributions, next_cursor = keyset_page(query, Distribution, limit, after)
+    return jsonify({'items': DISTRIBUTION_LIST.dump(distributions), 'next_cursor': next_cursor})
+
+@app.route('/api/distributions/plan', methods=['POST'])
+@login_required
+def plan_distributions_api():
+    """Run one allocation cycle over open reports/missions and available stock"""
+    if current_user.role != 'government':
+        return jsonify({'error': 'government role required'}), 403
+    return jsonify(allocation.plan_distributions())
+
+@app.route('/api/teams', methods=['GET', 'POST'])
+@login_required
+@conditional_get('team')
+def teams_api():
+    if request.method == 'POST':
+        if current_user.role != 'government':
+            return jsonify({'error': 'government role required'}), 403
+        data = request.get_json()
+        latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'), required=False)
+        team = Team(
+            name=data['name'],
+            team_type=data['team_type'],
+            leader_id=data['leader_id'],
+            status=data.get('status', 'active'),
+            latitude=latitude,
+            longitude=longitude
+        )
+        db.session.add(team)
+        db.session.commit()
+        return jsonify({'id': team.id})
+    
+    if current_user.role not in ['government', 'rescuer']:
+        return jsonify({'error': 'rescuer or government role required'}), 403
+    limit, after = page_args()
+    teams, next_cursor = keyset_page(TEAM_LIST.query(), Team, limit, after)
+    return jsonify({'items': TEAM_LIST.dump(teams), 'next_cursor': next_cursor})
+
+@app.route('/api/teams/<int:team_id>', methods=['PUT'])
+@login_required
+def update_team(team_id):
+    """Change a team's status, type or base; the leader may update their own team"""
+    team = db.session.get(Team, team_id)
+    if team is None:
+        return jsonify({'error': 'team not found'}), 404
+    if current_user.role != 'government' and current_user.id != team.leader_id:
+        return jsonify({'error': 'government role or team leader required'}), 403
+    data = request.get_json()
+    if data.get('status', team.status) not in ['active', 'standby', 'deployed']:
+        return jsonify({'error': 'status must be active, standby or deployed'}), 400
+    if 'latitude' in data or 'longitude' in data:
+        team.latitude, team.longitude = parse_coordinates(data.get('latitude'), data.get('longitude'),
+                                                          required=False)
+    team.status = data.get('status', team.status)
+    team.team_type = data.get('team_type', team.team_type)
+    db.session.commit()
+    return jsonify({'id': team.id, 'status': team.status})
+
+@app.route('/api/teams/assignments/solve', methods=['POST'])
+@login_required
+def solve_assignments():
+    """Re-plan team assignments now; ?full=1 solves from scratch instead of from the last plan"""
+    if current_user.role != 'government':
+        return jsonify({'error': 'government role required'}), 403
+    result = assignment.solve(full=request.args.get('full') == '1')
+    if result is None:
+        # The planning process has the request and runs it shortly
+        return jsonify({'status': 'requested'}), 202
+    return jsonify(result)
+
+@app.route('/api/export/<entity>', methods=['GET'])
+@login_required
+@conditional_get('report', 'alert', 'mission', 'safehouse', 'resource', 'user')
+def export_api(entity):
+    """Every row of a table, streamed as a JSON array or with ?format=ndjson as NDJSON"""
+    if current_user.role != 'government':
+        return jsonify({'error': 'government role required'}), 403
+    if entity not in EXPORTS:
+        return jsonify({'error': f"entity must be one of: {', '.join(EXPORTS)}"}), 404
+    output = request.args.get('format', 'json')
+    if output not in ('json', 'ndjson'):
+        return jsonify({'error': 'format must be json or ndjson'}), 400
+
+    schema, model = EXPORTS[entity]
+    context = {}
+    if entity == 'alert':
+        context['language'] = reader_language()
+        query = schema.query(localized_message=localized_alert_column(context['language']))
+    else:
+        query = schema.query()
+    return stream_response(schema, query.order_by(model.id), ndjson=output == 'ndjson', **context)
+
+@app.route('/api/dashboard/summary', methods=['GET'])
+@login_required
+@conditional_get('report', 'alert', 'mission', 'safehouse', 'resource')
+def dashboard_summary_api():
+    """Dashboard statistics and recent activity computed in the database"""
+    stats = db.session.query(
+        db.select(func.count(Report.id))
+            .where(Report.user_id == current_user.id)
+            .scalar_subquery(),
+        db.select(func.count(Alert.id))
+            .where(Alert.severity.in_(['critical', 'high']))
+            .scalar_subquery(),
+        db.select(func.count(Mission.id))
+            .where(Mission.assigned_to == current_user.id, Mission.status == 'active')
+            .scalar_subquery(),
+        db.select(func.count(Safehouse.id))
+            .where(Safehouse.capacity > func.coalesce(Safehouse.current_occupancy, 0))
+            .scalar_subquery(),
+        db.select(func.coalesce(func.sum(Resource.quantity), 0))
+            .scalar_subquery()
+    ).one()
+
+    # Only the newest few rows of each feed are needed for the activity list
+    recent_reports = db.session.query(Report.id, Report.title, Report.created_at) \
+        .filter(Report.user_id == current_user.id) \
+        .order_by(Report.created_at.desc()).limit(3).all()
+    recent_alerts = db.session.query(Alert.id, Alert.title, Alert.created_at) \
+        .order_by(Alert.created_at.desc()).limit(3).all()
+    recent_missions = db.session.query(Mission.id, Mission.title, Mission.created_at) \
+        .filter(Mission.assigned_to == current_user.id) \
+        .order_by(Mission.created_at.desc()).limit(3).all()
+
+    activity = [
+        {'type': activity_type, 'id': row.id, 'title': row.title, 'created_at': row.created_at.isoformat()}
+        for activity_type, rows in (('report', recent_reports), ('alert', recent_alerts), ('mission', recent_missions))
+        for row in rows
+    ]
+    activity.sort(key=lambda item: item['created_at'], reverse=True)
+
+    return jsonify({
+        'stats': {
+            'totalReports': stats[0],
+            'activeAlerts': stats[1],
+            'activeMissions': stats[2],
+            'availableSafehouses': stats[3],
+            'totalResources': int(stats[4])
+        },
+        'recent_activity': activity[:5]
+    })
+
+@app.route('/api/analytics', methods=['GET'])
+@login_required
+@conditional_get('report', 'alert', 'mission', 'resource')
+def analytics_api():
+    """Time-bucketed counts served from the analytics rollup table"""
+    granularity = request.args.get('bucket', 'day')
+    entity = request.args.get('entity')
+    dimension = request.args.get('dimension')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"bucket must be one of {', '.join(GRANULARITIES)}"}), 400
+    if entity and entity not in ENTITIES:
+        return jsonify({'error': f"entity must be one of {', '.join(ENTITIES)}"}), 400
+    
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 datetimes'}), 400
+    if start is None and request.args.get('days'):
+        start = datetime.utcnow() - timedelta(days=request.args.get('days', type=int) or 0)
+    
+    result = query_rollups(granularity, start, end, entity, dimension)
+    result.update({
+        'bucket': granularity,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None
+    })
+    return jsonify(result)
+
+@app.route('/api/user/language', methods=['POST'])
+@login_required
+def user_language_api():
+    """Set (or clear with null) the language alerts are served in"""
+    language = (request.get_json(silent=True) or {}).get('language')
+    if language is not None and language not in [SOURCE_LANGUAGE] + ALERT_LANGUAGES:
+        return jsonify({'error': f"language must be one of: {', '.join([SOURCE_LANGUAGE] + ALERT_LANGUAGES)}"}), 400
+    db.session.get(User, current_user.id).preferred_language = language
+    db.session.commit()
+    return jsonify({'language': language})
+
+@app.route('/api/enrichment/<int:job_id>', methods=['GET'])
+@login_required
+def enrichment_status_api(job_id):
+    """Poll the status of a background AI enrichment job"""
+    job = db.session.get(EnrichmentJob, job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(enrichment.job_status(job))
+
+@app.route('/api/stream')
+@login_required
+def event_stream_api():
+    """Server-Sent Events: new alerts, mission changes and safehouse occupancy"""
+    channels = set(request.args.get('channels', ','.join(STREAM_CHANNELS)).split(',')) & set(STREAM_CHANNELS)
+    if not channels:
+        return jsonify({'error': f"channels must be among: {', '.join(STREAM_CHANNELS)}"}), 400
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
+
+    broadcaster.start(app)
+    # Follow from here; the backlog fills anything committed before this point
+    sequence = broadcaster.sequence
+    backlog = events_after(last_event_id) if last_event_id is not None else []
+    body = event_stream(current_user.role, current_user.id, channels, sequence, backlog)
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 # BLE Mesh API endpoints
 @app.route('/api/ble/sync', methods=['POST'])
 @login_required
 def ble_sync():
     """Handle BLE mesh data synchronization"""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'request body must be a JSON object'}), 400
     sync_type = data.get('type')
     
     if sync_type == 'reports':
-        # Sync reports via BLE
         reports = data.get('reports', [])
-        for report_data in reports:
-            if not Report.query.filter_by(id=report_data['id']).first():
-                report = Report(
-                    id=report_data['id'],
-                    title=report_data['title'],
-                    description=report_data['description'],
-                    location=report_data['location'],
-                    severity=report_data['severity'],
-                    user_id=report_data['user_id'],
-                    status=report_data['status']
-                )
-                db.session.add(report)
-        db.session.commit()
+        if not isinstance(reports, list):
+            return jsonify({'error': 'reports must be a list'}), 400
+        # Sync reports via BLE in set-based batches
+        results = ingest_reports(reports)
+        return jsonify({
+            'status': 'synced',
+            'accepted': sum(1 for r in results if r['status'] == 'accepted'),
+            'duplicates': sum(1 for r in results if r['status'] == 'duplicate'),
+            'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+            'results': results
+        })
     
     return jsonify({'status': 'synced'})
 
@@ -520,12 +831,16 @@ def ble_broadcast():
     if broadcast_type == 'alert' and current_user.role in ['government']:
         alert = Alert.query.get(data.get('alert_id'))
         if alert:
+            language = reader_language()
             return jsonify({
                 'type': 'alert',
                 'data': {
                     'id': alert.id,
                     'title': alert.title,
-                    'message': alert.rewritten_message or alert.message,
+                    'message': localized_alert_message(alert, language),
+                    'language': language,
+                    # Mesh receivers pick their own language without a server round trip
+                    'translations': alert.translated_messages or {},
                     'severity': alert.severity,
                     'created_at': alert.created_at.isoformat()
                 }
@@ -602,7 +917,7 @@ def ai_rewrite():
         return jsonify({
             'success': False,
             'error': str(e),
-            'fallback_text': text.replace("urgent", "critical").replace("help", "assistance")
+            'fallback_text': text_pipeline.rewrite(text)
         })
 
 @app.route('/api/ai/translate', methods=['POST'])
@@ -654,6 +969,38 @@ def ai_generate_prompt():
             'fallback_prompt': f"Based on {context}, prioritize operations by assessing risks and coordinating resources."
         })
 
+@app.route('/api/ai/cache', methods=['GET'])
+@login_required
+def ai_cache_stats():
+    """Hit/miss/eviction counters of the AI result cache"""
+    return jsonify(ai_cache.stats())
+
+@app.route('/api/compression', methods=['GET'])
+@login_required
+def compression_stats():
+    """Responses, raw bytes and bytes sent per endpoint"""
+    return jsonify(transfer_stats.snapshot())
+
+@app.route('/api/ai/batch', methods=['POST'])
+@login_required
+def ai_batch_api():
+    """Run many AI operations in one request; results in order, optionally streamed"""
+    data = request.get_json(silent=True)
+    operations = parse_batch(data)
+    results = run_batch(AI_BATCH_OPERATIONS, operations)
+
+    if data.get('stream'):
+        # One JSON object per line, flushed as each result (in order) is ready
+        return Response((json.dumps(result) + '\n' for result in results),
+                        mimetype='application/x-ndjson')
+
+    results = list(results)
+    return jsonify({
+        'results': results,
+        'succeeded': sum(1 for result in results if result['success']),
+        'failed': sum(1 for result in results if not result['success'])
+    })
+
 # BLE Mesh Management Endpoints
 @app.route('/api/ble/status', methods=['GET'])
 @login_required
@@ -694,5 +1041,20 @@ def ble_discover():
             'error': str(e)
         })
 
+# Background AI enrichment
+MISSION_PRIORITY_DURATION = {'critical': 60, 'high': 120, 'medium': 240, 'low': 480}  # minutes
+
+def enrich_report(report):
+    report.ai_summary = ChromeNanoAPI.summarize_text(report.description)  # ai_priority_score: see triage.py
+
+def enrich_mission(mission):
+    mission.ai_strategy = ChromeNanoAPI.generate_prompt(mission.description, 'rescue')
+    mission.ai_estimated_duration = MISSION_PRIORITY_DURATION.get(mission.priority, 240)
+
+enrichment.register_handler('report', enrich_report)
+enrichment.register_handler('mission', enrich_mission)
+enrichment.start_workers(app, int(os.environ.get('ENRICHMENT_WORKERS', 2)))
+assignment.start_planner(app, float(os.environ.get('ASSIGNMENT_INTERVAL', 60)))
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,549 @@
+"""
+Team assignment
+Teams that are active or on standby are matched one-to-one to open missions
+by minimising the total cost of a team x mission matrix: mission priority,
+distance from the team's base and whether the team type suits the mission.
+The matrix is solved with shortest augmenting paths (the Jonker-Volgenant
+form of the Hungarian method) in NumPy. Dual prices are kept between solves,
+so when a team or mission changes only its row or column is recomputed and
+only the teams it displaces are re-routed, instead of solving from scratch.
+Each team has an idle slot costing more than any mission, so teams can
+outnumber missions.
+
+Missions assigned to anyone other than a plannable team's leader (or to a
+deployed team) are left alone; the others get Mission.assigned_to set to
+the leader of the team the plan picks.
+
+Every web worker starts the planner thread, but only the holder of the
+planner lease plans, so assignments are written by one process at a time.
+A solve asked of any other worker is handed to the holder, which runs it
+on its next check and shares the result.
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import bindparam, update
+
+from allocation import SEVERITY_PRIORITY, UNKNOWN_DISTANCE_KM
+import leases
+from conditional import bump_versions, collection_versions
+from models import db, Mission, Team, Tombstone
+from spatial import haversine_km, haversine_matrix
+from streaming import record_event
+from sync import SYNC_ENTITIES, SYNC_OVERLAP, SYNC_TOKEN_MAX_AGE, record_removals
+
+PRIORITY_WEIGHT = 2.0  # cost of leaving a critical mission for a low one
+DISTANCE_WEIGHT = 1.0  # cost of DISTANCE_SCALE_KM or more of travel
+DISTANCE_SCALE_KM = 50.0
+TYPE_WEIGHT = 1.0  # cost of sending a team of the wrong type
+STAY_BONUS = 0.1  # a mission keeps its current team unless another is this much better
+IDLE_COST = PRIORITY_WEIGHT + DISTANCE_WEIGHT + TYPE_WEIGHT + 1.0  # above any mission
+EPSILON = 1e-9
+
+PLANNABLE_TEAM_STATUSES = ('active', 'standby')
+OPEN_MISSION_STATUSES = ('active',)
+
+TEAM_SKILLS = {
+    'medical': ('injur', 'medical', 'bleed', 'wound', 'ambulance', 'hospital', 'casualt', 'sick'),
+    'rescue': ('trapped', 'rescue', 'collapse', 'flood', 'drown', 'stranded', 'search', 'fire'),
+    'logistics': ('supply', 'supplies', 'deliver', 'food', 'water', 'distribut', 'transport', 'evacuat'),
+    'communication': ('communication', 'radio', 'signal', 'network', 'coordinat', 'outage'),
+}
+_SKILL_PATTERNS = [(team_type, re.compile('|'.join(map(re.escape, words)))) for team_type, words in TEAM_SKILLS.items()]
+
+TEAM_FIELDS = ('id', 'name', 'team_type', 'leader_id', 'status', 'latitude', 'longitude',
+               'ai_team_efficiency', 'ai_optimal_assignments')
+MISSION_FIELDS = ('id', 'title', 'description', 'priority', 'status', 'latitude', 'longitude',
+                  'assigned_to', 'created_by')
+# Changes to these re-cost a row or column; writes of the plan itself do not
+TEAM_INPUTS = ('team_type', 'leader_id', 'latitude', 'longitude')
+MISSION_INPUTS = ('title', 'description', 'priority', 'latitude', 'longitude')
+
+
+def required_team_type(text):
+    """Team type a mission's text calls for, or None if any team will do"""
+    text = (text or '').lower()
+    for team_type, pattern in _SKILL_PATTERNS:
+        if pattern.search(text):
+            return team_type
+    return None
+
+
+def _coordinates(records):
+    lats = np.array([np.nan if r['latitude'] is None else r['latitude'] for r in records], dtype=float)
+    lons = np.array([np.nan if r['longitude'] is None else r['longitude'] for r in records], dtype=float)
+    return lats, lons
+
+
+def _match_costs(teams, missions):
+    """Distance and team-type part of the cost, which is also what team efficiency measures"""
+    distances = haversine_matrix(*_coordinates(teams), *_coordinates(missions))
+    distances[np.isnan(distances)] = UNKNOWN_DISTANCE_KM
+    types = np.array([t['team_type'] for t in teams], dtype=object)
+    needed = np.array([m['needs'] for m in missions], dtype=object)
+    mismatch = (needed[None, :] != None) & (types[:, None] != needed[None, :])  # noqa: E711
+    return DISTANCE_WEIGHT * np.minimum(distances, DISTANCE_SCALE_KM) / DISTANCE_SCALE_KM + TYPE_WEIGHT * mismatch
+
+
+def cost_matrix(teams, missions):
+    """Cost of each team (row) taking each mission (column)"""
+    if not teams or not missions:
+        return np.zeros((len(teams), len(missions)))
+    urgency = np.array([SEVERITY_PRIORITY.get(m['priority'], 0.5) for m in missions])
+    leaders = np.array([t['leader_id'] for t in teams])
+    assignees = np.array([-1 if m['assigned_to'] is None else m['assigned_to'] for m in missions])
+    return (_match_costs(teams, missions) + PRIORITY_WEIGHT * (1 - urgency)[None, :]
+            - STAY_BONUS * (leaders[:, None] == assignees[None, :]))
+
+
+class AssignmentSolver:
+    """Minimum-cost assignment of every row to a distinct column, kept optimal as rows and columns change.
+
+    Each row brings an idle column costing idle_cost. Invariants between
+    calls: u[i] + v[j] <= cost[i, j] everywhere, equality on assigned pairs,
+    v <= 0, and v == 0 on free columns; solve() then only has to route the
+    free rows.
+    """
+
+    def __init__(self, idle_cost=IDLE_COST):
+        self.idle_cost = float(idle_cost)
+        self.load([], [], np.zeros((0, 0)))
+
+    def load(self, rows, cols, cost):
+        """Start over with every row free"""
+        n = len(rows)
+        self.rows = list(rows)
+        self.cols = list(cols) + [None] * n  # None marks an idle column
+        self.cost = np.hstack([np.asarray(cost, dtype=float).reshape(n, len(cols)),
+                               np.full((n, n), self.idle_cost)])
+        self.u = self.cost.min(axis=1) if len(self.cols) else np.zeros(n)
+        self.v = np.zeros(len(self.cols))
+        self.col4row = np.full(n, -1)
+        self.row4col = np.full(len(self.cols), -1)
+        self._index()
+
+    def _index(self):
+        self._row_at = {key: i for i, key in enumerate(self.rows)}
+        self._col_at = {key: j for j, key in enumerate(self.cols) if key is not None}
+        self._real = np.array([key is not None for key in self.cols], dtype=bool)
+
+    def mission_columns(self):
+        """Keys of the non-idle columns, in the order set_rows() expects costs"""
+        return [key for key in self.cols if key is not None]
+
+    def _unassign(self, rows):
+        for i in rows:
+            j = self.col4row[i]
+            if j >= 0:
+                self.col4row[i] = -1
+                self.row4col[j] = -1
+
+    def _release(self, cols):
+        """Free columns and raise their prices to zero, freeing any row that no longer fits"""
+        stack = list(cols)
+        while stack:
+            j = stack.pop()
+            i = self.row4col[j]
+            if i >= 0:
+                self.row4col[j] = -1
+                self.col4row[i] = -1
+            self.v[j] = 0.0
+            for i in np.flatnonzero(self.u > self.cost[:, j] + EPSILON):
+                self.u[i] = np.min(self.cost[i] - self.v)
+                freed = self.col4row[i]
+                if freed >= 0:
+                    self.col4row[i] = -1
+                    self.row4col[freed] = -1
+                    stack.append(freed)
+
+    def set_rows(self, keys, cost):
+        """Add rows or replace their costs (one row per key, columns as mission_columns())"""
+        if not keys:
+            return
+        full = np.full((len(keys), len(self.cols)), self.idle_cost)
+        full[:, self._real] = cost
+        new = [n for n, key in enumerate(keys) if key not in self._row_at]
+        if new:
+            # Each new row brings a free idle column
+            self.cost = np.hstack([self.cost, np.full((len(self.rows), len(new)), self.idle_cost)])
+            self.cost = np.vstack([self.cost, np.full((len(new), self.cost.shape[1]), self.idle_cost)])
+            full = np.hstack([full, np.full((len(keys), len(new)), self.idle_cost)])
+            self.cols += [None] * len(new)
+            self.v = np.append(self.v, np.zeros(len(new)))
+            self.row4col = np.append(self.row4col, np.full(len(new), -1))
+            self.rows += [keys[n] for n in new]
+            self.u = np.append(self.u, np.zeros(len(new)))
+            self.col4row = np.append(self.col4row, np.full(len(new), -1))
+            self._index()
+        rows = np.array([self._row_at[key] for key in keys])
+        held = self.col4row[rows]
+        self._unassign(rows)
+        self.cost[rows] = full
+        self._release(held[held >= 0])
+        self.u[rows] = np.min(self.cost[rows] - self.v[None, :], axis=1)
+
+    def set_cols(self, keys, cost):
+        """Add columns or replace their costs (one column per key, rows as self.rows)"""
+        if not keys:
+            return
+        cost = np.asarray(cost, dtype=float).reshape(len(self.rows), len(keys))
+        new = [n for n, key in enumerate(keys) if key not in self._col_at]
+        if new:
+            self.cost = np.hstack([self.cost, cost[:, new]])
+            self.cols += [keys[n] for n in new]
+            self.v = np.append(self.v, np.zeros(len(new)))
+            self.row4col = np.append(self.row4col, np.full(len(new), -1))
+            self._index()
+        cols = np.array([self._col_at[key] for key in keys])
+        self.cost[:, cols] = cost
+        self._release(cols)
+
+    def remove_cols(self, keys):
+        cols = np.array([self._col_at[key] for key in keys if key in self._col_at], dtype=int)
+        if not cols.size:
+            return
+        self._unassign([i for i in self.row4col[cols] if i >= 0])
+        self._delete_cols(cols)
+
+    def remove_rows(self, keys):
+        rows = np.array([self._row_at[key] for key in keys if key in self._row_at], dtype=int)
+        if not rows.size:
+            return
+        held = self.col4row[rows]
+        self._unassign(rows)
+        self._release(held[held >= 0])
+        keep = np.ones(len(self.rows), dtype=bool)
+        keep[rows] = False
+        renumber = np.cumsum(keep) - 1
+        self.cost, self.u, self.col4row = self.cost[keep], self.u[keep], self.col4row[keep]
+        self.rows = [key for key, kept in zip(self.rows, keep) if kept]
+        self.row4col = np.where(self.row4col >= 0, renumber[self.row4col], -1)
+        # Drop as many idle columns as rows; at least that many are free
+        idle = np.flatnonzero(~self._real & (self.row4col < 0))[-len(rows):]
+        self._delete_cols(idle)
+
+    def _delete_cols(self, cols):
+        keep = np.ones(len(self.cols), dtype=bool)
+        keep[cols] = False
+        renumber = np.cumsum(keep) - 1
+        self.cost, self.v, self.row4col = self.cost[:, keep], self.v[keep], self.row4col[keep]
+        self.cols = [key for key, kept in zip(self.cols, keep) if kept]
+        self.col4row = np.where(self.col4row >= 0, renumber[self.col4row], -1)
+        self._index()
+
+    def _augment(self, start):
+        """Route free row start along a shortest alternating path to a free column"""
+        cost, u, v, row4col, col4row = self.cost, self.u, self.v, self.row4col, self.col4row
+        shortest = np.full(len(self.cols), np.inf)
+        path = np.full(len(self.cols), -1)
+        remaining = np.ones(len(self.cols), dtype=bool)
+        scanned_rows = []
+        lowest, i = 0.0, start
+        while True:
+            scanned_rows.append(i)
+            reduced = lowest + cost[i] - u[i] - v
+            better = remaining & (reduced < shortest)
+            path[better] = i
+            shortest[better] = reduced[better]
+            candidates = np.where(remaining, shortest, np.inf)
+            j = int(np.argmin(candidates))
+            lowest = candidates[j]
+            if not np.isfinite(lowest):
+                raise ValueError('no feasible assignment')
+            if row4col[j] >= 0:
+                ties = np.flatnonzero((candidates == lowest) & (row4col < 0))
+                if ties.size:
+                    j = int(ties[0])
+            remaining[j] = False
+            if row4col[j] < 0:
+                break
+            i = row4col[j]
+
+        u[start] += lowest
+        others = np.array(scanned_rows[1:], dtype=int)
+        if others.size:
+            u[others] += lowest - shortest[col4row[others]]
+        scanned = ~remaining
+        v[scanned] -= lowest - shortest[scanned]
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == start:
+                break
+
+    def solve(self):
+        """Assign every free row; returns how many were routed"""
+        free = np.flatnonzero(self.col4row < 0)
+        for i in free:
+            self._augment(i)
+        return len(free)
+
+    def assignment(self):
+        """{row key: (column key or None when idle, cost)}"""
+        return {key: (self.cols[j], float(self.cost[i, j]))
+                for i, (key, j) in enumerate(zip(self.rows, self.col4row)) if j >= 0}
+
+    def total_cost(self):
+        assigned = self.col4row >= 0
+        return float(self.cost[np.flatnonzero(assigned), self.col4row[assigned]].sum())
+
+
+class TeamPlanner:
+    """Per-process plan of teams to missions, caught up with every worker's writes on refresh"""
+
+    TABLES = (Mission.__tablename__, Team.__tablename__)
+
+    def __init__(self):
+        self.solver = AssignmentSolver()
+        self.teams = {}  # plannable teams by id
+        self.missions = {}  # open missions by id, planned or not
+        self.versions = None
+        self.watermark = None
+        self._lock = threading.Lock()
+
+    def _team_rows(self):
+        columns = [getattr(Team, name) for name in TEAM_FIELDS]
+        return {row.id: dict(zip(TEAM_FIELDS, row)) for row in db.session.query(*columns)
+                .filter(Team.status.in_(PLANNABLE_TEAM_STATUSES))}
+
+    def _mission_rows(self, *criteria):
+        columns = [getattr(Mission, name) for name in MISSION_FIELDS]
+        records = [dict(zip(MISSION_FIELDS, row)) for row in db.session.query(*columns).filter(*criteria)]
+        for record in records:
+            record['needs'] = required_team_type(f"{record['title']} {record['description']}")
+        return records
+
+    def _plannable(self, mission, leaders):
+        return mission['assigned_to'] is None or mission['assigned_to'] in leaders
+
+    def _planned_missions(self):
+        leaders = {team['leader_id'] for team in self.teams.values()}
+        return [m for m in self.missions.values() if self._plannable(m, leaders)]
+
+    def _load(self):
+        self.teams = self._team_rows()
+        self.missions = {m['id']: m for m in self._mission_rows(Mission.status.in_(OPEN_MISSION_STATUSES))}
+        teams, missions = list(self.teams.values()), self._planned_missions()
+        self.solver.load([t['id'] for t in teams], [m['id'] for m in missions], cost_matrix(teams, missions))
+
+    def _apply_changes(self):
+        """Re-cost only the teams and missions written since the last refresh"""
+        since = self.watermark - SYNC_OVERLAP
+        teams = self._team_rows()
+        changed_teams = [t for team_id, t in teams.items() if team_id not in self.teams
+                         or any(t[name] != self.teams[team_id][name] for name in TEAM_INPUTS)]
+        gone_teams = [team_id for team_id in self.teams if team_id not in teams]
+        self.teams = teams
+
+        changed_missions = []
+        for mission in self._mission_rows(Mission.updated_at > since):
+            previous = self.missions.get(mission['id'])
+            if mission['status'] not in OPEN_MISSION_STATUSES:
+                self.missions.pop(mission['id'], None)
+            elif previous is None or any(mission[name] != previous[name] for name in MISSION_INPUTS):
+                self.missions[mission['id']] = mission
+                changed_missions.append(mission['id'])
+            else:
+                previous['assigned_to'] = mission['assigned_to']
+        for (mission_id,) in db.session.query(Tombstone.entity_id).filter(
+                Tombstone.entity == SYNC_ENTITIES[Mission], Tombstone.user_id.is_(None),
+                Tombstone.deleted_at > since):
+            self.missions.pop(mission_id, None)
+
+        planned = {m['id']: m for m in self._planned_missions()}
+        self.solver.remove_cols([key for key in self.solver.mission_columns() if key not in planned])
+        self.solver.remove_rows(gone_teams)
+        columns = [planned[key] for key in self.solver.mission_columns()]
+        self.solver.set_rows([t['id'] for t in changed_teams], cost_matrix(changed_teams, columns))
+        added = [m for mission_id, m in planned.items()
+                 if mission_id in changed_missions or mission_id not in self.solver._col_at]
+        rows = [self.teams[key] for key in self.solver.rows]
+        self.solver.set_cols([m['id'] for m in added], cost_matrix(rows, added))
+        return len(changed_teams) + len(gone_teams) + len(added)
+
+    def _write(self, plan):
+        """Store changed assignments on missions and teams; returns how many rows were written"""
+        leader_of = {team_id: self.teams[team_id]['leader_id'] for team_id in plan}
+        target = {mission_id: leader_of[team_id] for team_id, (mission_id, _) in plan.items() if mission_id}
+        now = datetime.utcnow()
+        missions = [m for m in self._planned_missions() if m['assigned_to'] != target.get(m['id'])]
+        previous = [(mission['id'], mission['assigned_to']) for mission in missions]
+        for mission in missions:
+            mission['assigned_to'] = target.get(mission['id'])
+
+        pairs = [(self.teams[team_id], self.missions[mission_id], cost)
+                 for team_id, (mission_id, cost) in plan.items() if mission_id is not None]
+        match = np.diagonal(_match_costs([t for t, _, _ in pairs], [m for _, m, _ in pairs])) if pairs else []
+        assigned = {team['id']: (mission, cost, float(quality)) for (team, mission, cost), quality in zip(pairs, match)}
+        teams = []
+        for team_id in plan:
+            team = self.teams[team_id]
+            if team_id not in assigned:
+                assignments, efficiency = [], None
+            else:
+                mission, cost, quality = assigned[team_id]
+                distance = None if None in (team['latitude'], mission['latitude']) else round(haversine_km(
+                    team['latitude'], team['longitude'], mission['latitude'], mission['longitude']), 1)
+                assignments = [{'mission_id': mission['id'], 'cost': round(cost, 3), 'distance_km': distance}]
+                efficiency = round(1 - quality / (DISTANCE_WEIGHT + TYPE_WEIGHT), 3)
+            assignments = json.dumps(assignments)
+            if (assignments, efficiency) != (team['ai_optimal_assignments'], team['ai_team_efficiency']):
+                team['ai_optimal_assignments'], team['ai_team_efficiency'] = assignments, efficiency
+                teams.append(team)
+        if not missions and not teams:
+            return 0
+
+        session = db.session
+        connection = session.connection()
+        # Core updates skip the flush hooks: version and stream the changes here
+        bump_versions(connection, set(self.TABLES))
+        if missions:
+            table = Mission.__table__
+            connection.execute(update(table).where(table.c.id == bindparam('mission_id'))
+                               .values(assigned_to=bindparam('assignee'), updated_at=now),
+                               [{'mission_id': m['id'], 'assignee': m['assigned_to']} for m in missions])
+            record_removals(connection, Mission, previous)
+            previous_assignee = dict(previous)
+            for mission in missions:
+                record_event(session, Mission, 'updated', SimpleNamespace(**mission),
+                             previous={'assigned_to': previous_assignee[mission['id']]})
+        if teams:
+            table = Team.__table__
+            connection.execute(update(table).where(table.c.id == bindparam('team_id'))
+                               .values(ai_optimal_assignments=bindparam('assignments'),
+                                       ai_team_efficiency=bindparam('efficiency')),
+                               [{'team_id': t['id'], 'assignments': t['ai_optimal_assignments'],
+                                 'efficiency': t['ai_team_efficiency']} for t in teams])
+        session.commit()
+        return len(missions) + len(teams)
+
+    def refresh(self, full=False):
+        """Catch up with team and mission changes, re-solve and store the plan; returns a summary"""
+        started = time.perf_counter()
+        with self._lock:
+            versions = [version for version, _ in collection_versions(list(self.TABLES))]
+            now = datetime.utcnow()
+            # Tombstones older than SYNC_TOKEN_MAX_AGE may be pruned: reload instead
+            if full or self.watermark is None or self.watermark < now - SYNC_TOKEN_MAX_AGE:
+                mode, changed = 'full', None
+                self._load()
+            elif versions != self.versions:
+                mode, changed = 'incremental', self._apply_changes()
+            else:
+                mode, changed = 'unchanged', 0
+            routed = self.solver.solve()
+            plan = self.solver.assignment()
+            written = self._write(plan) if mode != 'unchanged' else 0
+            if written:
+                after = [version for version, _ in collection_versions(list(self.TABLES))]
+                # Adopt our own write unless another worker wrote in between
+                if after == [version + 1 for version in versions]:
+                    versions = after
+            self.versions = versions
+            self.watermark = now
+            return {
+                'mode': mode,
+                'teams': len(self.solver.rows),
+                'missions': len(self.solver.mission_columns()),
+                'assigned': sum(1 for mission_id, _ in plan.values() if mission_id is not None),
+                'changed': changed,
+                'routed': routed,
+                'written': written,
+                'total_cost': round(self.solver.total_cost(), 3),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.solver = AssignmentSolver()
+            self.teams, self.missions = {}, {}
+            self.versions = self.watermark = None
+
+
+planner = TeamPlanner()
+_threads = []
+
+PLANNER_LEASE = 'assignment-planner'
+LEASE_TTL = 300  # seconds before a planner that died without releasing can be replaced
+_lease_ttl = LEASE_TTL
+REQUEST_POLL = 1.0  # seconds between checks for solves asked of this process by other workers
+REQUEST_WAIT = 10.0  # seconds a solve asked of another process waits for its result
+
+
+def plan(full=False):
+    """Refresh the plan in this process; raises leases.LeaseHeld while another process plans.
+
+    The lease names the process that planned last. When that is another
+    process, the plan kept here is stale and is rebuilt with a full solve.
+    A process running the planner thread keeps the lease between runs.
+    """
+    previous = leases.acquire(PLANNER_LEASE, _lease_ttl)
+    try:
+        served, full_requested = leases.claim_requests(PLANNER_LEASE)
+        result = planner.refresh(full=full or full_requested or previous not in (None, leases.holder_id()))
+        leases.record_result(PLANNER_LEASE, served, result)
+        return result
+    finally:
+        if not _threads:
+            leases.release(PLANNER_LEASE)
+
+
+def solve(full=False, wait=None):
+    """Plan now, here or, while another process holds the lease, by that process.
+
+    Returns the result of a run that started after the call, or None if
+    the holder has not run within wait seconds (it still will). When the
+    holder releases or lets the lease lapse meanwhile, this process plans.
+    """
+    try:
+        return plan(full)
+    except leases.LeaseHeld:
+        number = leases.request_run(PLANNER_LEASE, full)
+    deadline = time.monotonic() + (REQUEST_WAIT if wait is None else wait)
+    while True:
+        result = leases.result_for(PLANNER_LEASE, number)
+        if result is not None:
+            return result
+        try:
+            return plan(full)
+        except leases.LeaseHeld:
+            pass
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(REQUEST_POLL)
+
+
+def _planner_loop(app, interval):
+    next_run = 0.0
+    while True:
+        with app.app_context():
+            try:
+                # Run on schedule, or sooner when another worker asked for a solve
+                if time.monotonic() >= next_run or leases.pending_requests(PLANNER_LEASE):
+                    next_run = time.monotonic() + interval
+                    plan()
+            except leases.LeaseHeld:
+                pass
+            except Exception as e:
+                print(f"Assignment planner error: {e}")
+                db.session.rollback()
+        time.sleep(min(interval, REQUEST_POLL))
+
+
+def start_planner(app, interval):
+    """Re-plan every interval seconds in a daemon thread (once per process; 0 disables)"""
+    global _lease_ttl
+    if _threads or interval <= 0:
+        return
+    # Renewed every run; lapses after a few missed runs so another worker takes over
+    _lease_ttl = 3 * interval
+    thread = threading.Thread(target=_planner_loop, args=(app, interval), name='assignment-planner', daemon=True)
+    thread.start()
+    _threads.append(thread)
@@ -0,0 +1,36 @@
+"""
+One-off backfills
+Fills in data for rows written before a feature existed (analytics rollups
+and triage scores) and prunes expired sync tombstones. Run once per deploy,
+before the web workers start, so they are not repeated by every worker at
+boot.
+
+    python backfill.py              # only what is missing
+    python backfill.py --rollups    # also recompute every rollup cell
+"""
+
+import argparse
+
+from app import app, db
+from models import AnalyticsRollup
+from analytics import rebuild_rollups
+import triage
+from sync import prune_tombstones
+
+
+def backfill(rollups=False):
+    """Rebuild rollups when asked or when none exist yet, score unscored reports and prune tombstones"""
+    with app.app_context():
+        rebuilt = rollups or db.session.query(AnalyticsRollup.id).first() is None
+        if rebuilt:
+            rebuild_rollups()
+        return {'rollups_rebuilt': rebuilt, 'reports_scored': triage.score_unscored(),
+                'tombstones_pruned': prune_tombstones()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rollups', action='store_true', help='recompute every analytics rollup cell')
+    result = backfill(parser.parse_args().rollups)
+    print(f"Rollups rebuilt: {result['rollups_rebuilt']}, reports scored: {result['reports_scored']}, "
+          f"tombstones pruned: {result['tombstones_pruned']}")
@@ -0,0 +1,129 @@
+"""
+BLE mesh ingestion
+Reports buffered on mesh gateways arrive in large flushes. They are validated
+up front, de-duplicated with one set-based lookup per batch and written with
+one multi-row INSERT per batch (ON CONFLICT DO NOTHING where the dialect
+supports it), so re-sending a flush is harmless. Each batch is scored for
+triage in the same transaction.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Report, User
+from spatial import parse_coordinates, InvalidCoordinates
+from analytics import record_bulk_insert
+from conditional import bump_versions
+from triage import score_reports
+
+BATCH_SIZE = 500
+
+REQUIRED_REPORT_FIELDS = ('id', 'title', 'description', 'location', 'user_id')
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+STATUSES = ('pending', 'verified', 'resolved')
+
+
+def _validate_report(item):
+    """Normalised row for a synced report, or an error message"""
+    if not isinstance(item, dict):
+        return None, 'report must be an object'
+    missing = [field for field in REQUIRED_REPORT_FIELDS if item.get(field) in (None, '')]
+    if missing:
+        return None, f"missing fields: {', '.join(missing)}"
+    try:
+        report_id = int(item['id'])
+        user_id = int(item['user_id'])
+    except (TypeError, ValueError):
+        return None, 'id and user_id must be integers'
+    severity = item.get('severity') or 'medium'
+    status = item.get('status') or 'pending'
+    if severity not in SEVERITIES:
+        return None, f'invalid severity: {severity}'
+    if status not in STATUSES:
+        return None, f'invalid status: {status}'
+    try:
+        latitude, longitude = parse_coordinates(item.get('latitude'), item.get('longitude'), required=False)
+    except InvalidCoordinates as e:
+        return None, str(e)
+    return {
+        'id': report_id,
+        'title': str(item['title'])[:200],
+        'description': str(item['description']),
+        'location': str(item['location'])[:200],
+        'latitude': latitude,
+        'longitude': longitude,
+        'severity': severity,
+        'status': status,
+        'user_id': user_id,
+    }, None
+
+
+def _insert_new(connection, rows):
+    """Insert rows, skipping ids that already exist; returns the ids written"""
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(Report.__table__).on_conflict_do_nothing(index_elements=['id']) \
+            .returning(Report.__table__.c.id)
+        return {row_id for (row_id,) in connection.execute(stmt, rows)}
+    connection.execute(insert(Report.__table__), rows)
+    return {row['id'] for row in rows}
+
+
+def ingest_reports(items, batch_size=BATCH_SIZE):
+    """Store synced reports; returns one {id, status[, error]} per item, in order.
+
+    status is 'accepted' (inserted), 'duplicate' (id already stored or
+    repeated in the payload) or 'rejected' (failed validation or unknown
+    user_id).
+    """
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        row, error = _validate_report(item)
+        item_id = item.get('id') if isinstance(item, dict) else None
+        if error:
+            results.append({'id': item_id, 'status': 'rejected', 'error': error})
+        else:
+            results.append({'id': row['id'], 'status': 'accepted'})
+            valid.append((index, row))
+
+    connection = db.session.connection()
+    inserted_any = False
+    seen = set()
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        ids = [row['id'] for _, row in batch]
+        existing = {row_id for (row_id,) in db.session.query(Report.id).filter(Report.id.in_(ids))}
+        user_ids = {row['user_id'] for _, row in batch}
+        known_users = {user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(user_ids))}
+
+        now = datetime.utcnow()
+        pending = []
+        for index, row in batch:
+            if row['user_id'] not in known_users:
+                results[index].update(status='rejected', error=f"unknown user_id: {row['user_id']}")
+                continue
+            if row['id'] in existing or row['id'] in seen:
+                results[index]['status'] = 'duplicate'
+                continue
+            seen.add(row['id'])
+            row.update(created_at=now, updated_at=now)
+            pending.append((index, row))
+
+        if not pending:
+            continue
+        written = _insert_new(connection, [row for _, row in pending])
+        for index, row in pending:
+            if row['id'] not in written:
+                # Inserted concurrently by another gateway since the lookup
+                results[index]['status'] = 'duplicate'
+        record_bulk_insert(connection, Report, [row for _, row in pending if row['id'] in written])
+        score_reports(connection, list(written))
+        inserted_any = inserted_any or bool(written)
+
+    if inserted_any:
+        bump_versions(connection, {Report.__tablename__})
+    db.session.commit()
+    return results
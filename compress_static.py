@@ -0,0 +1,55 @@
+"""
+Precompress static assets
+Writes a .gz (and, with the Brotli package installed, a .br) copy of every
+compressible file under static/ at maximum compression. Run at build time;
+the static route serves these copies to clients that accept them.
+"""
+
+import gzip
+import mimetypes
+import os
+import sys
+
+from compression import COMPRESSIBLE_TYPES, SUFFIXES, brotli
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+def _encoders():
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=11)
+    return encoders
+
+
+def compress_static(folder=STATIC_FOLDER):
+    """Write precompressed copies; returns [(path, raw bytes, {encoding: bytes})]"""
+    encoders = _encoders()
+    written = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.endswith(tuple(SUFFIXES.values())) or mimetypes.guess_type(name)[0] not in COMPRESSIBLE_TYPES:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            sizes = {}
+            for encoding, encode in encoders.items():
+                target = path + SUFFIXES[encoding]
+                compressed = encode(data)
+                if len(compressed) >= len(data):
+                    # Not worth serving; drop a stale copy so the original wins
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+            written.append((path, len(data), sizes))
+    return written
+
+
+if __name__ == '__main__':
+    for path, raw, sizes in compress_static(*sys.argv[1:]):
+        encoded = ', '.join(f'{encoding} {size}' for encoding, size in sizes.items())
+        print(f'{os.path.relpath(path, STATIC_FOLDER)}: {raw} -> {encoded or "skipped"}')
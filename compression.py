@@ -0,0 +1,143 @@
+"""
+Response compression
+Dynamic responses (JSON, HTML, JS, CSS) above COMPRESS_MIN_SIZE bytes are
+compressed with the best encoding the client accepts: brotli when the
+Brotli package is installed, otherwise gzip. Static files are compressed
+once at build time by compress_static.py; the static route serves the
+.br/.gz sibling of a file directly, so no CPU is spent per request. Raw and
+sent bytes are counted per endpoint.
+"""
+
+import gzip
+import mimetypes
+import os
+import threading
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip, 1-9
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))  # brotli, 0-11
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'application/manifest+json', 'application/xml',
+    'image/svg+xml', 'text/css', 'text/html', 'text/javascript', 'text/plain', 'text/xml',
+}
+
+# encoding -> file suffix of precompressed static assets
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    """Encodings this process can produce, preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiated_encoding():
+    """Encoding to use for the current request, or None for identity"""
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+class TransferStats:
+    """Per-endpoint count of responses, bytes before and bytes after compression"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, raw, sent):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint or 'unknown', [0, 0, 0])
+            entry[0] += 1
+            entry[1] += raw
+            entry[2] += sent
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'responses': responses,
+                    'raw_bytes': raw,
+                    'sent_bytes': sent,
+                    'ratio': round(sent / raw, 3) if raw else None,
+                }
+                for endpoint, (responses, raw, sent) in sorted(self._endpoints.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+transfer_stats = TransferStats()
+
+
+def compress_response(response):
+    """after_request hook: compress a buffered response when worthwhile"""
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        # Files from send_file and streamed bodies (SSE, exports) pass through
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = None
+    if (200 <= response.status_code < 300 and response.status_code != 204
+            and response.mimetype in COMPRESSIBLE_TYPES and len(data) >= COMPRESS_MIN_SIZE):
+        encoding = negotiated_encoding()
+    if encoding is not None:
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            response.set_data(compressed)
+            response.headers['Content-Encoding'] = encoding
+    transfer_stats.record(request.endpoint, len(data), response.content_length or 0)
+    return response
+
+
+def _precompressed_encoding(folder, filename):
+    """Best accepted encoding with an up-to-date precompressed copy of filename"""
+    try:
+        source = os.path.getmtime(safe_join(folder, filename))
+    except (OSError, TypeError):
+        return None
+    candidates = []
+    for encoding, suffix in SUFFIXES.items():
+        path = safe_join(folder, filename + suffix)
+        if os.path.isfile(path) and os.path.getmtime(path) >= source:
+            candidates.append(encoding)
+    return request.accept_encodings.best_match(candidates) if candidates else None
+
+
+def precompressed_static(app):
+    """Static view that serves foo.js.br / foo.js.gz when present and current"""
+    def static(filename):
+        encoding = _precompressed_encoding(app.static_folder, filename)
+        if encoding is None:
+            response = send_from_directory(app.static_folder, filename)
+            raw = response.content_length or 0
+        else:
+            response = send_from_directory(app.static_folder, filename + SUFFIXES[encoding],
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            raw = os.path.getsize(safe_join(app.static_folder, filename))
+        response.vary.add('Accept-Encoding')
+        transfer_stats.record(request.endpoint, raw, response.content_length or 0)
+        return response
+    return static
+
+
+def init_compression(app):
+    """Compress dynamic responses and serve precompressed static files"""
+    app.after_request(compress_response)
+    app.view_functions['static'] = precompressed_static(app)
@@ -0,0 +1,161 @@
+"""
+Conditional GET
+Every tracked table has a row in collection_version that is bumped in the
+same transaction as any insert, update or delete on it. Views decorated with
+conditional_get() derive a strong ETag and Last-Modified from those versions
+and answer If-None-Match / If-Modified-Since with 304 before running the
+view, so unchanged collections cost one primary-key lookup.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+
+from compression import negotiated_encoding
+from models import (db, User, Report, Alert, Mission, Distribution, Safehouse, Resource, Team,
+                    CollectionVersion)
+
+TRACKED_MODELS = (User, Report, Alert, Mission, Distribution, Safehouse, Resource, Team)
+_TRACKED_TABLES = {model: model.__tablename__ for model in TRACKED_MODELS}
+
+_PENDING_KEY = 'collection_version_bumps'
+
+
+def _deploy_fingerprint():
+    """Changes whenever code or templates are redeployed, so ETags do too"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(root, name) for name in os.listdir(root) if name.endswith('.py')]
+    templates = os.path.join(root, 'templates')
+    if os.path.isdir(templates):
+        paths += [os.path.join(templates, name) for name in os.listdir(templates)]
+    latest = max((os.path.getmtime(path) for path in paths), default=0)
+    return f'{latest:.0f}'
+
+
+DEPLOY_FINGERPRINT = _deploy_fingerprint()
+
+
+def bump_versions(connection, names):
+    """Increment the version of the given collections in the current transaction"""
+    if not names:
+        return
+    now = datetime.utcnow()
+    table = CollectionVersion.__table__
+    rows = [{'name': name, 'version': 1, 'updated_at': now} for name in sorted(names)]
+
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': table.c.version + 1, 'updated_at': stmt.excluded.updated_at}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.name == row['name'])
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), [row])
+
+
+def collection_versions(names):
+    """(version, updated_at) for each collection name; untouched ones are (0, None)"""
+    rows = db.session.query(CollectionVersion.name, CollectionVersion.version,
+                            CollectionVersion.updated_at) \
+        .filter(CollectionVersion.name.in_(names)).all()
+    found = {row.name: (row.version, row.updated_at) for row in rows}
+    return [found.get(name, (0, None)) for name in names]
+
+
+def _validators(names, variant):
+    versions = collection_versions(names)
+    user_key = current_user.get_id() if current_user.is_authenticated else 'anonymous'
+    digest = hashlib.sha1('|'.join([
+        DEPLOY_FINGERPRINT,
+        variant,
+        ','.join(f'{name}:{version}' for name, (version, _) in zip(names, versions)),
+        str(user_key),
+        request.full_path,
+        request.headers.get('Accept-Language', ''),
+        negotiated_encoding() or 'identity',
+    ]).encode()).hexdigest()
+    modified = [updated_at for _, updated_at in versions if updated_at is not None]
+    return digest, (max(modified).replace(microsecond=0) if modified else None)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional_get(*collections, variant=''):
+    """Serve GET/HEAD with ETag/Last-Modified derived from collection versions.
+
+    collections are table names (e.g. 'report'); the ETag also covers the
+    user, the full query string, Accept-Language, the negotiated content
+    encoding and the deployed code, so per-user, localized, compressed and
+    paginated views get their own validators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages make a page unique to this one render
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            etag, last_modified = _validators(list(collections), variant or request.endpoint)
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept-Language')
+            response.vary.add('Accept-Encoding')
+            # The user comes from the session cookie or a bearer token
+            response.vary.add('Cookie')
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
+
+
+def _collect_bumps(db_session, flush_context, instances):
+    names = db_session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        name = _TRACKED_TABLES.get(type(obj))
+        if name is not None and (obj not in db_session.dirty or db_session.is_modified(obj)):
+            names.add(name)
+
+
+def _apply_bumps(db_session, flush_context):
+    names = db_session.info.pop(_PENDING_KEY, None)
+    if names:
+        bump_versions(db_session.connection(), names)
+
+
+def _discard_bumps(db_session, previous_transaction):
+    db_session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(db.session, 'before_flush', _collect_bumps)
+event.listen(db.session, 'after_flush', _apply_bumps)
+event.listen(db.session, 'after_soft_rollback', _discard_bumps)
@@ -0,0 +1,158 @@
+"""
+AI enrichment queue
+Report and mission creation only records a job row in the same transaction
+as the new entity. A small pool of background threads per process claims
+jobs from the enrichment_job table, runs the registered AI handler and
+retries failures with exponential backoff, so request latency never
+includes AI work. Claims are conditional UPDATEs, so any number of gunicorn
+workers can share the table.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, Report, Mission, EnrichmentJob
+
+MAX_ATTEMPTS = 5
+POLL_INTERVAL = 5.0  # seconds between queue checks when idle
+STALE_AFTER = timedelta(minutes=5)  # running jobs older than this are assumed orphaned
+
+ENRICHED_MODELS = {'report': Report, 'mission': Mission}
+
+_handlers = {}
+_wakeup = threading.Event()
+_workers = []
+
+
+def register_handler(entity, handler):
+    """Register handler(obj) that fills the AI fields of one entity type"""
+    _handlers[entity] = handler
+
+
+def enqueue(entity, entity_id):
+    """Add a job to the current transaction; call notify_workers() after commit"""
+    job = EnrichmentJob(entity=entity, entity_id=entity_id, status='pending', attempts=0,
+                        run_after=datetime.utcnow())
+    db.session.add(job)
+    return job
+
+
+def notify_workers():
+    """Wake idle workers so a freshly committed job starts immediately"""
+    _wakeup.set()
+
+
+def requeue_stale_jobs():
+    """Return jobs whose worker died mid-run to the queue"""
+    db.session.execute(
+        update(EnrichmentJob)
+        .where(EnrichmentJob.status == 'running',
+               EnrichmentJob.updated_at < datetime.utcnow() - STALE_AFTER)
+        .values(status='pending', run_after=datetime.utcnow())
+    )
+    db.session.commit()
+
+
+def _claim_next():
+    """Atomically claim the oldest runnable job, or return None"""
+    while True:
+        now = datetime.utcnow()
+        candidate = db.session.query(EnrichmentJob.id) \
+            .filter(EnrichmentJob.status == 'pending', EnrichmentJob.run_after <= now) \
+            .order_by(EnrichmentJob.run_after, EnrichmentJob.id).first()
+        if candidate is None:
+            return None
+        claimed = db.session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.id == candidate.id, EnrichmentJob.status == 'pending')
+            .values(status='running', attempts=EnrichmentJob.attempts + 1, updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(EnrichmentJob, candidate.id)
+        # Another worker won the race for this job; try the next one
+
+
+def run_job(job):
+    """Run one claimed job and record its outcome"""
+    job_id = job.id
+    model = ENRICHED_MODELS.get(job.entity)
+    handler = _handlers.get(job.entity)
+    obj = db.session.get(model, job.entity_id) if model else None
+    if handler is None or obj is None:
+        job.status = 'failed'
+        job.last_error = f'nothing to enrich for {job.entity} {job.entity_id}'
+        db.session.commit()
+        return
+
+    try:
+        handler(obj)
+        job.status = 'done'
+        job.last_error = None
+        db.session.commit()
+    except Exception as e:
+        print(f"Enrichment job {job_id} error: {e}")
+        db.session.rollback()
+        job = db.session.get(EnrichmentJob, job_id)
+        job.last_error = str(e)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+        db.session.commit()
+
+
+def run_pending_jobs(limit=None):
+    """Process runnable jobs until the queue is empty (or limit is reached)"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = _claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def _worker_loop(app):
+    while True:
+        with app.app_context():
+            try:
+                requeue_stale_jobs()
+                run_pending_jobs()
+            except Exception as e:
+                print(f"Enrichment worker error: {e}")
+                db.session.rollback()
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(app, count):
+    """Start count daemon worker threads for this process (once)"""
+    if _workers:
+        return
+    for index in range(count):
+        worker = threading.Thread(target=_worker_loop, args=(app,), name=f'enrichment-{index}', daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def job_status(job):
+    """Serialisable status of a job, with the enriched fields once done"""
+    body = {
+        'job_id': job.id,
+        'entity': job.entity,
+        'entity_id': job.entity_id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.last_error,
+    }
+    obj = db.session.get(ENRICHED_MODELS[job.entity], job.entity_id) if job.status == 'done' else None
+    if isinstance(obj, Report):
+        body['result'] = {'ai_summary': obj.ai_summary, 'ai_priority_score': obj.ai_priority_score}
+    elif isinstance(obj, Mission):
+        body['result'] = {'ai_strategy': obj.ai_strategy, 'ai_estimated_duration': obj.ai_estimated_duration}
+    return body
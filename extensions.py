@@ -1,14 +1,139 @@
+from flask import current_app, jsonify, request
 from flask_login import LoginManager
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+import os
+import threading
+import time
+
+from models import db, User
 
 login_manager = LoginManager()
 
+# Seconds a worker may serve a cached identity. Changes made through this
+# worker invalidate immediately; other workers see them within the TTL.
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+
+# Lifetime of bearer tokens. They are verified without a database read, so a
+# role change or deactivation only reaches a token when it is reissued.
+API_TOKEN_TTL = int(os.environ.get('API_TOKEN_TTL', 3600))
+
+class UserIdentity:
+    """Detached snapshot of the user fields requests read from current_user"""
+
+    __slots__ = ('id', 'role', 'name', 'is_active', 'preferred_language')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, role, name, is_active, preferred_language):
+        self.id = id
+        self.role = role
+        self.name = name
+        self.is_active = is_active
+        self.preferred_language = preferred_language
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f'<UserIdentity {self.id} {self.role}>'
+
+class IdentityCache:
+    """Per-worker TTL cache of UserIdentity by user id"""
+
+    def __init__(self, ttl=USER_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, user_id, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        identity = load(user_id)
+        if identity is not None:
+            with self._lock:
+                self._entries[user_id] = (identity, now + self.ttl)
+        return identity
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+identity_cache = IdentityCache()
+
+def _load_identity(user_id):
+    row = db.session.query(User.id, User.role, User.name, User.is_active, User.preferred_language) \
+        .filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return UserIdentity(row.id, row.role, row.name, row.is_active is not False, row.preferred_language)
+
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return identity_cache.get(user_id, _load_identity)
+
+def _collect_changed_users(session, flush_context, instances):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+def _invalidate_changed_users(session):
+    # After commit, so a concurrent reload cannot cache the pre-commit row
+    identity_cache.invalidate(*session.info.pop('changed_user_ids', ()))
+
+def _discard_changed_users(session, previous_transaction):
+    session.info.pop('changed_user_ids', None)
+
+event.listen(db.session, 'before_flush', _collect_changed_users)
+event.listen(db.session, 'after_commit', _invalidate_changed_users)
+event.listen(db.session, 'after_soft_rollback', _discard_changed_users)
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='civitas-api-token')
+
+def issue_api_token(user):
+    """HMAC-signed bearer token carrying the user's id, role and name"""
+    return _token_serializer().dumps({'id': user.id, 'role': user.role, 'name': user.name,
+                                      'lang': user.preferred_language})
+
+def _bearer_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' and token.strip() else None
+
+@login_manager.request_loader
+def load_user_from_token(request):
+    """Identity from an Authorization: Bearer token, without touching the database"""
+    token = _bearer_token()
+    if token is None:
+        return None
+    try:
+        claims = _token_serializer().loads(token, max_age=API_TOKEN_TTL)
+        return UserIdentity(int(claims['id']), claims['role'], claims.get('name'), True, claims.get('lang'))
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
 
 @login_manager.unauthorized_handler
 def unauthorized():
     from flask import redirect, url_for
+    if _bearer_token() is not None:
+        # Scripted clients get an error they can act on, not the login page
+        return jsonify({'error': 'invalid or expired token'}), 401
     return redirect(url_for('login'))
-
@@ -0,0 +1,125 @@
+"""
+Leases
+Jobs that every web worker starts (the assignment planner) but only one
+process may run at a time take a lease: a row naming the holding process
+and when its claim runs out. Taking a lease is a compare-and-swap UPDATE in
+its own transaction, so it works across processes and hosts on SQLite and
+Postgres alike. A released lease keeps its holder, so the next taker can
+tell whether another process ran the job since it last did.
+
+A process that finds the lease held can ask the holder to run instead:
+requests is a counter it bumps, the holder notes the count it has seen as
+each run starts and stores the run's result next to it, and the asker
+waits until the served count reaches its request.
+"""
+
+import json
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Lease
+
+
+class LeaseHeld(Exception):
+    """Raised when another live process holds the lease"""
+
+    def __init__(self, name, holder):
+        super().__init__(f'{name} is running in another process ({holder})')
+        self.holder = holder
+
+
+def holder_id():
+    """This process, as recorded in the leases it takes (read per call, so forked workers differ)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire(name, ttl):
+    """Take or renew the lease for ttl seconds; returns the previous holder (None for a new lease).
+
+    Raises LeaseHeld if another process holds an unexpired lease.
+    """
+    table = Lease.__table__
+    me = holder_id()
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    with db.engine.begin() as connection:
+        row = connection.execute(select(table.c.holder, table.c.expires_at).where(table.c.name == name)).first()
+        if row is None:
+            try:
+                connection.execute(table.insert(), [{'name': name, 'holder': me, 'expires_at': expires_at}])
+            except IntegrityError:
+                # Another process created it first
+                raise LeaseHeld(name, 'unknown')
+            return None
+        if row.holder != me and row.expires_at > now:
+            raise LeaseHeld(name, row.holder)
+        taken = connection.execute(update(table).where(
+            table.c.name == name, table.c.holder == row.holder, table.c.expires_at == row.expires_at
+        ).values(holder=me, expires_at=expires_at))
+        if taken.rowcount == 0:
+            raise LeaseHeld(name, 'unknown')
+        return row.holder
+
+
+def release(name):
+    """Let the lease go now, if this process holds it"""
+    table = Lease.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.name == name, table.c.holder == holder_id())
+                           .values(expires_at=datetime.utcnow()))
+
+
+def request_run(name, full=False):
+    """Ask the holder of the lease to run the job soon; returns the request's number"""
+    table = Lease.__table__
+    values = {'requests': func.coalesce(table.c.requests, 0) + 1}
+    if full:
+        values['request_full'] = True
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.name == name).values(**values))
+        return connection.execute(select(table.c.requests).where(table.c.name == name)).scalar() or 0
+
+
+def pending_requests(name):
+    """Whether a request is waiting for a run"""
+    table = Lease.__table__
+    with db.engine.connect() as connection:
+        row = connection.execute(select(table.c.requests, table.c.served).where(table.c.name == name)).first()
+    return row is not None and (row.requests or 0) > (row.served or 0)
+
+
+def claim_requests(name):
+    """Requests a run starting now serves: (request number, whether a full run was asked for)"""
+    table = Lease.__table__
+    with db.engine.begin() as connection:
+        row = connection.execute(select(table.c.requests, table.c.request_full)
+                                 .where(table.c.name == name)).first()
+        if row is None:
+            return 0, False
+        if row.request_full:
+            # A request arriving meanwhile keeps its flag for the next run
+            connection.execute(update(table).where(table.c.name == name, table.c.requests == row.requests)
+                               .values(request_full=False))
+        return row.requests or 0, bool(row.request_full)
+
+
+def record_result(name, served, result):
+    """Store the result of a run that started after request number served"""
+    table = Lease.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.name == name, table.c.holder == holder_id())
+                           .values(served=served, result=json.dumps(result)))
+
+
+def result_for(name, number):
+    """Result of a run that started after request number, or None while there is none"""
+    table = Lease.__table__
+    with db.engine.connect() as connection:
+        row = connection.execute(select(table.c.served, table.c.result).where(table.c.name == name)).first()
+    if row is None or row.result is None or (row.served or 0) < number:
+        return None
+    return json.loads(row.result)
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -11,6 +12,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    preferred_language = db.Column(db.String(10))  # language alerts are served in; None = Accept-Language
     
     # Relationships
     reports = db.relationship('Report', backref='user', lazy=True)
@@ -36,6 +38,8 @@ class Report(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float)  # WGS84 degrees; None when only the text location is known
+    longitude = db.Column(db.Float)
     severity = db.Column(db.String(20), default='medium')  # low, medium, high, critical
     status = db.Column(db.String(20), default='pending')  # pending, verified, resolved
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -45,6 +49,16 @@ class Report(db.Model):
     # AI-generated fields
     ai_summary = db.Column(db.Text)
     ai_priority_score = db.Column(db.Float)
+    triage_key = db.Column(db.Float)  # ai_priority_score less waiting-time credit; see triage.py
+    
+    __table_args__ = (
+        # "My reports" listing, delta sync and dashboard count
+        db.Index('ix_report_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_report_user_updated', 'user_id', 'updated_at', 'id'),
+        # Triage queue, and open reports near a point when scoring
+        db.Index('ix_report_triage', 'status', 'triage_key', 'id'),
+        db.Index('ix_report_status_latitude', 'status', 'latitude', 'longitude'),
+    )
     
     def __repr__(self):
         return f'<Report {self.title}>'
@@ -57,12 +71,20 @@ class Alert(db.Model):
     severity = db.Column(db.String(20), default='medium')  # low, medium, high, critical
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     expires_at = db.Column(db.DateTime)
     
     # AI-enhanced fields
     rewritten_message = db.Column(db.Text)
     translated_messages = db.Column(db.JSON)  # Store translations in different languages
     
+    __table_args__ = (
+        # Newest-first feed, delta sync and the high/critical dashboard count
+        db.Index('ix_alert_created', 'created_at', 'id'),
+        db.Index('ix_alert_updated', 'updated_at', 'id'),
+        db.Index('ix_alert_severity', 'severity'),
+    )
+    
     def __repr__(self):
         return f'<Alert {self.title}>'
 
@@ -71,6 +93,8 @@ class Mission(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     priority = db.Column(db.String(20), default='medium')  # low, medium, high, critical
     status = db.Column(db.String(20), default='active')  # active, completed, cancelled
     assigned_to = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -83,6 +107,15 @@ class Mission(db.Model):
     ai_strategy = db.Column(db.Text)
     ai_estimated_duration = db.Column(db.Integer)  # in minutes
     
+    __table_args__ = (
+        # Assigned missions listing, delta sync and active-mission count
+        db.Index('ix_mission_assignee_created', 'assigned_to', 'created_at', 'id'),
+        db.Index('ix_mission_assignee_updated', 'assigned_to', 'updated_at', 'id'),
+        db.Index('ix_mission_assignee_status', 'assigned_to', 'status'),
+        # Missions changed since the assignment planner last looked
+        db.Index('ix_mission_updated', 'updated_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Mission {self.title}>'
 
@@ -90,6 +123,8 @@ class Distribution(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     resource_id = db.Column(db.Integer, db.ForeignKey('resource.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    report_id = db.Column(db.Integer, db.ForeignKey('report.id'))  # need this distribution serves
+    mission_id = db.Column(db.Integer, db.ForeignKey('mission.id'))
     quantity = db.Column(db.Integer, nullable=False)
     location = db.Column(db.String(200), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, distributed, cancelled
@@ -101,6 +136,16 @@ class Distribution(db.Model):
     ai_priority_score = db.Column(db.Float)
     ai_optimal_route = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_distribution_created', 'created_at', 'id'),
+        # A citizen's own distributions, newest first
+        db.Index('ix_distribution_recipient_created', 'recipient_id', 'created_at', 'id'),
+        # Stock already planned per resource and per need
+        db.Index('ix_distribution_resource_status', 'resource_id', 'status', 'quantity'),
+        db.Index('ix_distribution_report', 'report_id'),
+        db.Index('ix_distribution_mission', 'mission_id'),
+    )
+    
     def __repr__(self):
         return f'<Distribution {self.id}>'
 
@@ -108,6 +153,8 @@ class Safehouse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     capacity = db.Column(db.Integer, nullable=False)
     current_occupancy = db.Column(db.Integer, default=0)
     facilities = db.Column(db.Text)  # JSON string of available facilities
@@ -120,6 +167,13 @@ class Safehouse(db.Model):
     ai_occupancy_prediction = db.Column(db.Float)
     ai_optimal_evacuation_route = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_safehouse_created', 'created_at', 'id'),
+        db.Index('ix_safehouse_updated', 'updated_at', 'id'),
+        # Covers the availability count without touching the table
+        db.Index('ix_safehouse_status_capacity', 'status', 'capacity', 'current_occupancy'),
+    )
+    
     def __repr__(self):
         return f'<Safehouse {self.name}>'
 
@@ -129,6 +183,8 @@ class Resource(db.Model):
     category = db.Column(db.String(100), nullable=False)  # food, water, medical, shelter, transport
     quantity = db.Column(db.Integer, nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
     status = db.Column(db.String(20), default='available')  # available, allocated, depleted
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -137,6 +193,13 @@ class Resource(db.Model):
     ai_demand_prediction = db.Column(db.Float)
     ai_optimal_distribution = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_resource_created', 'created_at', 'id'),
+        db.Index('ix_resource_updated', 'updated_at', 'id'),
+        # Stock lookups by category/status; quantity makes it cover the stock total
+        db.Index('ix_resource_category_status', 'category', 'status', 'quantity'),
+    )
+    
     # Relationships
     distributions = db.relationship('Distribution', backref='resource', lazy=True)
     
@@ -149,11 +212,127 @@ class Team(db.Model):
     team_type = db.Column(db.String(50), nullable=False)  # rescue, medical, logistics, communication
     leader_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     status = db.Column(db.String(20), default='active')  # active, standby, deployed
+    latitude = db.Column(db.Float)  # base the team is dispatched from
+    longitude = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # AI-optimized fields
     ai_team_efficiency = db.Column(db.Float)
     ai_optimal_assignments = db.Column(db.Text)
     
+    __table_args__ = (
+        db.Index('ix_team_created', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Team {self.name}>'
+
+class AnalyticsRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # report, alert, mission, resource
+    dimension = db.Column(db.String(20), nullable=False)  # severity, status, category, location
+    value = db.Column(db.String(200), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)  # summed Resource.quantity
+    
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'entity', 'dimension', 'value',
+                            name='uq_analytics_rollup_bucket'),
+    )
+    
+    def __repr__(self):
+        return f'<AnalyticsRollup {self.granularity} {self.bucket_start} {self.entity}.{self.dimension}={self.value}>'
+
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # report, alert, mission, safehouse, resource
+    entity_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # set when the row only left this user's listing
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_tombstone_entity_deleted_at', 'entity', 'deleted_at'),
+    )
+    
+    def __repr__(self):
+        return f'<Tombstone {self.entity} {self.entity_id}>'
+
+class EnrichmentJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # report, mission
+    entity_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Workers claim the oldest runnable job; stale claims are found by status too
+        db.Index('ix_enrichment_job_status_run_after', 'status', 'run_after'),
+        db.Index('ix_enrichment_job_entity', 'entity', 'entity_id'),
+    )
+    
+    def __repr__(self):
+        return f'<EnrichmentJob {self.entity} {self.entity_id} {self.status}>'
+
+class CollectionVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)  # table name of the tracked model
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CollectionVersion {self.name} v{self.version}>'
+
+class Lease(db.Model):
+    name = db.Column(db.String(50), primary_key=True)  # job only one process may run at a time
+    holder = db.Column(db.String(100), nullable=False)  # host:pid that holds it, or held it last
+    expires_at = db.Column(db.DateTime, nullable=False)
+    requests = db.Column(db.Integer, default=0)  # runs asked of the holder by other processes
+    request_full = db.Column(db.Boolean, default=False)
+    served = db.Column(db.Integer, default=0)  # requests the last run started after
+    result = db.Column(db.Text)  # JSON result of the last run
+    
+    def __repr__(self):
+        return f'<Lease {self.name} {self.holder}>'
+
+class StreamEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # SSE event id, used for Last-Event-ID resume
+    channel = db.Column(db.String(20), nullable=False)  # alert, mission, safehouse
+    action = db.Column(db.String(20), nullable=False)  # created, updated
+    entity_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_stream_event_created_at', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f'<StreamEvent {self.id} {self.channel} {self.action}>'
+
+def upgrade_schema():
+    """Add columns and indexes introduced after an existing database was created.
+    
+    db.create_all() only creates missing tables, so databases created by an
+    older release are brought up to date here. New columns are added as
+    nullable; no data is rewritten.
+    """
+    inspector = inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.execute(text(
+                        f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}'
+                    ))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
@@ -0,0 +1,136 @@
+"""
+Safehouse occupancy
+Check-ins and check-outs are single conditional UPDATEs: the occupancy is
+changed in the database only if the result stays within 0..capacity, and
+status flips between operational and full in the same statement, so any
+number of intake desks can write concurrently without losing updates or
+overbooking. The committed row is written through to the in-memory
+safehouse index, which serves availability without reading the table.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, func, update
+
+from conditional import bump_versions, collection_versions
+from models import db, Safehouse
+from spatial import safehouse_index
+from streaming import record_event
+
+OPEN = 'operational'
+FULL = 'full'
+CLOSED = 'closed'
+MAX_GROUP = 500  # people per check-in/check-out request
+
+
+class OccupancyConflict(Exception):
+    """Raised when a check-in or check-out cannot be applied; carries the HTTP status"""
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.status = status
+
+
+def _returned_columns():
+    return (Safehouse.id, Safehouse.name, Safehouse.capacity, Safehouse.current_occupancy, Safehouse.status)
+
+
+def _apply(safehouse_id, delta, condition):
+    table = Safehouse.__table__
+    occupancy = func.coalesce(table.c.current_occupancy, 0) + delta
+    stmt = update(table).where(table.c.id == safehouse_id, condition).values(
+        current_occupancy=occupancy,
+        status=case(
+            (table.c.status == CLOSED, CLOSED),
+            (occupancy >= table.c.capacity, FULL),
+            else_=OPEN,
+        ),
+        updated_at=datetime.utcnow(),
+    )
+    session = db.session
+    connection = session.connection()
+    if connection.dialect.update_returning:
+        row = connection.execute(stmt.returning(*_returned_columns())).first()
+    else:
+        row = None
+        if connection.execute(stmt).rowcount:
+            row = session.query(*_returned_columns()).filter(Safehouse.id == safehouse_id).first()
+    if row is None:
+        session.rollback()
+        return None
+
+    # Core statements skip the flush hooks: version the collection and stream the change here
+    bump_versions(connection, {Safehouse.__tablename__})
+    (version, _), = collection_versions([Safehouse.__tablename__])
+    record_event(session, Safehouse, 'updated', row)
+    session.commit()
+    safehouse_index.apply({'id': row.id, 'current_occupancy': row.current_occupancy, 'status': row.status},
+                          version)
+    return row
+
+
+def _why_not(safehouse_id, checking_in):
+    row = db.session.query(Safehouse.capacity, Safehouse.current_occupancy, Safehouse.status) \
+        .filter(Safehouse.id == safehouse_id).first()
+    if row is None:
+        return OccupancyConflict('safehouse not found', 404)
+    if checking_in and row.status == CLOSED:
+        return OccupancyConflict('safehouse is closed')
+    if checking_in:
+        return OccupancyConflict(f'only {max(row.capacity - (row.current_occupancy or 0), 0)} places left')
+    return OccupancyConflict(f'only {row.current_occupancy or 0} people checked in')
+
+
+def _count(count):
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= MAX_GROUP:
+        raise OccupancyConflict(f'count must be an integer from 1 to {MAX_GROUP}', 400)
+    return count
+
+
+def check_in(safehouse_id, count=1):
+    """Add count people if they fit; returns the updated availability"""
+    count = _count(count)
+    table = Safehouse.__table__
+    occupancy = func.coalesce(table.c.current_occupancy, 0)
+    row = _apply(safehouse_id, count, (table.c.status != CLOSED) & (occupancy + count <= table.c.capacity))
+    if row is None:
+        raise _why_not(safehouse_id, checking_in=True)
+    return availability(row)
+
+
+def check_out(safehouse_id, count=1):
+    """Remove count people if that many are checked in; returns the updated availability"""
+    count = _count(count)
+    table = Safehouse.__table__
+    row = _apply(safehouse_id, -count, table.c.current_occupancy >= count)
+    if row is None:
+        raise _why_not(safehouse_id, checking_in=False)
+    return availability(row)
+
+
+def availability(record):
+    """Availability view of a safehouse row or index record"""
+    if not isinstance(record, dict):
+        record = record._asdict()
+    capacity, occupancy = record['capacity'] or 0, record['current_occupancy'] or 0
+    return {
+        'id': record['id'],
+        'name': record['name'],
+        'capacity': capacity,
+        'current_occupancy': occupancy,
+        'availability': max(capacity - occupancy, 0),
+        'status': record['status'],
+    }
+
+
+def availability_summary():
+    """Per-safehouse availability and totals, served from the in-memory index"""
+    items = sorted((availability(record) for record in safehouse_index.values()), key=lambda item: item['id'])
+    open_items = [item for item in items if item['status'] != CLOSED]
+    return {
+        'items': items,
+        'total_capacity': sum(item['capacity'] for item in open_items),
+        'total_occupancy': sum(item['current_occupancy'] for item in open_items),
+        'total_available': sum(item['availability'] for item in open_items),
+        'full': sum(1 for item in items if item['status'] == FULL),
+    }
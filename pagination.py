@@ -0,0 +1,65 @@
+"""
+Keyset pagination
+List endpoints page on (created_at, id) descending, delta sync pages on
+(updated_at, id) ascending. The cursor is an opaque token holding the sort
+key of the last row of a page, so every page is an index range scan no
+matter how deep the client has paged.
+"""
+
+import base64
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when an `after` cursor cannot be decoded"""
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor for the row with the given sort key"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Sort key (created_at, id) from a cursor; raises InvalidCursor if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f'invalid cursor: {cursor}') from e
+
+
+def page_args():
+    """limit/after query parameters of the current request"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = request.args.get('after')
+    return limit, decode_cursor(after) if after else None
+
+
+def keyset_page(query, model, limit, after=None, key='created_at', descending=True):
+    """One page of query ordered by (key, id), plus the cursor of the next page"""
+    key_column = getattr(model, key)
+    if after is not None:
+        if descending:
+            query = query.filter(tuple_(key_column, model.id) < tuple_(*after))
+        else:
+            query = query.filter(tuple_(key_column, model.id) > tuple_(*after))
+    if descending:
+        query = query.order_by(key_column.desc(), model.id.desc())
+    else:
+        query = query.order_by(key_column.asc(), model.id.asc())
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key), rows[-1].id)
+    return rows, next_cursor
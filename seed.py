@@ -124,6 +124,8 @@ def seed_database():
             Safehouse(
                 name='Central Community Center',
                 location='123 Main Street',
+                latitude=40.7128,
+                longitude=-74.0060,
                 capacity=200,
                 current_occupancy=45,
                 facilities='Food, Water, Medical Aid, Restrooms',
@@ -133,6 +135,8 @@ def seed_database():
             Safehouse(
                 name='High School Gymnasium',
                 location='456 Education Ave',
+                latitude=40.7306,
+                longitude=-73.9866,
                 capacity=300,
                 current_occupancy=120,
                 facilities='Food, Water, Sleeping Areas, First Aid',
@@ -152,6 +156,8 @@ def seed_database():
                 category='food',
                 quantity=500,
                 location='Central Warehouse',
+                latitude=40.7061,
+                longitude=-74.0087,
                 status='available'
             ),
             Resource(
@@ -159,6 +165,8 @@ def seed_database():
                 category='water',
                 quantity=1000,
                 location='Central Warehouse',
+                latitude=40.7061,
+                longitude=-74.0087,
                 status='available'
             ),
             Resource(
@@ -166,6 +174,8 @@ def seed_database():
                 category='medical',
                 quantity=50,
                 location='Medical Center',
+                latitude=40.7420,
+                longitude=-73.9740,
                 status='available'
             ),
             Resource(
@@ -173,6 +183,8 @@ def seed_database():
                 category='shelter',
                 quantity=200,
                 location='Central Warehouse',
+                latitude=40.7061,
+                longitude=-74.0087,
                 status='available'
             )
         ]
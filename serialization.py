@@ -0,0 +1,133 @@
+"""
+List serialisation
+List endpoints select only the columns their response needs (plus the
+created_at/updated_at/id keys pagination and delta sync order by) and turn
+the resulting tuples into dicts with zip(), so no ORM instances are built,
+tracked or refreshed. Responses are encoded with orjson when it is
+installed; otherwise Flask's standard JSON provider is used unchanged.
+Full-table exports are streamed: rows are fetched STREAM_CHUNK at a time
+with yield_per and written out as a JSON array or NDJSON as they arrive, so
+memory stays flat however large the table is.
+"""
+
+from datetime import date, datetime
+from itertools import islice
+
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from models import db
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+STREAM_CHUNK = 500  # rows fetched and encoded per step of a streamed response
+
+
+class ListSchema:
+    """Projected columns of one list response and how to turn rows into dicts"""
+
+    # Keyset pagination (pagination.keyset_page) and delta sync read these
+    # attributes from every row
+    PAGING_KEYS = ('id', 'created_at', 'updated_at')
+
+    def __init__(self, model, fields, extra=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.extra = extra or {}
+        self._columns = [getattr(model, name).label(name) for name in self.fields]
+        self._columns += [getattr(model, name).label(name) for name in self.PAGING_KEYS
+                          if name not in self.fields and hasattr(model, name)]
+        self._dates = [name for name in self.fields
+                       if getattr(model, name).type.python_type in (datetime, date)]
+
+    def query(self, *criteria, **extra_columns):
+        """Projected query; extra_columns adds labelled SQL expressions"""
+        columns = self._columns + [expression.label(name) for name, expression in extra_columns.items()]
+        query = db.session.query(*columns)
+        return query.filter(*criteria) if criteria else query
+
+    def dump(self, rows, **context):
+        """Response dicts for rows of query(); extra(row, **context) adds computed fields"""
+        names = self.fields
+        dates = self._dates
+        items = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for name in dates:
+                if item[name] is not None:
+                    item[name] = item[name].isoformat()
+            for name, compute in self.extra.items():
+                item[name] = compute(row, **context)
+            items.append(item)
+        return items
+
+
+def iter_items(schema, query, chunk=STREAM_CHUNK, **context):
+    """Response dicts for every row of query, fetched chunk rows at a time"""
+    rows = iter(query.yield_per(chunk))
+    while True:
+        batch = list(islice(rows, chunk))
+        if not batch:
+            return
+        yield schema.dump(batch, **context)
+
+
+def _json_array(chunks, dumps):
+    yield '['
+    separator = ''
+    for items in chunks:
+        yield separator + ','.join(dumps(item) for item in items)
+        separator = ','
+    yield ']\n'
+
+
+def _ndjson(chunks, dumps):
+    for items in chunks:
+        yield ''.join(dumps(item) + '\n' for item in items)
+
+
+def stream_response(schema, query, ndjson=False, chunk=STREAM_CHUNK, **context):
+    """Streamed JSON array (or NDJSON) of every row of a ListSchema query"""
+    dumps = current_app.json.dumps
+    chunks = iter_items(schema, query, chunk, **context)
+    if ndjson:
+        return Response(stream_with_context(_ndjson(chunks, dumps)), mimetype='application/x-ndjson')
+    return Response(stream_with_context(_json_array(chunks, dumps)), mimetype='application/json')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed JSON provider, falling back to the default encoder for
+    values orjson rejects (and for pretty-printed debug output)"""
+
+    def _options(self):
+        # Dates and dataclasses go through self.default so the output matches
+        # DefaultJSONProvider (HTTP dates, not ISO strings)
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+        except TypeError:
+            return super().dumps(obj)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options())
+        except TypeError:
+            body = super().dumps(obj).encode()
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Use the orjson provider when orjson is installed"""
+    if orjson is not None:
+        app.json = FastJSONProvider(app)
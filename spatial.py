@@ -0,0 +1,266 @@
+"""
+Spatial index
+Safehouses and resource caches with coordinates are kept in a per-process
+grid of CELL_DEGREES x CELL_DEGREES cells, so "k nearest shelters with
+space" scans only the rings of cells around the query point instead of
+every row. Each lookup first checks the table's collection_version (one
+primary-key read); when any worker has written to the table since, only the
+rows updated since the last refresh, and tombstones for deleted ones, are
+read and applied.
+"""
+
+import heapq
+import math
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from conditional import collection_versions
+from models import db, Safehouse, Resource, Tombstone
+from sync import SYNC_ENTITIES, SYNC_OVERLAP, SYNC_TOKEN_MAX_AGE
+
+CELL_DEGREES = 0.05  # about 5.5 km north-south
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_NEAREST = 100
+
+
+class InvalidCoordinates(ValueError):
+    """Raised when latitude/longitude are missing, non-numeric or out of range"""
+
+
+def parse_coordinates(latitude, longitude, required=True):
+    """(lat, lon) as floats from request values; (None, None) if both are absent and not required"""
+    if latitude in (None, '') and longitude in (None, '') and not required:
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError) as e:
+        raise InvalidCoordinates('latitude and longitude must be numbers') from e
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise InvalidCoordinates('latitude must be within ±90 and longitude within ±180')
+    return latitude, longitude
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_matrix(lats1, lons1, lats2, lons2):
+    """Great-circle km between every pair of two coordinate arrays; NaN where either is missing"""
+    lat1, lon1 = np.radians(lats1)[:, None], np.radians(lons1)[:, None]
+    lat2, lon2 = np.radians(lats2)[None, :], np.radians(lons2)[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GridIndex:
+    """Records with latitude/longitude bucketed into fixed-size degree cells"""
+
+    def __init__(self, cell=CELL_DEGREES):
+        self.cell = cell
+        self._cells = {}  # (row, col) -> {id: record}
+        self._where = {}  # id -> (row, col)
+        self._extent = None  # [min row, max row, min col, max col] ever occupied
+
+    def __len__(self):
+        return len(self._where)
+
+    def _key(self, latitude, longitude):
+        return math.floor(latitude / self.cell), math.floor(longitude / self.cell)
+
+    def upsert(self, record):
+        """Insert or move a record; records without coordinates are dropped"""
+        self.remove(record['id'])
+        if record.get('latitude') is None or record.get('longitude') is None:
+            return
+        key = self._key(record['latitude'], record['longitude'])
+        self._cells.setdefault(key, {})[record['id']] = record
+        self._where[record['id']] = key
+        if self._extent is None:
+            self._extent = [key[0], key[0], key[1], key[1]]
+        else:
+            extent = self._extent
+            extent[:] = [min(extent[0], key[0]), max(extent[1], key[0]),
+                         min(extent[2], key[1]), max(extent[3], key[1])]
+
+    def remove(self, record_id):
+        key = self._where.pop(record_id, None)
+        if key is not None:
+            cell = self._cells[key]
+            del cell[record_id]
+            if not cell:
+                del self._cells[key]
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            yield row, col
+            return
+        for r in range(row - radius, row + radius + 1):
+            if r in (row - radius, row + radius):
+                for c in range(col - radius, col + radius + 1):
+                    yield r, c
+            else:
+                yield r, col - radius
+                yield r, col + radius
+
+    def _lower_bound_km(self, latitude, radius):
+        """Distance within which every cell outside the first radius rings lies beyond"""
+        edge_latitude = min(89.9, abs(latitude) + (radius + 1) * self.cell)
+        return radius * self.cell * KM_PER_DEGREE * math.cos(math.radians(edge_latitude))
+
+    def nearest(self, latitude, longitude, k, predicate=None, max_km=None):
+        """Up to k (distance_km, record) pairs, closest first"""
+        if not self._cells or k <= 0:
+            return []
+        row, col = self._key(latitude, longitude)
+        min_row, max_row, min_col, max_col = self._extent
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+
+        best = []  # max-heap of (-distance, id, record)
+
+        def consider(records):
+            for record in records:
+                if predicate is not None and not predicate(record):
+                    continue
+                distance = haversine_km(latitude, longitude, record['latitude'], record['longitude'])
+                if max_km is not None and distance > max_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, record['id'], record))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, record['id'], record))
+
+        visited = 0
+        for radius in range(last_ring + 1):
+            if 8 * radius > len(self._cells):
+                # The ring has more cells than are occupied: check the occupied ones left directly
+                for key, cell in self._cells.items():
+                    if max(abs(key[0] - row), abs(key[1] - col)) >= radius:
+                        consider(cell.values())
+                break
+            for key in self._ring(row, col, radius):
+                cell = self._cells.get(key)
+                if cell:
+                    consider(cell.values())
+                    visited += len(cell)
+            if visited >= len(self):
+                break  # every record seen, e.g. fewer than k pass the predicate
+            bound = self._lower_bound_km(latitude, radius)
+            if (len(best) == k and -best[0][0] <= bound) or (max_km is not None and bound > max_km):
+                break
+        return [(-distance, record) for distance, _, record in sorted(best, reverse=True)]
+
+
+class LiveIndex:
+    """Rows of one table by id, plus a GridIndex of those with coordinates,
+    caught up with every worker's writes on read"""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(dict.fromkeys(('id', 'latitude', 'longitude') + tuple(fields)))
+        self.records = {}
+        self.grid = GridIndex()
+        self.version = None
+        self.watermark = None
+        self._lock = threading.Lock()
+
+    def _rows(self, *criteria):
+        columns = [getattr(self.model, name) for name in self.fields]
+        return [dict(zip(self.fields, row)) for row in db.session.query(*columns).filter(*criteria)]
+
+    def refresh(self):
+        """Apply rows written since the last refresh; a no-op unless the table changed"""
+        (version, _), = collection_versions([self.model.__tablename__])
+        with self._lock:
+            if version == self.version and self.watermark is not None:
+                return
+            started = datetime.utcnow()
+            # Tombstones older than SYNC_TOKEN_MAX_AGE may be pruned: reload instead
+            if self.watermark is None or self.watermark < started - SYNC_TOKEN_MAX_AGE:
+                self.records, self.grid = {}, GridIndex(self.grid.cell)
+                changed, deleted = self._rows(), []
+            else:
+                since = self.watermark - SYNC_OVERLAP
+                changed = self._rows(self.model.updated_at > since)
+                deleted = [entity_id for (entity_id,) in db.session.query(Tombstone.entity_id).filter(
+                    Tombstone.entity == SYNC_ENTITIES[self.model], Tombstone.user_id.is_(None),
+                    Tombstone.deleted_at > since)]
+            for record_id in deleted:
+                self._remove(record_id)
+            for record in changed:
+                self._upsert(record)
+            self.version = version
+            self.watermark = started
+
+    def _upsert(self, record):
+        self.records[record['id']] = record
+        self.grid.upsert(record)
+
+    def _remove(self, record_id):
+        self.records.pop(record_id, None)
+        self.grid.remove(record_id)
+
+    def apply(self, changes, version=None):
+        """Write-through of committed column values of one row, e.g. from UPDATE ... RETURNING.
+
+        version is the collection version the write committed as; when it
+        directly follows the version the index is at, no other write happened
+        in between and the next lookup can skip the delta read.
+        """
+        with self._lock:
+            record = self.records.get(changes['id'])
+            if record is None:
+                return
+            self._upsert({**record, **changes})
+            if version is not None and self.version == version - 1:
+                self.version = version
+
+    def get(self, record_id):
+        self.refresh()
+        with self._lock:
+            return self.records.get(record_id)
+
+    def values(self):
+        self.refresh()
+        with self._lock:
+            return list(self.records.values())
+
+    def nearest(self, latitude, longitude, k, predicate=None, max_km=None):
+        self.refresh()
+        with self._lock:
+            return self.grid.nearest(latitude, longitude, k, predicate, max_km)
+
+    def reset(self):
+        with self._lock:
+            self.records, self.grid = {}, GridIndex(self.grid.cell)
+            self.version = self.watermark = None
+
+
+safehouse_index = LiveIndex(Safehouse, ('name', 'location', 'capacity', 'current_occupancy', 'status'))
+resource_index = LiveIndex(Resource, ('name', 'category', 'quantity', 'location', 'status'))
+
+
+def nearest_safehouses(latitude, longitude, k=5, min_free=1, max_km=None):
+    """Closest open safehouses with at least min_free free places"""
+    def has_space(record):
+        return (record['status'] != 'closed'
+                and (record['capacity'] or 0) - (record['current_occupancy'] or 0) >= min_free)
+
+    return [{**record, 'availability': (record['capacity'] or 0) - (record['current_occupancy'] or 0),
+             'distance_km': round(distance, 3)}
+            for distance, record in safehouse_index.nearest(latitude, longitude, k, has_space, max_km)]
+
+
+def nearest_resources(latitude, longitude, k=5, category=None, min_quantity=1, max_km=None):
+    """Closest available resource caches, optionally of one category"""
+    def matches(record):
+        return (record['status'] == 'available' and (record['quantity'] or 0) >= min_quantity
+                and (category is None or record['category'] == category))
+
+    return [{**record, 'distance_km': round(distance, 3)}
+            for distance, record in resource_index.nearest(latitude, longitude, k, matches, max_km)]
@@ -1,4 +1,22 @@
 // Civitas - Offline-First Disaster Management System
+
+// Every item of a paginated list endpoint, following next_cursor page by page
+async function fetchAllItems(url) {
+    const items = [];
+    const separator = url.includes('?') ? '&' : '?';
+    let after = null;
+    do {
+        const response = await fetch(after ? `${url}${separator}after=${encodeURIComponent(after)}` : url);
+        if (!response.ok) {
+            throw new Error(`${url} failed with status ${response.status}`);
+        }
+        const page = await response.json();
+        items.push(...page.items);
+        after = page.next_cursor;
+    } while (after);
+    return items;
+}
+
 class CivitasApp {
     constructor() {
         this.isOnline = navigator.onLine;
@@ -17,6 +35,7 @@ class CivitasApp {
         await this.initServiceWorker();
         this.initEventListeners();
         this.initBLE();
+        this.initLiveStream();
         this.initPWAInstall();
         this.updateOnlineStatus();
         this.loadDashboardData();
@@ -25,7 +44,7 @@ class CivitasApp {
     // IndexedDB for offline storage
     async initIndexedDB() {
         return new Promise((resolve, reject) => {
-            const request = indexedDB.open('CivitasDB', 1);
+            const request = indexedDB.open('CivitasDB', 2);
             
             request.onerror = () => reject(request.error);
             request.onsuccess = () => {
@@ -76,6 +95,11 @@ class CivitasApp {
                     syncStore.createIndex('type', 'type', { unique: false });
                     syncStore.createIndex('timestamp', 'timestamp', { unique: false });
                 }
+
+                // Delta sync tokens, one per store
+                if (!db.objectStoreNames.contains('syncState')) {
+                    db.createObjectStore('syncState', { keyPath: 'type' });
+                }
             };
         });
     }
@@ -114,9 +138,23 @@ class CivitasApp {
             }
         });
 
-        // BLE connection status
+        // BLE connection status (kept current by the connect/disconnect handlers)
         this.updateBLEStatus();
-        setInterval(() => this.updateBLEStatus(), 5000);
+    }
+
+    // Live updates pushed by the server instead of polling. Pages listen for
+    // 'civitas:alert', 'civitas:mission' and 'civitas:safehouse' window events.
+    initLiveStream() {
+        const url = document.body.dataset.liveStream;
+        if (!url || !window.EventSource || this.eventSource) return;
+
+        // EventSource reconnects by itself and resumes with Last-Event-ID
+        this.eventSource = new EventSource(url);
+        ['alert', 'mission', 'safehouse'].forEach(channel => {
+            this.eventSource.addEventListener(channel, (event) => {
+                window.dispatchEvent(new CustomEvent(`civitas:${channel}`, { detail: JSON.parse(event.data) }));
+            });
+        });
     }
 
     // BLE Mesh Communication
@@ -617,6 +655,26 @@ class CivitasApp {
 
     // Load dashboard data
     async loadDashboardData() {
+        // Online: the server computes the stats, so no full lists are downloaded
+        if (this.isOnline) {
+            try {
+                const response = await fetch('/api/dashboard/summary');
+                if (response.ok) {
+                    const summary = await response.json();
+                    this.renderDashboardStats(summary.stats);
+                    this.renderRecentActivity(summary.recent_activity.map(item => ({
+                        type: item.type,
+                        data: item,
+                        time: item.created_at
+                    })));
+                    return;
+                }
+            } catch (error) {
+                console.error('Error fetching dashboard summary:', error);
+            }
+        }
+
+        // Offline: fall back to the lists cached in IndexedDB
         try {
             const [reports, alerts, missions, safehouses, resources] = await Promise.all([
                 this.fetchData('reports'),
@@ -637,41 +695,84 @@ class CivitasApp {
     async fetchData(type) {
         if (this.isOnline) {
             try {
-                const response = await fetch(`/api/${type}`);
-                if (response.ok) {
-                    const data = await response.json();
-                    // Cache data for offline use
-                    await this.cacheData(type, data);
-                    return data;
-                }
+                await this.syncStore(type);
             } catch (error) {
-                console.error(`Error fetching ${type}:`, error);
+                console.error(`Error syncing ${type}:`, error);
             }
         }
 
-        // Fallback to cached data
+        // Always serve from the local cache, which the sync keeps current
         return await this.getCachedData(type);
     }
 
-    // Cache data in IndexedDB
-    async cacheData(type, data) {
+    // Bring a local store up to date: full download the first time, deltas afterwards
+    async syncStore(type) {
+        const state = await this.idbRequest(
+            this.db.transaction(['syncState'], 'readonly').objectStore('syncState').get(type)
+        );
+        const base = `/api/${type}?limit=500` + (state ? `&since=${encodeURIComponent(state.token)}` : '');
+        let after = null;
+        let token = null;
+
+        do {
+            const response = await fetch(base + (after ? `&after=${encodeURIComponent(after)}` : ''));
+            if (response.status === 400 && state && !after) {
+                // Token no longer accepted by the server: start over with a full sync
+                await this.idbRequest(
+                    this.db.transaction(['syncState'], 'readwrite').objectStore('syncState').delete(type)
+                );
+                return this.syncStore(type);
+            }
+            if (!response.ok) {
+                throw new Error(`Sync of ${type} failed with status ${response.status}`);
+            }
+
+            const page = await response.json();
+            if (!after) {
+                token = page.sync_token;
+            }
+            await this.applyDelta(type, page.items, page.deleted || [], !state && !after);
+            after = page.next_cursor;
+        } while (after);
+
+        if (token) {
+            await this.idbRequest(
+                this.db.transaction(['syncState'], 'readwrite').objectStore('syncState').put({ type, token })
+            );
+        }
+    }
+
+    // Apply changed rows and tombstones to a store (optionally replacing its contents)
+    async applyDelta(type, items, deletedIds, replace = false) {
         const transaction = this.db.transaction([type], 'readwrite');
         const store = transaction.objectStore(type);
-        
-        // Clear existing data
-        await store.clear();
-        
-        // Add new data
-        for (const item of data) {
-            await store.add(item);
+
+        if (replace) {
+            store.clear();
         }
+        items.forEach(item => store.put(item));
+        deletedIds.forEach(id => store.delete(id));
+
+        await new Promise((resolve, reject) => {
+            transaction.oncomplete = () => resolve();
+            transaction.onerror = () => reject(transaction.error);
+            transaction.onabort = () => reject(transaction.error);
+        });
     }
 
     // Get cached data from IndexedDB
     async getCachedData(type) {
         const transaction = this.db.transaction([type], 'readonly');
         const store = transaction.objectStore(type);
-        return await store.getAll();
+        return await this.idbRequest(store.getAll());
+    }
+
+    // Wrap an IndexedDB request in a promise
+    idbRequest(request) {
+        return new Promise((resolve, reject) => {
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
     }
 
     // Update dashboard statistics
@@ -684,7 +785,11 @@ class CivitasApp {
             totalResources: resources.reduce((sum, r) => sum + r.quantity, 0)
         };
 
-        // Update stat cards
+        this.renderDashboardStats(stats);
+    }
+
+    // Render stat cards
+    renderDashboardStats(stats) {
         Object.entries(stats).forEach(([key, value]) => {
             const element = document.querySelector(`[data-stat="${key}"]`);
             if (element) {
@@ -701,6 +806,11 @@ class CivitasApp {
             ...missions.slice(0, 3).map(m => ({ type: 'mission', data: m, time: m.created_at }))
         ].sort((a, b) => new Date(b.time) - new Date(a.time)).slice(0, 5);
 
+        this.renderRecentActivity(activity);
+    }
+
+    // Render recent activity list
+    renderRecentActivity(activity) {
         const container = document.querySelector('.recent-activity');
         if (container) {
             container.innerHTML = activity.map(item => this.createActivityItem(item)).join('');
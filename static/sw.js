@@ -74,6 +74,11 @@ self.addEventListener('fetch', (event) => {
     const { request } = event;
     const url = new URL(request.url);
 
+    // Live event stream: never cache, let the browser handle it directly
+    if (url.pathname === '/api/stream') {
+        return;
+    }
+
     // Handle API requests
     if (url.pathname.startsWith('/api/')) {
         event.respondWith(handleAPIRequest(request));
@@ -97,9 +102,11 @@ async function handleAPIRequest(request) {
         const networkResponse = await fetch(request);
         
         if (networkResponse.ok) {
-            // Cache successful responses
-            const cache = await caches.open(DYNAMIC_CACHE);
-            cache.put(request, networkResponse.clone());
+            // Cache successful responses (deltas are applied to IndexedDB instead)
+            if (!new URL(request.url).searchParams.has('since')) {
+                const cache = await caches.open(DYNAMIC_CACHE);
+                cache.put(request, networkResponse.clone());
+            }
             return networkResponse;
         }
         
@@ -287,25 +294,86 @@ async function performPeriodicSync() {
     try {
         console.log('Performing periodic sync...');
         
-        // Sync critical data periodically
-        const criticalEndpoints = ['/api/alerts', '/api/missions'];
+        // Sync critical data periodically, fetching only what changed
+        const criticalStores = ['alerts', 'missions'];
+        const db = await openCivitasDB();
         
-        for (const endpoint of criticalEndpoints) {
+        for (const type of criticalStores) {
             try {
-                const response = await fetch(endpoint);
-                if (response.ok) {
-                    const cache = await caches.open(DYNAMIC_CACHE);
-                    await cache.put(endpoint, response);
-                }
+                await deltaSyncStore(db, type);
             } catch (error) {
-                console.error(`Error syncing ${endpoint}:`, error);
+                console.error(`Error syncing ${type}:`, error);
             }
         }
+        db.close();
     } catch (error) {
         console.error('Error in periodic sync:', error);
     }
 }
 
+// Open the page's IndexedDB database (created and upgraded by app.js)
+function openCivitasDB() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open('CivitasDB');
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// Apply server deltas since the stored sync token to one store
+async function deltaSyncStore(db, type) {
+    if (!db.objectStoreNames.contains(type) || !db.objectStoreNames.contains('syncState')) {
+        return; // The page has not initialised the local database yet
+    }
+    
+    const state = await idbRequest(db.transaction(['syncState'], 'readonly').objectStore('syncState').get(type));
+    if (!state) {
+        return; // No baseline yet; the page performs the initial full sync
+    }
+    
+    const base = `/api/${type}?limit=500&since=${encodeURIComponent(state.token)}`;
+    let after = null;
+    let token = null;
+    
+    do {
+        const response = await fetch(base + (after ? `&after=${encodeURIComponent(after)}` : ''), { credentials: 'same-origin' });
+        if (response.status === 400 && !after) {
+            // Token expired or no longer accepted: drop it so the page syncs in full
+            await idbRequest(db.transaction(['syncState'], 'readwrite').objectStore('syncState').delete(type));
+            return;
+        }
+        if (!response.ok) {
+            throw new Error(`status ${response.status}`);
+        }
+        const page = await response.json();
+        if (!after) {
+            token = page.sync_token;
+        }
+        
+        const transaction = db.transaction([type], 'readwrite');
+        const store = transaction.objectStore(type);
+        page.items.forEach(item => store.put(item));
+        (page.deleted || []).forEach(id => store.delete(id));
+        await new Promise((resolve, reject) => {
+            transaction.oncomplete = () => resolve();
+            transaction.onerror = () => reject(transaction.error);
+        });
+        
+        after = page.next_cursor;
+    } while (after);
+    
+    if (token) {
+        await idbRequest(db.transaction(['syncState'], 'readwrite').objectStore('syncState').put({ type, token }));
+    }
+}
+
 // Handle BLE mesh data sync
 self.addEventListener('message', (event) => {
     if (event.data && event.data.type === 'BLE_SYNC') {
@@ -0,0 +1,48 @@
+"""
+Strategy templates
+The generate_prompt fallback strategies are data: data/strategies.json maps
+task type -> role -> template, with {context} marking where the situation is
+inserted. Templates are split around {context} once at import, so rendering
+joins the chunks of the one selected template. Operators can add or
+override task types and roles by pointing AI_STRATEGIES_PATH at a JSON file
+of the same shape.
+"""
+
+import json
+import os
+
+STRATEGIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'strategies.json')
+
+PLACEHOLDER = '{context}'
+DEFAULT_TASK_TYPE = 'default'  # used for task types without templates
+DEFAULT_ROLE = 'coordinator'  # used for roles without a template of their own
+MISSING_ROLE = 'Strategy for {context}: Assess situation, deploy resources, ensure safety, coordinate response.'
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_strategies(path=STRATEGIES_FILE, override_path=None):
+    """Compiled templates: {task_type: {role: [chunk, ...]}}"""
+    strategies = _read(path)
+    if override_path:
+        for task_type, roles in _read(override_path).items():
+            strategies.setdefault(task_type, {}).update(roles)
+    return {
+        task_type: {role: template.split(PLACEHOLDER) for role, template in roles.items()}
+        for task_type, roles in strategies.items()
+    }
+
+
+STRATEGIES = load_strategies(override_path=os.environ.get('AI_STRATEGIES_PATH'))
+_MISSING_ROLE = MISSING_ROLE.split(PLACEHOLDER)
+
+
+def render(context, task_type='rescue', role=DEFAULT_ROLE, strategies=None):
+    """Strategy text for a task type and role with context filled in"""
+    strategies = STRATEGIES if strategies is None else strategies
+    roles = strategies.get(task_type) or strategies[DEFAULT_TASK_TYPE]
+    chunks = roles.get(role) or roles.get(DEFAULT_ROLE) or _MISSING_ROLE
+    return str(context).join(chunks)
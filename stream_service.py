@@ -0,0 +1,31 @@
+"""
+Stream service entry point
+/api/stream connections are long-lived and idle, so they are served by
+gunicorn's gevent worker, where each one costs a greenlet:
+
+    gunicorn -k gevent --worker-connections 1000 -w 2 -b 0.0.0.0:5001 stream_service:app
+
+gevent runs everything in the process on one OS thread, so nothing CPU-bound
+may run here: a NumPy solve or an AI batch would stall every open stream.
+This process starts no enrichment workers or team planner and answers only
+/api/stream; the rest of the API runs in the threaded workers (app:app,
+-k gthread) and the reverse proxy sends /api/stream here.
+"""
+
+import os
+
+# Background workers run in the API processes, on real threads
+os.environ['ENRICHMENT_WORKERS'] = '0'
+os.environ['ASSIGNMENT_INTERVAL'] = '0'
+
+from flask import jsonify, request  # noqa: E402
+
+from app import app  # noqa: E402
+
+STREAM_PATH = '/api/stream'
+
+
+@app.before_request
+def _stream_only():
+    if request.path != STREAM_PATH:
+        return jsonify({'error': f'this service only serves {STREAM_PATH}'}), 404
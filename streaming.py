@@ -0,0 +1,265 @@
+"""
+Live event stream
+New alerts, mission creation and status changes, and safehouse occupancy
+changes are written to the stream_event table in the same transaction that
+makes them (an after_flush hook), so an event exists exactly when its change
+commits. One broadcaster thread per process tails that table and fans new
+events out to every /api/stream connection of the process, so thousands of
+open tabs cost one small indexed query per second instead of a poll storm.
+The table id is the SSE event id; reconnecting clients send Last-Event-ID
+and are replayed what they missed.
+"""
+
+import json
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+
+from models import db, Alert, Mission, Safehouse, StreamEvent
+from sync import prune_tombstones
+
+POLL_INTERVAL = 1.0  # seconds between table checks when nothing committed locally
+KEEPALIVE = 15.0  # seconds between comment lines on an idle connection
+BACKLOG_LIMIT = 500  # events replayed on resume
+BUFFER_SIZE = 1000  # recent events kept in memory per process
+REREAD = 50  # ids re-read on every poll: sequence ids can commit out of order
+RETENTION = timedelta(days=1)
+
+_PENDING_KEY = 'stream_events_written'
+
+
+def _alert_payload(alert):
+    return {
+        'id': alert.id,
+        'title': alert.title,
+        'message': alert.message,
+        'rewritten_message': alert.rewritten_message,
+        'translated_messages': alert.translated_messages,
+        'alert_type': alert.alert_type,
+        'severity': alert.severity,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+def _mission_payload(mission):
+    return {
+        'id': mission.id,
+        'title': mission.title,
+        'status': mission.status,
+        'priority': mission.priority,
+        'assigned_to': mission.assigned_to,
+        'created_by': mission.created_by,
+    }
+
+
+def _safehouse_payload(safehouse):
+    return {
+        'id': safehouse.id,
+        'name': safehouse.name,
+        'capacity': safehouse.capacity,
+        'current_occupancy': safehouse.current_occupancy,
+        'status': safehouse.status,
+    }
+
+
+# model -> (channel, attributes whose change is an update event, payload)
+STREAMED_MODELS = {
+    Alert: ('alert', (), _alert_payload),
+    Mission: ('mission', ('status', 'assigned_to'), _mission_payload),
+    Safehouse: ('safehouse', ('capacity', 'current_occupancy', 'status'), _safehouse_payload),
+}
+CHANNELS = tuple(channel for channel, _, _ in STREAMED_MODELS.values())
+# model -> attributes whose value before an update also goes in the event, as previous_<name>
+PREVIOUS_VALUES = {
+    Mission: ('assigned_to',),
+}
+
+
+def visible_to(stream_event, role, user_id):
+    """Per-connection filter: missions go to coordinators and the people on them"""
+    if stream_event['channel'] == 'mission':
+        payload = stream_event['payload']
+        # A reassigned mission is also sent to the assignee it was taken from, to drop it
+        return role == 'government' or user_id in (payload['assigned_to'], payload['created_by'],
+                                                   payload.get('previous_assigned_to'))
+    return True
+
+
+def format_event(stream_event):
+    return (f"id: {stream_event['id']}\n"
+            f"event: {stream_event['channel']}\n"
+            f"data: {json.dumps({'action': stream_event['action'], **stream_event['payload']})}\n\n")
+
+
+def _as_dict(row):
+    return {'id': row.id, 'channel': row.channel, 'action': row.action, 'payload': row.payload}
+
+
+def events_after(event_id, limit=BACKLOG_LIMIT):
+    """Stored events with an id above event_id, oldest first"""
+    rows = StreamEvent.query.filter(StreamEvent.id > event_id).order_by(StreamEvent.id).limit(limit).all()
+    return [_as_dict(row) for row in rows]
+
+
+def latest_event_id():
+    return db.session.query(db.func.max(StreamEvent.id)).scalar() or 0
+
+
+class Broadcaster:
+    """Tails stream_event and wakes the connections of this process"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._buffer = deque(maxlen=BUFFER_SIZE)  # (sequence, event)
+        self._seen = deque(maxlen=BUFFER_SIZE)
+        self._sequence = 0
+        self._last_id = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def sequence(self):
+        """Position a new connection starts following from"""
+        with self._condition:
+            return self._sequence
+
+    def start(self, app):
+        with self._condition:
+            if self._thread is not None:
+                return
+            with app.app_context():
+                self._last_id = latest_event_id()
+            self._seen.extend(range(max(self._last_id - REREAD, 0) + 1, self._last_id + 1))
+            self._thread = threading.Thread(target=self._run, args=(app,), name='stream-broadcaster',
+                                            daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def poll(self):
+        """Publish events committed since the last poll"""
+        seen = set(self._seen)
+        fresh = [e for e in events_after(max(self._last_id - REREAD, 0), BUFFER_SIZE) if e['id'] not in seen]
+        if not fresh:
+            return 0
+        with self._condition:
+            for stream_event in fresh:
+                self._sequence += 1
+                self._buffer.append((self._sequence, stream_event))
+                self._seen.append(stream_event['id'])
+                self._last_id = max(self._last_id, stream_event['id'])
+            self._condition.notify_all()
+        return len(fresh)
+
+    def wait(self, sequence, timeout):
+        """(new sequence, events published after sequence), waiting up to timeout"""
+        with self._condition:
+            if self._sequence <= sequence:
+                self._condition.wait(timeout)
+            return self._sequence, [e for s, e in self._buffer if s > sequence]
+
+    def _run(self, app):
+        polls = 0
+        while True:
+            with app.app_context():
+                try:
+                    self.poll()
+                    polls += 1
+                    if polls % 3600 == 0:
+                        prune_events()
+                        prune_tombstones()
+                except Exception as e:
+                    print(f"Stream broadcaster error: {e}")
+                    db.session.rollback()
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+
+
+broadcaster = Broadcaster()
+
+
+def prune_events():
+    """Drop events older than the retention window"""
+    StreamEvent.query.filter(StreamEvent.created_at < datetime.utcnow() - RETENTION) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+
+
+def event_stream(role, user_id, channels, sequence, backlog=()):
+    """SSE body for one connection: replayed backlog, then live events"""
+    sent = set()
+    yield 'retry: 3000\n\n'
+    for stream_event in backlog:
+        sent.add(stream_event['id'])
+        if stream_event['channel'] in channels and visible_to(stream_event, role, user_id):
+            yield format_event(stream_event)
+    while True:
+        sequence, fresh = broadcaster.wait(sequence, KEEPALIVE)
+        if not fresh:
+            yield ': keepalive\n\n'
+            continue
+        for stream_event in fresh:
+            if stream_event['id'] in sent:
+                continue
+            if stream_event['channel'] in channels and visible_to(stream_event, role, user_id):
+                yield format_event(stream_event)
+
+
+def _record_events(session, flush_context):
+    rows = []
+    now = datetime.utcnow()
+    for obj in list(session.new) + list(session.dirty):
+        watched = STREAMED_MODELS.get(type(obj))
+        if watched is None:
+            continue
+        channel, tracked, payload = watched
+        if obj in session.new:
+            action = 'created'
+        elif any(inspect(obj).attrs[name].history.has_changes() for name in tracked):
+            action = 'updated'
+        else:
+            continue
+        previous = {}
+        if action == 'updated':
+            for name in PREVIOUS_VALUES.get(type(obj), ()):
+                deleted = inspect(obj).attrs[name].history.deleted
+                if deleted:
+                    previous[name] = deleted[0]
+        rows.append({'channel': channel, 'action': action, 'entity_id': obj.id,
+                     'payload': _with_previous(payload(obj), previous), 'created_at': now})
+    if rows:
+        session.connection().execute(StreamEvent.__table__.insert(), rows)
+        session.info[_PENDING_KEY] = True
+
+
+def _with_previous(payload, previous):
+    return {**payload, **{f'previous_{name}': value for name, value in previous.items()}}
+
+
+def record_event(session, model, action, row, previous=None):
+    """Stream event for a change written with a Core statement, which skips the flush hook;
+    previous holds the PREVIOUS_VALUES attributes as they were before the change"""
+    channel, _, payload = STREAMED_MODELS[model]
+    session.connection().execute(StreamEvent.__table__.insert(), [{
+        'channel': channel, 'action': action, 'entity_id': row.id,
+        'payload': _with_previous(payload(row), previous or {}),
+        'created_at': datetime.utcnow(),
+    }])
+    session.info[_PENDING_KEY] = True
+
+
+def _notify_broadcaster(session):
+    if session.info.pop(_PENDING_KEY, False):
+        broadcaster.notify()
+
+
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(db.session, 'after_flush', _record_events)
+event.listen(db.session, 'after_commit', _notify_broadcaster)
+event.listen(db.session, 'after_soft_rollback', _discard_pending)
@@ -0,0 +1,160 @@
+"""
+Delta sync
+List endpoints accept `since=<sync_token>` and then return only the rows
+whose updated_at moved past the token's watermark, plus tombstones for rows
+deleted since then, so offline clients can patch their local cache instead of
+re-downloading whole tables. Rows listed per user (a user's reports, the
+missions assigned to them) also get a tombstone for that user alone when
+they move to someone else, so they drop out of the previous user's cache.
+Tombstones are kept for SYNC_TOKEN_MAX_AGE; older tokens are refused, and
+the client falls back to a full sync.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import event, inspect, or_
+
+from models import db, Report, Alert, Mission, Safehouse, Resource, Tombstone
+from pagination import keyset_page
+
+# Entity names used in tombstones and by the client-side stores
+SYNC_ENTITIES = {
+    Report: 'report',
+    Alert: 'alert',
+    Mission: 'mission',
+    Safehouse: 'safehouse',
+    Resource: 'resource',
+}
+
+# Column naming the user a per-user listing shows the row to
+SYNC_OWNERS = {
+    Report: 'user_id',
+    Mission: 'assigned_to',
+}
+
+# Watermarks are pulled back by this much so rows written by transactions
+# that were still in flight when a token was issued are sent again
+# rather than missed. Clients apply deltas idempotently.
+SYNC_OVERLAP = timedelta(seconds=5)
+SYNC_TOKEN_MAX_AGE = timedelta(days=7)
+
+
+class InvalidSyncToken(ValueError):
+    """Raised when a `since` token is malformed or was not issued by this server"""
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='civitas-sync')
+
+
+def issue_sync_token():
+    """Token to pass as `since` on the next sync"""
+    watermark = datetime.utcnow() - SYNC_OVERLAP
+    return _serializer().dumps(watermark.isoformat())
+
+
+def parse_sync_token(token):
+    """Watermark datetime carried by a sync token"""
+    try:
+        watermark = datetime.fromisoformat(_serializer().loads(token))
+    except (BadSignature, TypeError, ValueError) as e:
+        raise InvalidSyncToken('invalid sync token') from e
+    if watermark < datetime.utcnow() - SYNC_TOKEN_MAX_AGE:
+        # Tombstones from before then may be pruned already
+        raise InvalidSyncToken('sync token expired, sync in full')
+    return watermark
+
+
+def sync_since():
+    """Watermark of the `since` parameter of the current request, if any"""
+    token = request.args.get('since')
+    return parse_sync_token(token) if token else None
+
+
+def sync_page(query, model, limit, after=None, since=None, viewer=None):
+    """A page of a list query, or of its changes since a watermark.
+
+    Returns (rows, next_cursor, deleted_ids); deleted_ids is None for a full
+    listing and is only filled on the first page of a delta. For a per-user
+    listing, viewer is the user's id: rows that left their listing count as
+    deleted unless the query shows them again.
+    """
+    if since is None:
+        rows, next_cursor = keyset_page(query, model, limit, after)
+        return rows, next_cursor, None
+
+    rows, next_cursor = keyset_page(query.filter(model.updated_at > since), model, limit, after,
+                                    key='updated_at', descending=False)
+    deleted = []
+    if after is None:
+        tombstones = db.session.query(Tombstone.entity_id, Tombstone.user_id).filter(
+            Tombstone.entity == SYNC_ENTITIES[model],
+            Tombstone.deleted_at > since,
+            or_(Tombstone.user_id.is_(None), Tombstone.user_id == viewer) if viewer is not None
+            else Tombstone.user_id.is_(None)
+        ).order_by(Tombstone.deleted_at).all()
+        moved = {entity_id for entity_id, user_id in tombstones if user_id is not None}
+        if moved:
+            # Moved away and back again
+            moved -= {row_id for (row_id,) in query.with_entities(model.id).filter(model.id.in_(moved))}
+        deleted = list(dict.fromkeys(entity_id for entity_id, user_id in tombstones
+                                     if user_id is None or entity_id in moved))
+    return rows, next_cursor, deleted
+
+
+def record_removals(connection, model, changes):
+    """Tombstones for rows moved away from users by Core updates, which skip the flush hook.
+
+    changes is [(row id, previous owner id)].
+    """
+    now = datetime.utcnow()
+    rows = [{'entity': SYNC_ENTITIES[model], 'entity_id': row_id, 'user_id': user_id, 'deleted_at': now}
+            for row_id, user_id in changes if user_id is not None]
+    if rows:
+        connection.execute(Tombstone.__table__.insert(), rows)
+
+
+def prune_tombstones():
+    """Drop tombstones no accepted token can still need; returns how many"""
+    cutoff = datetime.utcnow() - SYNC_TOKEN_MAX_AGE - SYNC_OVERLAP
+    pruned = Tombstone.query.filter(Tombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return pruned
+
+
+def sync_envelope(items, next_cursor, deleted, after=None):
+    """List response body with the delta sync fields filled in"""
+    body = {'items': items, 'next_cursor': next_cursor}
+    if deleted is not None:
+        body['deleted'] = deleted
+    if after is None:
+        # Issued on the first page only: it must predate every page of the walk
+        body['sync_token'] = issue_sync_token()
+    return body
+
+
+def _record_tombstones(session, flush_context, instances):
+    for obj in session.deleted:
+        entity = SYNC_ENTITIES.get(type(obj))
+        if entity is not None and obj.id is not None:
+            session.add(Tombstone(entity=entity, entity_id=obj.id))
+    for obj in session.dirty:
+        owner = SYNC_OWNERS.get(type(obj))
+        if owner is None or obj.id is None:
+            continue
+        history = inspect(obj).attrs[owner].history
+        for previous in history.deleted:
+            if previous is not None and previous != getattr(obj, owner):
+                session.add(Tombstone(entity=SYNC_ENTITIES[type(obj)], entity_id=obj.id, user_id=previous))
+
+
+def _load_previous_owner(target, value, oldvalue, initiator):
+    return value
+
+
+event.listen(db.session, 'before_flush', _record_tombstones)
+# Load the previous owner on assignment so a move can be tombstoned for them
+for _model, _owner in SYNC_OWNERS.items():
+    event.listen(getattr(_model, _owner), 'set', _load_previous_owner, active_history=True, retval=True)
@@ -0,0 +1,16 @@
+"""
+Pytest configuration
+Points the app at a throwaway SQLite database so running the suite never
+touches the development database. Set DATABASE_URL to test against another
+database instead. Background enrichment threads are disabled; tests drain
+the job queue explicitly. The periodic assignment planner is disabled too.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='civitas-test-'), 'civitas.db'))
+os.environ.setdefault('ENRICHMENT_WORKERS', '0')
+os.environ.setdefault('ASSIGNMENT_INTERVAL', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
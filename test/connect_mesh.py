@@ -15,13 +15,14 @@ def connect_to_mesh():
     print("🔗 Connecting to Civitas BLE Mesh Network")
     print("=" * 50)
     
-    # Login first
+    # Get a bearer token; gateways send it instead of a session cookie
     session = requests.Session()
     login_data = {'email': 'rescuer@civitas.com', 'password': 'password123'}
     
     try:
-        response = session.post(f"{BASE_URL}/login", data=login_data, allow_redirects=False)
-        if response.status_code == 302:
+        response = session.post(f"{BASE_URL}/api/auth/token", json=login_data)
+        if response.status_code == 200:
+            session.headers['Authorization'] = f"Bearer {response.json()['token']}"
             print("✅ Login successful")
         else:
             print("❌ Login failed")
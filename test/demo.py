@@ -9,6 +9,7 @@ import json
 import time
 
 BASE_URL = "http://localhost:5000"
+HEADERS = {}  # Authorization header once demo_login has a token
 
 def demo_login():
     """Demo user login"""
@@ -22,8 +23,10 @@ def demo_login():
     }
     
     try:
-        response = requests.post(f"{BASE_URL}/login", data=login_data, allow_redirects=False)
-        if response.status_code == 302:  # Redirect indicates successful login
+        # Scripts use a bearer token instead of a session cookie
+        response = requests.post(f"{BASE_URL}/api/auth/token", json=login_data)
+        if response.status_code == 200:
+            HEADERS['Authorization'] = f"Bearer {response.json()['token']}"
             print("✅ Citizen login successful")
         else:
             print("❌ Login failed")
@@ -37,9 +40,9 @@ def demo_api_endpoints():
     
     # Test reports API
     try:
-        response = requests.get(f"{BASE_URL}/api/reports")
+        response = requests.get(f"{BASE_URL}/api/reports", headers=HEADERS)
         if response.status_code == 200:
-            reports = response.json()
+            reports = response.json()['items']
             print(f"✅ Reports API: {len(reports)} reports found")
         else:
             print("❌ Reports API failed")
@@ -48,9 +51,9 @@ def demo_api_endpoints():
     
     # Test alerts API
     try:
-        response = requests.get(f"{BASE_URL}/api/alerts")
+        response = requests.get(f"{BASE_URL}/api/alerts", headers=HEADERS)
         if response.status_code == 200:
-            alerts = response.json()
+            alerts = response.json()['items']
             print(f"✅ Alerts API: {len(alerts)} alerts found")
         else:
             print("❌ Alerts API failed")
@@ -59,9 +62,9 @@ def demo_api_endpoints():
     
     # Test missions API
     try:
-        response = requests.get(f"{BASE_URL}/api/missions")
+        response = requests.get(f"{BASE_URL}/api/missions", headers=HEADERS)
         if response.status_code == 200:
-            missions = response.json()
+            missions = response.json()['items']
             print(f"✅ Missions API: {len(missions)} missions found")
         else:
             print("❌ Missions API failed")
@@ -70,9 +73,9 @@ def demo_api_endpoints():
     
     # Test safehouses API
     try:
-        response = requests.get(f"{BASE_URL}/api/safehouses")
+        response = requests.get(f"{BASE_URL}/api/safehouses", headers=HEADERS)
         if response.status_code == 200:
-            safehouses = response.json()
+            safehouses = response.json()['items']
             print(f"✅ Safehouses API: {len(safehouses)} safehouses found")
         else:
             print("❌ Safehouses API failed")
@@ -81,9 +84,9 @@ def demo_api_endpoints():
     
     # Test resources API
     try:
-        response = requests.get(f"{BASE_URL}/api/resources")
+        response = requests.get(f"{BASE_URL}/api/resources", headers=HEADERS)
         if response.status_code == 200:
-            resources = response.json()
+            resources = response.json()['items']
             print(f"✅ Resources API: {len(resources)} resources found")
         else:
             print("❌ Resources API failed")
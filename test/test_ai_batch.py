@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Batch AI Endpoint Test Script
+Checks ordering, per-item errors and NDJSON streaming of /api/ai/batch
+"""
+
+import json
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db, ChromeNanoAPI
+from models import User
+
+
+def _client():
+    with app.app_context():
+        if not User.query.filter_by(email='batcher@civitas.test').first():
+            db.session.add(User(email='batcher@civitas.test', name='Batch Tester', role='government',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': 'batcher@civitas.test', 'password': 'password123'})
+    return client
+
+
+def test_translate_alerts_in_one_request():
+    """200 alerts into three languages: one round trip instead of 600"""
+    print("📦 Testing batch translation...")
+    client = _client()
+    alerts = [f'Flood warning {i}: move to the nearest shelter' for i in range(200)]
+    operations = [{'op': 'translate', 'text': text, 'target_language': language}
+                  for text in alerts for language in ('es', 'fr', 'de')]
+    body = client.post('/api/ai/batch', json={'operations': operations}).get_json()
+
+    assert body['succeeded'] == 600 and body['failed'] == 0
+    assert [result['index'] for result in body['results']] == list(range(600))
+    for operation, result in zip(operations, body['results']):
+        assert result['result'] == ChromeNanoAPI.translate_text(operation['text'], operation['target_language'])
+    print("✅ 600 translations returned in order")
+
+
+def test_mixed_operations_with_errors():
+    client = _client()
+    body = client.post('/api/ai/batch', json={'operations': [
+        {'op': 'rewrite', 'text': 'We need help'},
+        {'op': 'teleport', 'text': 'x'},
+        {'op': 'generate_prompt', 'context': 'Flooded school', 'task_type': 'evacuation'},
+        {'op': 'summarize'},
+        'not an object',
+    ]}).get_json()
+    results = body['results']
+    assert results[0] == {'index': 0, 'success': True, 'result': 'We require assistance'}
+    assert results[1]['error'] == 'unknown op: teleport'
+    assert results[2]['result'].startswith('EVACUATION STRATEGY for Flooded school')
+    assert results[3]['error'] == 'text is required'
+    assert not results[4]['success']
+    assert (body['succeeded'], body['failed']) == (2, 3)
+    print("✅ Per-item errors do not fail the batch")
+
+
+def test_streamed_results():
+    client = _client()
+    operations = [{'op': 'proofread', 'text': f'item {i} needs review'} for i in range(50)]
+    response = client.post('/api/ai/batch', json={'operations': operations, 'stream': True})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['index'] for line in lines] == list(range(50))
+    assert lines[7]['result'] == 'Item 7 needs review.'
+    print("✅ Streamed NDJSON results in order")
+
+
+def test_malformed_batch_is_rejected():
+    client = _client()
+    assert client.post('/api/ai/batch', json={'operations': 'translate'}).status_code == 400
+    assert client.post('/api/ai/batch', data='nope').status_code == 400
+
+
+if __name__ == "__main__":
+    test_translate_alerts_in_one_request()
+    test_mixed_operations_with_errors()
+    test_streamed_results()
+    test_malformed_batch_is_rejected()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+AI Result Cache Test Script
+Checks LRU/TTL eviction, counters and the shared store of the AI cache, and
+that repeated ChromeNanoAPI calls are served from it
+"""
+
+import os
+import tempfile
+import time
+
+from ai_cache import AICache, SharedStore, ai_cache
+from app import ChromeNanoAPI
+
+
+def test_lru_eviction_and_counters():
+    cache = AICache(maxsize=2, ttl=60)
+    calls = []
+
+    @cache.cached('echo')
+    def echo(text, style='plain'):
+        calls.append(text)
+        return text.upper()
+
+    assert echo('a') == 'A' and echo('b') == 'B'
+    assert echo('a') == 'A'           # hit, 'a' becomes most recent
+    assert echo('a', style='x') == 'A'  # parameters are part of the key
+    assert echo('b') == 'B'           # 'b' was evicted, recomputed
+    assert calls == ['a', 'b', 'a', 'b']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 4, 2)
+    print("✅ LRU eviction and counters")
+
+
+def test_ttl_expiry():
+    cache = AICache(maxsize=10, ttl=0.05)
+    key = cache.make_key('op', {}, 'text')
+    cache.set(key, 'value')
+    assert cache.get(key) == (True, 'value')
+    time.sleep(0.06)
+    assert cache.get(key) == (False, None)
+    assert cache.stats()['evictions'] == 1
+    print("✅ Entries expire after their TTL")
+
+
+def test_shared_store_between_processes():
+    """Two caches on one file behave like two gunicorn workers"""
+    path = os.path.join(tempfile.mkdtemp(), 'ai_cache.db')
+    first = AICache(shared=SharedStore(path))
+    second = AICache(shared=SharedStore(path))
+    key = first.make_key('summarize', {'max_length': 100}, 'flood')
+    first.set(key, 'summary')
+    assert second.get(key) == (True, 'summary')
+    assert second.stats()['shared_hits'] == 1
+    print("✅ Results shared through the local store")
+
+
+def test_repeated_calls_are_served_from_cache():
+    ai_cache.clear()
+    text = 'Urgent: flood waters are rising. We need help quickly. ' * 50
+    started = time.perf_counter()
+    first = ChromeNanoAPI.generate_prompt(text, 'evacuation')
+    ChromeNanoAPI.rewrite_text(text)
+    cold = time.perf_counter() - started
+
+    rounds = 1000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        assert ChromeNanoAPI.generate_prompt(text, task_type='evacuation') == first
+        ChromeNanoAPI.rewrite_text(text)
+    warm = (time.perf_counter() - started) / rounds
+
+    stats = ai_cache.stats()
+    print(f"   Cold: {cold * 1e6:.0f} µs, cached: {warm * 1e6:.1f} µs per pair")
+    assert stats['misses'] == 2 and stats['hits'] == 2 * rounds
+    assert warm < 200e-6
+    print("✅ Repeated AI calls served from cache")
+
+
+def main():
+    print("🗄️ Testing AI result cache...")
+    test_lru_eviction_and_counters()
+    test_ttl_expiry()
+    test_shared_store_between_processes()
+    test_repeated_calls_are_served_from_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Alert Translation Test Script
+Checks that alerts are translated once at creation and served in the
+reader's language from the stored translations
+"""
+
+from werkzeug.security import generate_password_hash
+
+import app as civitas
+from app import app, db
+from models import User, Alert
+
+
+def _client(email, role='citizen'):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name=email.split('@')[0], role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def _find(body, alert_id):
+    return next(item for item in body['items'] if item['id'] == alert_id)
+
+
+def test_alert_translated_once_at_creation(monkeypatch):
+    print("🌐 Testing alert translation fan-out...")
+    calls = []
+    translate = civitas.ChromeNanoAPI.translate_text
+    monkeypatch.setattr(civitas.ChromeNanoAPI, 'translate_text',
+                        staticmethod(lambda *args: calls.append(args) or translate(*args)))
+    coordinator = _client('translator@civitas.test', 'government')
+    body = coordinator.post('/api/alerts', json={'title': 'Flood', 'message': 'Flood warning: go to the shelter'}).get_json()
+    assert body['translated_messages'] == {'es': 'Inundación warning: go to the refugio',
+                                           'fr': 'Inondation warning: go to the abri'}
+    assert len(calls) == len(civitas.ALERT_LANGUAGES)
+
+    # Reading in every language costs no further translation work
+    reader = _client('reader@civitas.test')
+    for language in ('es', 'fr', 'en', 'es'):
+        reader.get('/api/alerts', headers={'Accept-Language': language})
+    assert len(calls) == len(civitas.ALERT_LANGUAGES)
+    with app.app_context():
+        assert db.session.get(Alert, body['id']).translated_messages == body['translated_messages']
+    print("✅ Translations produced once per alert")
+
+
+def test_reader_language_selection():
+    coordinator = _client('translator@civitas.test', 'government')
+    alert_id = coordinator.post('/api/alerts', json={'title': 'Fire', 'message': 'Fire near the school'}).get_json()['id']
+    reader = _client('reader@civitas.test')
+
+    spanish = _find(reader.get('/api/alerts', headers={'Accept-Language': 'es-MX,es;q=0.9,en;q=0.5'}).get_json(), alert_id)
+    assert (spanish['language'], spanish['localized_message']) == ('es', 'Fuego near the school')
+    english = _find(reader.get('/api/alerts', headers={'Accept-Language': 'de'}).get_json(), alert_id)
+    assert (english['language'], english['localized_message']) == ('en', 'Fire near the school')
+
+    # A stored preference beats Accept-Language; ?lang= beats both
+    assert reader.post('/api/user/language', json={'language': 'fr'}).status_code == 200
+    french = _find(reader.get('/api/alerts', headers={'Accept-Language': 'es'}).get_json(), alert_id)
+    assert french['localized_message'] == 'Feu near the school'
+    assert _find(reader.get('/api/alerts?lang=es').get_json(), alert_id)['language'] == 'es'
+    assert reader.post('/api/user/language', json={'language': 'xx'}).status_code == 400
+    reader.post('/api/user/language', json={'language': None})
+    print("✅ Accept-Language, preference and ?lang= respected")
+
+
+def test_etag_varies_by_language():
+    reader = _client('reader@civitas.test')
+    spanish = reader.get('/api/alerts', headers={'Accept-Language': 'es'})
+    french = reader.get('/api/alerts', headers={'If-None-Match': spanish.headers['ETag'], 'Accept-Language': 'fr'})
+    assert french.status_code == 200
+    assert 'Accept-Language' in french.headers['Vary']
+
+
+def test_ble_broadcast_uses_stored_translation():
+    coordinator = _client('translator@civitas.test', 'government')
+    alert_id = coordinator.post('/api/alerts', json={'title': 'Quake', 'message': 'Earthquake: stay calm'}).get_json()['id']
+    body = coordinator.post('/api/ble/broadcast', json={'type': 'alert', 'alert_id': alert_id},
+                            headers={'Accept-Language': 'es'}).get_json()
+    assert body['data']['message'] == 'Terremoto: mantenga la calma'
+    assert body['data']['translations']['fr'] == 'Tremblement de terre: restez calme'
+    print("✅ BLE broadcast carries stored translations")
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test/test_alert_translations.py")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollup Test Script
+Checks that the flush hooks keep the rollup cells in step with inserts,
+updates and deletes, and that /api/analytics answers the same as a full
+rebuild_rollups() recount
+"""
+
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+from analytics import rebuild_rollups
+from app import app, db
+from models import User, Report, AnalyticsRollup
+
+# Rows in a bucket of their own, far from the other suites' data
+CREATED = datetime(2001, 3, 4, 5, 30)
+
+
+def _client():
+    with app.app_context():
+        if not User.query.filter_by(email='analyst@civitas.test').first():
+            db.session.add(User(email='analyst@civitas.test', name='Analyst', role='government',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+        user_id = User.query.filter_by(email='analyst@civitas.test').first().id
+    client = app.test_client()
+    client.post('/login', data={'email': 'analyst@civitas.test', 'password': 'password123'})
+    return client, user_id
+
+
+def _count(dimension, value, granularity='hour'):
+    start = CREATED.replace(minute=0) if granularity == 'hour' else CREATED.replace(hour=0, minute=0)
+    cell = db.session.query(AnalyticsRollup.count).filter_by(
+        granularity=granularity, bucket_start=start, entity='report', dimension=dimension, value=value).scalar()
+    return cell or 0
+
+
+def test_rollups_follow_writes():
+    print("📊 Testing analytics rollups...")
+    _, user_id = _client()
+    with app.app_context():
+        before = {key: _count(*key) for key in [('severity', 'low'), ('severity', 'high'),
+                                                ('status', 'pending'), ('status', 'resolved'),
+                                                ('location', 'Rollup Ward')]}
+        report = Report(title='Rollup check', description='Counted once', location='Rollup Ward',
+                        severity='low', status='pending', user_id=user_id, created_at=CREATED)
+        db.session.add(report)
+        db.session.commit()
+        assert _count('severity', 'low') == before[('severity', 'low')] + 1
+        assert _count('severity', 'low', 'day') >= 1
+        assert _count('location', 'Rollup Ward') == before[('location', 'Rollup Ward')] + 1
+
+        # An update moves the row from one cell to another
+        report.severity = 'high'
+        report.status = 'resolved'
+        db.session.commit()
+        assert _count('severity', 'low') == before[('severity', 'low')]
+        assert _count('severity', 'high') == before[('severity', 'high')] + 1
+        assert _count('status', 'pending') == before[('status', 'pending')]
+        assert _count('status', 'resolved') == before[('status', 'resolved')] + 1
+
+        # A write that leaves the rolled-up columns alone changes nothing
+        report.description = 'Edited'
+        db.session.commit()
+        assert _count('severity', 'high') == before[('severity', 'high')] + 1
+
+        db.session.delete(report)
+        db.session.commit()
+        assert all(_count(*key) == count for key, count in before.items())
+    print("✅ Inserts, updates and deletes move the rollup counts")
+
+
+def test_api_matches_rebuild():
+    client, user_id = _client()
+    with app.app_context():
+        db.session.add_all([Report(title=f'Rollup {i}', description='Range check', location=f'Rollup Ward {i % 3}',
+                                   severity=('low', 'medium', 'critical')[i % 3], user_id=user_id,
+                                   created_at=CREATED.replace(minute=i)) for i in range(12)])
+        db.session.commit()
+
+    urls = ['/api/analytics?bucket=hour&start=2001-03-04T00:00:00&end=2001-03-05T00:00:00',
+            '/api/analytics?bucket=day&entity=report&dimension=severity&start=2001-03-01T00:00:00',
+            '/api/analytics?bucket=day']
+    incremental = [client.get(url).get_json() for url in urls]
+    assert incremental[0]['totals']['report']['severity']['critical']['count'] >= 4
+    with app.app_context():
+        rebuild_rollups()
+    recounted = [client.get(url).get_json() for url in urls]
+    assert incremental == recounted
+    print("✅ /api/analytics matches a full recount")
+
+
+if __name__ == "__main__":
+    test_rollups_follow_writes()
+    test_api_matches_rebuild()
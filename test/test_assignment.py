@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Team Assignment Test Script
+Checks the assignment solver against brute force and against solving from
+scratch after edits, then plans hundreds of teams against thousands of
+missions and times an incremental re-plan after a single change
+"""
+
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from werkzeug.security import generate_password_hash
+
+from analytics import record_bulk_insert
+from app import app, db
+import assignment
+from assignment import AssignmentSolver, PLANNER_LEASE, planner, required_team_type
+from conditional import bump_versions
+from leases import holder_id, pending_requests
+from models import Lease, Mission, Team, Tombstone, User
+
+TEAMS = 300
+MISSIONS = 3000
+CENTER = (14.5995, 120.9842)
+
+
+def _login():
+    with app.app_context():
+        if not User.query.filter_by(email='dispatch@civitas.test').first():
+            db.session.add(User(email='dispatch@civitas.test', name='Dispatch', role='government',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+        user_id = User.query.filter_by(email='dispatch@civitas.test').first().id
+    client = app.test_client()
+    client.post('/login', data={'email': 'dispatch@civitas.test', 'password': 'password123'})
+    return client, user_id
+
+
+def _seed(creator_id):
+    with app.app_context():
+        if Team.query.filter(Team.name.like('Squad %')).count() >= TEAMS:
+            return
+        rng = random.Random(24)
+        now = datetime.utcnow()
+        connection = db.session.connection()
+        connection.execute(User.__table__.insert(), [{
+            'email': f'leader{i}@civitas.test', 'name': f'Leader {i}', 'role': 'rescuer',
+            'password_hash': 'unused', 'created_at': now,
+        } for i in range(TEAMS)])
+        leaders = dict(db.session.query(User.email, User.id).filter(User.email.like('leader%@civitas.test')))
+        connection.execute(Team.__table__.insert(), [{
+            'name': f'Squad {i}', 'team_type': rng.choice(['rescue', 'medical', 'logistics', 'communication']),
+            'leader_id': leaders[f'leader{i}@civitas.test'], 'status': rng.choice(['active', 'standby']),
+            'latitude': CENTER[0] + rng.uniform(-1, 1), 'longitude': CENTER[1] + rng.uniform(-1, 1),
+            'created_at': now,
+        } for i in range(TEAMS)])
+        texts = ['People trapped under rubble', 'Injured residents need first aid', 'Deliver food supplies',
+                 'Radio relay is down', 'Check on the neighbourhood']
+        missions = [{
+            'title': f'Task {i}', 'description': rng.choice(texts), 'location': f'Barangay {i % 60}',
+            'latitude': CENTER[0] + rng.uniform(-1, 1), 'longitude': CENTER[1] + rng.uniform(-1, 1),
+            'priority': rng.choice(['low', 'medium', 'high', 'critical']), 'status': 'active',
+            'created_by': creator_id, 'created_at': now, 'updated_at': now,
+        } for i in range(MISSIONS)]
+        connection.execute(Mission.__table__.insert(), missions)
+        # Core inserts skip the flush hooks
+        record_bulk_insert(connection, Mission, missions)
+        bump_versions(connection, {User.__tablename__, Team.__tablename__, Mission.__tablename__})
+        db.session.commit()
+
+
+def _brute_force(cost, idle_cost):
+    n, m = cost.shape
+    full = np.hstack([cost, np.full((n, n), idle_cost)])
+    return min(sum(full[i, j] for i, j in enumerate(columns)) for columns in itertools.permutations(range(m + n), n))
+
+
+def test_solver_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        cost = rng.random((rng.integers(1, 5), rng.integers(0, 5))) * 3
+        solver = AssignmentSolver(idle_cost=5)
+        solver.load(list(range(cost.shape[0])), list(range(cost.shape[1])), cost)
+        solver.solve()
+        assert abs(solver.total_cost() - _brute_force(cost, 5)) < 1e-9
+
+
+def test_incremental_edits_stay_optimal():
+    rng = np.random.default_rng(2)
+    costs = {}
+
+    def cost_of(rows, cols):
+        return np.array([[costs.setdefault((i, j), rng.random() * 3) for j in cols] for i in rows]) \
+            .reshape(len(rows), len(cols))
+
+    solver = AssignmentSolver(idle_cost=5)
+    solver.load(list(range(4)), list(range(6)), cost_of(range(4), range(6)))
+    solver.solve()
+    next_key = 100
+    for _ in range(300):
+        operation = rng.integers(0, 6)
+        columns = solver.mission_columns()
+        if operation == 0:
+            next_key += 1
+            solver.set_rows([next_key], cost_of([next_key], columns))
+        elif operation == 1 and len(solver.rows) > 1:
+            solver.remove_rows([solver.rows[rng.integers(len(solver.rows))]])
+        elif operation == 2:
+            next_key += 1
+            solver.set_cols([next_key], cost_of(solver.rows, [next_key]))
+        elif operation == 3 and columns:
+            solver.remove_cols([columns[rng.integers(len(columns))]])
+        elif operation == 4 and columns:
+            key = columns[rng.integers(len(columns))]
+            for row in solver.rows:
+                costs.pop((row, key), None)
+            solver.set_cols([key], cost_of(solver.rows, [key]))
+        elif operation == 5:
+            key = solver.rows[rng.integers(len(solver.rows))]
+            for column in columns:
+                costs.pop((key, column), None)
+            solver.set_rows([key], cost_of([key], columns))
+        solver.solve()
+
+        fresh = AssignmentSolver(idle_cost=5)
+        fresh.load(solver.rows, solver.mission_columns(), cost_of(solver.rows, solver.mission_columns()))
+        fresh.solve()
+        assert abs(solver.total_cost() - fresh.total_cost()) < 1e-9
+        assert len(set(solver.col4row)) == len(solver.rows)
+
+
+def test_required_team_type():
+    assert required_team_type('Two injured and bleeding') == 'medical'
+    assert required_team_type('Family trapped on the roof') == 'rescue'
+    assert required_team_type('Walk the perimeter') is None
+
+
+def test_plan_and_replan():
+    print("🧭 Assigning teams to missions...")
+    client, user_id = _login()
+    _seed(user_id)
+    planner.reset()
+
+    response = client.post('/api/teams/assignments/solve?full=1')
+    assert response.status_code == 200
+    plan = response.get_json()
+    print(f"   Full solve: {plan['teams']} teams x {plan['missions']} missions, {plan['assigned']} assigned, "
+          f"{plan['written']} rows written in {plan['elapsed_ms']} ms")
+    assert plan['teams'] >= TEAMS and plan['assigned'] == plan['teams']
+
+    with app.app_context():
+        teams = db.session.query(Team.id, Team.leader_id, Team.team_type, Team.ai_team_efficiency,
+                                 Team.latitude, Team.longitude).filter(Team.name.like('Squad %')).all()
+        leaders = {team.leader_id for team in teams}
+        assigned = db.session.query(Mission.assigned_to).filter(Mission.assigned_to.in_(leaders)).all()
+        assert len(assigned) == len(leaders)
+        assert all(0 <= team.ai_team_efficiency <= 1 for team in teams)
+
+    rerun = client.post('/api/teams/assignments/solve').get_json()
+    assert rerun['mode'] == 'unchanged' and rerun['written'] == 0
+
+    # A critical rescue right at a rescue team's base: only that corner of the plan is re-solved
+    team = next(team for team in teams if team.team_type == 'rescue')
+    with app.app_context():
+        before = dict(db.session.query(Mission.id, Mission.assigned_to).filter(Mission.assigned_to.in_(leaders)))
+    started = time.perf_counter()
+    mission_id = client.post('/api/missions', json={
+        'title': 'Building collapse', 'description': 'People trapped', 'location': 'Plaza',
+        'priority': 'critical', 'latitude': team.latitude, 'longitude': team.longitude,
+    }).get_json()['id']
+    replan = client.post('/api/teams/assignments/solve').get_json()
+    elapsed = time.perf_counter() - started
+    print(f"   Re-plan after one new mission: {replan['routed']} teams re-routed, "
+          f"{replan['written']} rows written, {elapsed * 1000:.1f} ms including the request")
+    assert replan['mode'] == 'incremental' and replan['changed'] == 1
+    assert replan['routed'] < replan['teams']
+    with app.app_context():
+        assert db.session.get(Mission, mission_id).assigned_to in leaders
+        # Leaders moved off a mission get a tombstone for it, so it leaves their delta sync
+        after = dict(db.session.query(Mission.id, Mission.assigned_to).filter(Mission.id.in_(before)))
+        moved = {(key, leader) for key, leader in before.items() if after[key] != leader}
+        assert moved
+        tombstones = set(db.session.query(Tombstone.entity_id, Tombstone.user_id).filter(
+            Tombstone.entity == 'mission', Tombstone.user_id.isnot(None)))
+        assert moved <= tombstones
+    print("✅ Incremental re-plan touches only the affected teams")
+
+    # A deployed team leaves the plan and keeps its mission
+    with app.app_context():
+        assignee = db.session.get(Mission, mission_id).assigned_to
+        deployed = db.session.query(Team.id).filter(Team.leader_id == assignee).scalar()
+    assert client.put(f'/api/teams/{deployed}', json={'status': 'deployed'}).status_code == 200
+    replan = client.post('/api/teams/assignments/solve').get_json()
+    assert replan['teams'] == plan['teams'] - 1
+    with app.app_context():
+        assert db.session.get(Mission, mission_id).assigned_to == assignee
+
+
+def _hold_lease(holder, **values):
+    with app.app_context():
+        db.session.merge(Lease(name=PLANNER_LEASE, holder=holder,
+                               expires_at=datetime.utcnow() + timedelta(minutes=1), **values))
+        db.session.commit()
+
+
+def test_one_planner_at_a_time():
+    """While another live process holds the planner lease, solves are handed to it"""
+    client, _ = _login()
+    _hold_lease('other-host:1')
+    assignment.REQUEST_WAIT, wait = 0.2, assignment.REQUEST_WAIT
+    try:
+        # The holder has not run yet: the request is queued for it
+        response = client.post('/api/teams/assignments/solve?full=1')
+        assert response.status_code == 202 and response.get_json()['status'] == 'requested'
+        with app.app_context():
+            lease = db.session.get(Lease, PLANNER_LEASE)
+            assert lease.requests > (lease.served or 0) and lease.request_full
+            assert pending_requests(PLANNER_LEASE)
+
+        # The holder ran after the request: its result is returned
+        _hold_lease('other-host:1', served=lease.requests + 1, result='{"mode": "incremental", "assigned": 3}')
+        response = client.post('/api/teams/assignments/solve')
+        assert response.status_code == 200 and response.get_json() == {'mode': 'incremental', 'assigned': 3}
+    finally:
+        assignment.REQUEST_WAIT = wait
+
+    # Once it lapses this process takes over, re-solving in full since the other process planned last
+    with app.app_context():
+        db.session.get(Lease, PLANNER_LEASE).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    assert client.post('/api/teams/assignments/solve').get_json()['mode'] == 'full'
+    with app.app_context():
+        assert not pending_requests(PLANNER_LEASE)
+    assert client.post('/api/teams/assignments/solve').get_json()['mode'] != 'full'
+    with app.app_context():
+        lease = db.session.get(Lease, PLANNER_LEASE)
+        assert lease.holder == holder_id() and lease.expires_at <= datetime.utcnow()
+
+
+def test_team_api():
+    client, user_id = _login()
+    response = client.post('/api/teams', json={'name': 'Harbour medics', 'team_type': 'medical',
+                                               'leader_id': user_id, 'latitude': 14.6, 'longitude': 121.0})
+    team_id = response.get_json()['id']
+    items = client.get('/api/teams').get_json()['items']
+    assert any(item['id'] == team_id and item['team_type'] == 'medical' for item in items)
+    assert client.put(f'/api/teams/{team_id}', json={'status': 'resting'}).status_code == 400
+    assert client.put('/api/teams/999999', json={'status': 'standby'}).status_code == 404
+
+    with app.app_context():
+        if not User.query.filter_by(email='volunteer@civitas.test').first():
+            db.session.add(User(email='volunteer@civitas.test', name='Volunteer', role='citizen',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    citizen = app.test_client()
+    citizen.post('/login', data={'email': 'volunteer@civitas.test', 'password': 'password123'})
+    assert citizen.get('/api/teams').status_code == 403
+    assert citizen.post('/api/teams/assignments/solve').status_code == 403
+    assert citizen.put(f'/api/teams/{team_id}', json={'status': 'standby'}).status_code == 403
+
+
+if __name__ == "__main__":
+    test_solver_matches_brute_force()
+    test_incremental_edits_stay_optimal()
+    test_required_team_type()
+    test_plan_and_replan()
+    test_one_planner_at_a_time()
+    test_team_api()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+BLE Sync Ingestion Test Script
+Flushes a large batch of mesh-buffered reports through /api/ble/sync and
+checks per-item statuses, idempotency and ingestion time
+"""
+
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Report
+
+FLUSH_SIZE = 10000
+MAX_FLUSH_SECONDS = 10.0
+ID_OFFSET = 5000000
+
+
+def _gateway_client():
+    """Logged-in test client for a rescuer account"""
+    with app.app_context():
+        user = User.query.filter_by(email='gateway@civitas.test').first()
+        if not user:
+            user = User(email='gateway@civitas.test', name='Mesh Gateway', role='rescuer',
+                        password_hash=generate_password_hash('password123'))
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    client.post('/login', data={'email': 'gateway@civitas.test', 'password': 'password123'})
+    return client, user_id
+
+
+def _buffered_reports(user_id, count, offset=ID_OFFSET):
+    return [{
+        'id': offset + i,
+        'title': f'Mesh report {i}',
+        'description': 'Water rising near the bridge, two families need evacuation.',
+        'location': f'Sector {i % 25}',
+        'severity': ('low', 'medium', 'high', 'critical')[i % 4],
+        'user_id': user_id,
+        'status': 'pending'
+    } for i in range(count)]
+
+
+def test_bulk_flush_is_fast_and_idempotent():
+    """Ingest a 10k-report flush, then replay it"""
+    print("📡 Testing BLE bulk sync...")
+    client, user_id = _gateway_client()
+    reports = _buffered_reports(user_id, FLUSH_SIZE)
+
+    started = time.perf_counter()
+    response = client.post('/api/ble/sync', json={'type': 'reports', 'reports': reports})
+    elapsed = time.perf_counter() - started
+    result = response.get_json()
+    print(f"   {FLUSH_SIZE} reports synced in {elapsed:.2f}s")
+
+    assert response.status_code == 200
+    assert result['accepted'] == FLUSH_SIZE
+    assert result['duplicates'] == 0 and result['rejected'] == 0
+    assert elapsed < MAX_FLUSH_SECONDS
+
+    with app.app_context():
+        stored = Report.query.filter(Report.id >= ID_OFFSET, Report.id < ID_OFFSET + FLUSH_SIZE).count()
+    assert stored == FLUSH_SIZE
+
+    # Replaying the same flush must not insert anything
+    started = time.perf_counter()
+    replay = client.post('/api/ble/sync', json={'type': 'reports', 'reports': reports}).get_json()
+    print(f"   Replay of {FLUSH_SIZE} reports in {time.perf_counter() - started:.2f}s")
+    assert replay['accepted'] == 0
+    assert replay['duplicates'] == FLUSH_SIZE
+    print("✅ BLE bulk sync: fast and idempotent")
+
+
+def test_per_item_statuses():
+    """Accepted, duplicate and rejected items are reported in order"""
+    client, user_id = _gateway_client()
+    fresh = _buffered_reports(user_id, 1, offset=ID_OFFSET + FLUSH_SIZE + 1)[0]
+    payload = [
+        fresh,
+        dict(fresh),                                   # repeated in the same flush
+        {'id': ID_OFFSET + FLUSH_SIZE + 2, 'title': 'No description'},
+        dict(fresh, id=ID_OFFSET + FLUSH_SIZE + 3, severity='apocalyptic'),
+        dict(fresh, id=ID_OFFSET + FLUSH_SIZE + 4, user_id=987654321),
+    ]
+    result = client.post('/api/ble/sync', json={'type': 'reports', 'reports': payload}).get_json()
+    statuses = [item['status'] for item in result['results']]
+    assert statuses == ['accepted', 'duplicate', 'rejected', 'rejected', 'rejected']
+    assert 'missing fields' in result['results'][2]['error']
+    print("✅ BLE sync per-item statuses")
+
+
+def test_malformed_flush_is_rejected():
+    """A flush that is not an object with a list of reports gets a 400, not a 500"""
+    client, _ = _gateway_client()
+    for body in [{'type': 'reports', 'reports': None}, {'type': 'reports', 'reports': {'id': 1}},
+                 {'type': 'reports', 'reports': 'all of them'}, [{'type': 'reports'}], None]:
+        response = client.post('/api/ble/sync', json=body)
+        assert response.status_code == 400, body
+        assert 'error' in response.get_json()
+    response = client.post('/api/ble/sync', data='{not json', content_type='application/json')
+    assert response.status_code == 400
+    assert client.post('/api/ble/sync', json={'type': 'reports'}).get_json()['accepted'] == 0
+
+
+if __name__ == "__main__":
+    test_bulk_flush_is_fast_and_idempotent()
+    test_per_item_statuses()
+    test_malformed_flush_is_rejected()
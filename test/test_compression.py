@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compression Test Script
+Checks Accept-Encoding negotiation for dynamic responses, serving of
+precompressed static files, and prints bytes on the wire per endpoint
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import compression
+from app import app, db
+from compress_static import compress_static
+from compression import transfer_stats
+from models import Alert, User
+
+ENDPOINTS = ('/api/alerts?limit=200', '/api/dashboard/summary', '/dashboard', '/alerts')
+
+
+def _client():
+    with app.app_context():
+        user = User.query.filter_by(email='compress@civitas.test').first()
+        if user is None:
+            user = User(email='compress@civitas.test', name='Compress', role='government',
+                        password_hash=generate_password_hash('password123'))
+            db.session.add(user)
+            db.session.commit()
+        if Alert.query.count() < 100:
+            start = datetime.utcnow() - timedelta(hours=1)
+            db.session.add_all([Alert(title=f'Flood warning {i}', message='River levels rising, move to higher ground.',
+                                      rewritten_message='River levels are rising. Move to higher ground.',
+                                      alert_type='flood', severity='high', created_by=user.id,
+                                      created_at=start + timedelta(seconds=i)) for i in range(100)])
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': 'compress@civitas.test', 'password': 'password123'})
+    return client
+
+
+def test_dynamic_responses_are_negotiated():
+    print("🗜️ Measuring bytes on the wire per endpoint...")
+    client = _client()
+    transfer_stats.clear()
+    for endpoint in ENDPOINTS:
+        raw = client.get(endpoint)
+        packed = client.get(endpoint, headers={'Accept-Encoding': 'gzip'})
+        assert raw.status_code == packed.status_code == 200
+        assert 'Content-Encoding' not in raw.headers
+        assert 'Accept-Encoding' in packed.headers['Vary']
+        if len(raw.get_data()) < compression.COMPRESS_MIN_SIZE:
+            assert 'Content-Encoding' not in packed.headers
+            continue
+        assert packed.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(packed.get_data())
+        if raw.is_json:
+            # sync_token carries the time it was issued
+            decoded = json.loads(body)
+            decoded.pop('sync_token', None)
+            expected = raw.get_json()
+            expected.pop('sync_token', None)
+            assert decoded == expected
+        else:
+            assert body == raw.get_data()
+        print(f"   {endpoint}: {len(raw.get_data())} -> {len(packed.get_data())} bytes")
+
+    stats = client.get('/api/compression').get_json()
+    assert stats['alerts_api']['sent_bytes'] < stats['alerts_api']['raw_bytes']
+    print("✅ Compressed when the client accepts gzip, identical once decoded")
+
+
+def test_small_and_streamed_responses_pass_through():
+    client = _client()
+    small = client.get('/api/enrichment/0', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    export = client.get('/api/export/alert', headers={'Accept-Encoding': 'gzip'})
+    assert export.status_code == 200 and 'Content-Encoding' not in export.headers
+
+
+def test_etag_depends_on_encoding():
+    client = _client()
+    raw = client.get('/api/alerts')
+    packed = client.get('/api/alerts', headers={'Accept-Encoding': 'gzip'})
+    assert raw.headers['ETag'] != packed.headers['ETag']
+    repeat = client.get('/api/alerts', headers={'Accept-Encoding': 'gzip', 'If-None-Match': packed.headers['ETag']})
+    assert repeat.status_code == 304
+
+
+def test_precompressed_static_files():
+    folder = tempfile.mkdtemp(prefix='civitas-static-')
+    original = app.static_folder
+    try:
+        shutil.copy(os.path.join(original, 'app.js'), folder)
+        shutil.copy(os.path.join(original, 'style.css'), folder)
+        written = compress_static(folder)
+        assert {os.path.basename(path) for path, _, sizes in written if sizes} == {'app.js', 'style.css'}
+
+        app.static_folder = folder
+        client = app.test_client()
+        plain = client.get('/static/app.js')
+        assert 'Content-Encoding' not in plain.headers
+        packed = client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        assert packed.headers['Content-Encoding'] == 'gzip'
+        assert packed.mimetype == plain.mimetype
+        assert gzip.decompress(packed.get_data()) == plain.get_data()
+        print(f"   /static/app.js: {len(plain.get_data())} -> {len(packed.get_data())} bytes, precompressed")
+        plain.close()
+        packed.close()
+
+        # A source edited after compress_static ran is served as is
+        later = os.path.getmtime(os.path.join(folder, 'style.css.gz')) + 10
+        os.utime(os.path.join(folder, 'style.css'), (later, later))
+        stale = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in stale.headers
+        stale.close()
+    finally:
+        app.static_folder = original
+        shutil.rmtree(folder)
+
+
+def test_available_encodings():
+    expected = ['br', 'gzip'] if compression.brotli is not None else ['gzip']
+    assert compression.available_encodings() == expected
+
+
+if __name__ == "__main__":
+    test_dynamic_responses_are_negotiated()
+    test_small_and_streamed_responses_pass_through()
+    test_etag_depends_on_encoding()
+    test_precompressed_static_files()
+    test_available_encodings()
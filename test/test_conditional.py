@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Conditional GET Test Script
+Checks that repeat requests are answered 304 from the validators, that a
+write to the collection changes the ETag and that the ETag varies by user,
+language and content encoding
+"""
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User
+
+URL = '/api/alerts'
+
+
+def _client(email, role='government'):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name=email.split('@')[0], role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def test_repeat_request_is_not_modified():
+    print("🏷️ Testing conditional GET...")
+    client = _client('etag@civitas.test')
+    first = client.get(URL)
+    assert first.status_code == 200 and first.headers['ETag']
+
+    repeat = client.get(URL, headers={'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304 and repeat.data == b''
+    assert repeat.headers['ETag'] == first.headers['ETag']
+    since = client.get(URL, headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert since.status_code == 304
+    assert client.get(URL, headers={'If-None-Match': '"stale"'}).status_code == 200
+    print("✅ Unchanged collections answer 304")
+
+
+def test_write_changes_etag():
+    client = _client('etag@civitas.test')
+    before = client.get(URL).headers['ETag']
+    client.post(URL, json={'title': 'Boil water', 'message': 'Boil tap water before drinking'})
+    response = client.get(URL, headers={'If-None-Match': before})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != before
+    assert any(item['title'] == 'Boil water' for item in response.get_json()['items'])
+
+
+def test_etag_varies_by_user_language_and_encoding():
+    client = _client('etag@civitas.test')
+    other = _client('etag-other@civitas.test', 'citizen')
+    english = client.get(URL, headers={'Accept-Language': 'en', 'Accept-Encoding': 'identity'})
+    etag = english.headers['ETag']
+
+    # Another user's validator never matches
+    theirs = other.get(URL, headers={'Accept-Language': 'en', 'Accept-Encoding': 'identity',
+                                     'If-None-Match': etag})
+    assert theirs.status_code == 200 and theirs.headers['ETag'] != etag
+
+    spanish = client.get(URL, headers={'Accept-Language': 'es', 'Accept-Encoding': 'identity',
+                                       'If-None-Match': etag})
+    assert spanish.status_code == 200 and spanish.headers['ETag'] != etag
+
+    gzipped = client.get(URL, headers={'Accept-Language': 'en', 'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert gzipped.status_code == 200 and gzipped.headers['ETag'] != etag
+    assert client.get(URL, headers={'Accept-Language': 'en', 'Accept-Encoding': 'identity',
+                                    'If-None-Match': etag}).status_code == 304
+
+    vary = {value.strip().lower() for value in english.headers['Vary'].split(',')}
+    assert {'accept-language', 'accept-encoding', 'cookie', 'authorization'} <= vary
+    assert english.headers['Cache-Control'] == 'private, no-cache'
+
+
+if __name__ == "__main__":
+    test_repeat_request_is_not_modified()
+    test_write_changes_etag()
+    test_etag_varies_by_user_language_and_encoding()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+AI Enrichment Queue Test Script
+Checks that report/mission creation returns before any AI work runs and that
+queued jobs fill the AI fields, retry on failure and can be polled
+"""
+
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app as civitas
+import enrichment
+from app import app, db
+from models import User, Report, Mission, EnrichmentJob
+
+
+def _client(email='enricher@civitas.test', role='rescuer'):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name='Enrichment Tester', role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def test_submission_does_not_wait_for_ai(monkeypatch):
+    """A slow summarizer must not slow down report submission"""
+    print("⏱️ Testing report submission latency...")
+    def slow_summary(text, max_length=100, style="concise"):
+        time.sleep(1.0)
+        return 'summary'
+    monkeypatch.setattr(civitas.ChromeNanoAPI, 'summarize_text', staticmethod(slow_summary))
+    client = _client()
+
+    started = time.perf_counter()
+    response = client.post('/api/reports', json={
+        'title': 'Bridge collapse', 'description': 'The north bridge collapsed.',
+        'location': 'North bridge', 'severity': 'critical'
+    })
+    elapsed = time.perf_counter() - started
+    body = response.get_json()
+    print(f"   Report accepted in {elapsed * 1000:.1f} ms")
+    assert response.status_code == 200
+    assert elapsed < 0.5
+    assert body['enrichment']['status'] == 'pending'
+
+    with app.app_context():
+        assert enrichment.run_pending_jobs() >= 1
+    status = client.get(f"/api/enrichment/{body['enrichment']['job_id']}").get_json()
+    assert status['status'] == 'done'
+    # Scored for triage when written: critical, plus the urgent word "collapse"
+    assert status['result'] == {'ai_summary': 'summary', 'ai_priority_score': pytest.approx(1.2)}
+    print("✅ Report enrichment runs in the background")
+
+
+def test_mission_enrichment_fills_strategy():
+    client = _client()
+    body = client.post('/api/missions', json={
+        'title': 'Evacuate school', 'description': 'Evacuate the flooded school.',
+        'location': 'Zone 3', 'priority': 'high'
+    }).get_json()
+    with app.app_context():
+        enrichment.run_pending_jobs()
+        mission = db.session.get(Mission, body['id'])
+        assert mission.ai_strategy
+        assert mission.ai_estimated_duration == civitas.MISSION_PRIORITY_DURATION['high']
+    print("✅ Mission enrichment fills strategy and duration")
+
+
+def test_failed_jobs_are_retried_then_failed(monkeypatch):
+    """Errors reschedule the job with backoff until MAX_ATTEMPTS"""
+    def broken(report):
+        raise RuntimeError('model unavailable')
+    monkeypatch.setitem(enrichment._handlers, 'report', broken)
+    client = _client()
+    body = client.post('/api/reports', json={
+        'title': 'Gas leak', 'description': 'Smell of gas on Main St.', 'location': 'Main St'
+    }).get_json()
+    job_id = body['enrichment']['job_id']
+
+    with app.app_context():
+        enrichment.run_pending_jobs()
+        job = db.session.get(EnrichmentJob, job_id)
+        assert job.status == 'pending' and job.attempts == 1
+        assert job.run_after > job.updated_at
+        assert 'model unavailable' in job.last_error
+
+        # Make the job due again until it runs out of attempts
+        for _ in range(enrichment.MAX_ATTEMPTS):
+            job.run_after = job.updated_at
+            db.session.commit()
+            enrichment.run_pending_jobs()
+            job = db.session.get(EnrichmentJob, job_id)
+        assert job.status == 'failed'
+        assert job.attempts == enrichment.MAX_ATTEMPTS
+        assert db.session.get(Report, body['id']).ai_summary is None
+    print("✅ Failing enrichment retried with backoff, then marked failed")
+
+
+if __name__ == "__main__":
+    print("Run with: python -m pytest test/test_enrichment.py")
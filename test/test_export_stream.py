@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Streamed Export Test Script
+Exports a large report table through /api/export as a JSON array and as
+NDJSON, checks both decode to every row, and compares peak memory against
+building the same list with jsonify
+"""
+
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import jsonify
+from werkzeug.security import generate_password_hash
+
+from app import app, db, REPORT_LIST
+from models import Report, User
+
+ROWS = 5000
+
+
+def _login(email, role):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            user = User(email=email, name=role.title(), role=role,
+                        password_hash=generate_password_hash('password123'))
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client, user_id
+
+
+def _seed(user_id):
+    with app.app_context():
+        existing = Report.query.filter_by(user_id=user_id).count()
+        start = datetime.utcnow() - timedelta(days=1)
+        if existing < ROWS:
+            db.session.execute(Report.__table__.insert(), [{
+                'title': f'Export {i}', 'description': 'Bridge collapsed, road closed. ' * 30,
+                'location': 'River crossing', 'severity': 'medium', 'status': 'pending', 'user_id': user_id,
+                'created_at': start + timedelta(seconds=i), 'updated_at': start + timedelta(seconds=i),
+            } for i in range(existing, ROWS)])
+            db.session.commit()
+        return Report.query.count()
+
+
+def _peak(consume):
+    tracemalloc.start()
+    consume()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_export_streams_every_row():
+    print("🌊 Streaming a full report export...")
+    client, user_id = _login('exporter@civitas.test', 'government')
+    total = _seed(user_id)
+
+    response = client.get('/api/export/report')
+    assert response.status_code == 200
+    assert response.is_streamed
+    items = json.loads(response.get_data())
+    assert len(items) == total
+    assert [item['id'] for item in items] == sorted(item['id'] for item in items)
+
+    response = client.get('/api/export/report?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == items
+    print(f"✅ {total} rows exported as a JSON array and as NDJSON")
+
+
+def test_export_memory_is_flat():
+    client, user_id = _login('exporter@civitas.test', 'government')
+    _seed(user_id)
+
+    def buffered():
+        with app.test_request_context():
+            rows = REPORT_LIST.query().order_by(Report.id).all()
+            jsonify(REPORT_LIST.dump(rows)).get_data()
+
+    def streamed():
+        response = client.get('/api/export/report', buffered=False)
+        for _ in response.response:
+            pass
+        response.close()
+
+    buffered_peak = _peak(buffered)
+    streamed_peak = _peak(streamed)
+    print(f"   jsonify: {buffered_peak / 1024:.0f} KiB peak, streamed: {streamed_peak / 1024:.0f} KiB peak")
+    assert streamed_peak * 3 < buffered_peak
+
+
+def test_export_requires_government():
+    client, _ = _login('export-citizen@civitas.test', 'citizen')
+    assert client.get('/api/export/report').status_code == 403
+    client, _ = _login('exporter@civitas.test', 'government')
+    assert client.get('/api/export/nothing').status_code == 404
+    assert client.get('/api/export/alert?format=xml').status_code == 400
+    assert json.loads(client.get('/api/export/alert').get_data()) is not None
+
+
+if __name__ == "__main__":
+    test_export_streams_every_row()
+    test_export_memory_is_flat()
+    test_export_requires_government()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Identity Cache Test Script
+Measures queries per authenticated request with and without the cached
+user loader and checks that user changes invalidate the cache
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from extensions import identity_cache, UserIdentity
+from models import User
+
+
+@contextmanager
+def counted_queries():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def _user_queries(statements):
+    return [s for s in statements if 'FROM user' in s.replace('"', '')]
+
+
+def _client():
+    with app.app_context():
+        if not User.query.filter_by(email='identity@civitas.test').first():
+            db.session.add(User(email='identity@civitas.test', name='Identity', role='citizen',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': 'identity@civitas.test', 'password': 'password123'})
+    return client
+
+
+def test_warm_requests_skip_user_query():
+    print("🪪 Measuring queries per request...")
+    client = _client()
+    identity_cache.clear()
+
+    with counted_queries() as cold:
+        assert client.get('/api/alerts').status_code == 200
+    with counted_queries() as warm:
+        assert client.get('/api/alerts?limit=5').status_code == 200
+
+    print(f"   Cold request: {len(cold)} queries ({len(_user_queries(cold))} for the user)")
+    print(f"   Cached identity: {len(warm)} queries ({len(_user_queries(warm))} for the user)")
+    assert len(_user_queries(cold)) == 1
+    assert _user_queries(warm) == []
+    assert len(warm) == len(cold) - 1
+    assert identity_cache.hits >= 1
+    print("✅ Cached identity saves the user SELECT on every request")
+
+
+def test_identity_is_detached():
+    client = _client()
+    client.get('/api/alerts')
+    with app.app_context():
+        user_id = User.query.filter_by(email='identity@civitas.test').first().id
+    identity = identity_cache.get(user_id, lambda _: None)
+    assert isinstance(identity, UserIdentity)
+    assert (identity.role, identity.is_active, identity.is_authenticated) == ('citizen', True, True)
+
+
+def test_user_change_invalidates():
+    client = _client()
+    client.get('/api/alerts')
+    with app.app_context():
+        user = User.query.filter_by(email='identity@civitas.test').first()
+        user.role = 'rescuer'
+        db.session.commit()
+        user_id = user.id
+    # The next request reloads and sees the new role at once
+    assert client.get('/api/missions').status_code == 200
+    assert identity_cache.get(user_id, lambda _: None).role == 'rescuer'
+
+    assert client.post('/api/user/language', json={'language': 'es'}).status_code == 200
+    assert identity_cache.get(user_id, lambda _: None) is None
+    client.get('/api/alerts')
+    assert identity_cache.get(user_id, lambda _: None).preferred_language == 'es'
+
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.role = 'citizen'
+        user.preferred_language = None
+        db.session.commit()
+    print("✅ User changes invalidate the cached identity")
+
+
+if __name__ == "__main__":
+    test_warm_requests_skip_user_query()
+    test_identity_is_detached()
+    test_user_change_invalidates()
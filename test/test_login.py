@@ -27,7 +27,7 @@ def test_user_login(email, password, role):
                 # Test API access
                 api_response = session.get('http://localhost:5000/api/reports')
                 if api_response.status_code == 200:
-                    reports = api_response.json()
+                    reports = api_response.json()['items']
                     print(f"✅ {role} API access successful ({len(reports)} reports)")
                 else:
                     print(f"❌ {role} API access failed (Status: {api_response.status_code})")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Safehouse Occupancy Test Script
+Checks atomic check-in/check-out against capacity, benchmarks concurrent
+intake desks against a read-modify-write baseline, and verifies
+availability is served without reading the safehouse table
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+import occupancy
+from app import app, db
+from models import Safehouse, User
+from spatial import safehouse_index
+
+DESKS = 8
+ARRIVALS_PER_DESK = 40
+
+
+@contextmanager
+def counted_queries():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def _login(email='intake@civitas.test', role='rescuer'):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name='Intake', role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def _safehouse(capacity, name='Intake shelter'):
+    with app.app_context():
+        safehouse = Safehouse(name=name, location='Harbour Road', capacity=capacity, current_occupancy=0)
+        db.session.add(safehouse)
+        db.session.commit()
+        return safehouse.id
+
+
+def _stored(safehouse_id):
+    with app.app_context():
+        db.session.expire_all()
+        safehouse = db.session.get(Safehouse, safehouse_id)
+        return safehouse.current_occupancy, safehouse.status
+
+
+def test_check_in_and_out():
+    client = _login()
+    safehouse_id = _safehouse(3)
+    url = f'/api/safehouses/{safehouse_id}'
+
+    assert client.post(f'{url}/check-in', json={'count': 2}).get_json()['availability'] == 1
+    response = client.post(f'{url}/check-in', json={'count': 2})
+    assert response.status_code == 409 and 'only 1 places left' in response.get_json()['error']
+    assert client.post(f'{url}/check-in').get_json()['status'] == 'full'
+    assert client.post(f'{url}/check-out').get_json()['status'] == 'operational'
+    assert client.post(f'{url}/check-out', json={'count': 5}).status_code == 409
+    assert client.post(f'{url}/check-in', json={'count': 0}).status_code == 400
+    assert client.post('/api/safehouses/999999/check-in').status_code == 404
+    assert _stored(safehouse_id) == (2, 'operational')
+
+    citizen = _login('evacuee@civitas.test', 'citizen')
+    assert citizen.post(f'{url}/check-in').status_code == 403
+
+
+def test_availability_served_from_index():
+    client = _login()
+    safehouse_id = _safehouse(50)
+    safehouse_index.reset()
+    assert client.get(f'/api/safehouses/{safehouse_id}/availability').get_json()['availability'] == 50
+    client.post(f'/api/safehouses/{safehouse_id}/check-in', json={'count': 5})
+
+    with counted_queries() as statements:
+        item = client.get(f'/api/safehouses/{safehouse_id}/availability').get_json()
+        summary = client.get('/api/safehouses/availability').get_json()
+    assert item['availability'] == 45
+    assert any(entry['id'] == safehouse_id and entry['availability'] == 45 for entry in summary['items'])
+    assert not [s for s in statements if 'FROM safehouse' in s.replace('"', '')]
+    print(f"   Availability after a local check-in: {len(statements)} queries, none on safehouse")
+
+
+def _desks(target):
+    errors = []
+
+    def desk():
+        with app.app_context():
+            for _ in range(ARRIVALS_PER_DESK):
+                try:
+                    target()
+                except occupancy.OccupancyConflict:
+                    pass
+                except Exception as e:  # database busy and the like
+                    errors.append(e)
+                    db.session.rollback()
+
+    threads = [threading.Thread(target=desk) for _ in range(DESKS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+def test_concurrent_check_ins_never_overbook():
+    print("🏠 Benchmarking concurrent intake desks...")
+    capacity = DESKS * ARRIVALS_PER_DESK // 2
+    safehouse_id = _safehouse(capacity, 'Contended shelter')
+    admitted = []
+
+    def atomic():
+        admitted.append(occupancy.check_in(safehouse_id))
+
+    elapsed, errors = _desks(atomic)
+    attempts = DESKS * ARRIVALS_PER_DESK
+    print(f"   Conditional UPDATE: {attempts} check-ins from {DESKS} desks in {elapsed * 1000:.0f} ms "
+          f"({attempts / elapsed:.0f}/s), {len(admitted)} admitted, {len(errors)} errors")
+    assert not errors
+    assert len(admitted) == capacity
+    assert _stored(safehouse_id) == (capacity, 'full')
+
+    naive_id = _safehouse(attempts, 'Read-modify-write shelter')
+    applied = []
+
+    def read_modify_write():
+        safehouse = db.session.get(Safehouse, naive_id)
+        db.session.refresh(safehouse)
+        occupied = safehouse.current_occupancy
+        time.sleep(0)  # let another desk read the same value
+        safehouse.current_occupancy = occupied + 1
+        db.session.commit()
+        applied.append(1)
+
+    elapsed, errors = _desks(read_modify_write)
+    stored, _ = _stored(naive_id)
+    print(f"   Read-modify-write: {len(applied)} commits in {elapsed * 1000:.0f} ms, "
+          f"stored occupancy {stored} ({len(applied) - stored} lost updates)")
+    print("✅ No lost updates and never above capacity")
+
+
+if __name__ == "__main__":
+    test_check_in_and_out()
+    test_availability_served_from_index()
+    test_concurrent_check_ins_never_overbook()
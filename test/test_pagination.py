@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Keyset Pagination Test Script
+Walks a list endpoint page by page where many rows share a created_at and
+checks every row comes back exactly once and in order, that limit is
+clamped and that malformed or tampered cursors are rejected
+"""
+
+import base64
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Report
+from pagination import MAX_PAGE_SIZE, encode_cursor
+
+ROWS = 37
+TIED = 6  # rows per created_at value
+
+
+def _client(email):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name='Pager', role='citizen',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+        user_id = User.query.filter_by(email=email).first().id
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client, user_id
+
+
+def _seed(user_id, count):
+    """count reports, TIED of them per created_at value; returns their ids in listing order"""
+    start = datetime(2024, 5, 1, 12, 0)
+    with app.app_context():
+        reports = [Report(title=f'Paged {i}', description='Keyset', location='Page Street', user_id=user_id,
+                          created_at=start + timedelta(minutes=i // TIED)) for i in range(count)]
+        db.session.add_all(reports)
+        db.session.commit()
+        return [report.id for report in sorted(reports, key=lambda report: (report.created_at, report.id),
+                                                 reverse=True)]
+
+
+def test_walk_pages_with_tied_created_at():
+    print("📄 Walking pages of tied rows...")
+    client, user_id = _client('pager@civitas.test')
+    expected = _seed(user_id, ROWS)
+
+    for limit in (1, 4, TIED, 10):
+        seen, after = [], None
+        while True:
+            url = f'/api/reports?limit={limit}' + (f'&after={after}' if after else '')
+            body = client.get(url).get_json()
+            assert len(body['items']) <= limit
+            seen += [item['id'] for item in body['items']]
+            after = body['next_cursor']
+            if after is None:
+                break
+        assert seen == expected, limit
+    print(f"✅ {ROWS} rows paged without duplicates or gaps at every page size")
+
+
+def test_limit_is_clamped():
+    client, user_id = _client('bulk-pager@civitas.test')
+    _seed(user_id, MAX_PAGE_SIZE + 5)
+    assert len(client.get('/api/reports?limit=0').get_json()['items']) == 1
+    assert len(client.get('/api/reports?limit=-3').get_json()['items']) == 1
+    assert len(client.get('/api/reports?limit=100000').get_json()['items']) == MAX_PAGE_SIZE
+    assert len(client.get('/api/reports?limit=many').get_json()['items']) == 50
+
+
+def test_bad_cursor_is_rejected():
+    client, _ = _client('pager@civitas.test')
+    valid = encode_cursor(datetime(2024, 5, 1, 12, 0), 7)
+    encode = lambda raw: base64.urlsafe_b64encode(raw).decode().rstrip('=')
+    for cursor in ['not a cursor', '%%%', encode(b'yesterday|7'), encode(b'2024-05-01T12:00:00|seven'),
+                   encode(b'2024-05-01T12:00:00'), encode(b'\xff\xfe|7'), valid[:-3], valid[:5] + '!' + valid[6:]]:
+        response = client.get(f'/api/reports?after={cursor}')
+        assert response.status_code == 400, cursor
+        assert 'invalid cursor' in response.get_json()['error']
+    assert client.get(f'/api/reports?after={valid}').status_code == 200
+
+
+if __name__ == "__main__":
+    test_walk_pages_with_tied_created_at()
+    test_limit_is_clamped()
+    test_bad_cursor_is_rejected()
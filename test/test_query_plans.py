@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Test Script
+Captures every SELECT issued by the API endpoints and checks its plan
+(EXPLAIN QUERY PLAN on SQLite, EXPLAIN on Postgres) for full table scans
+"""
+
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Report, Alert, Mission, Safehouse, Resource, Distribution
+
+# Any "SCAN <table>" (SQLite), with or without an index, or "Seq Scan on <table>"
+# (Postgres) reads the whole table, and SCAN ... USING COVERING INDEX reads all of
+# an index instead. Two exceptions: an unfiltered page walked in index order,
+# which stops at its LIMIT, and a COUNT/SUM over a covering index, which reads
+# the narrow index instead of the rows
+SQLITE_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\w+)(?: USING (COVERING )?INDEX \w+)?')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+ENDPOINTS = [
+    '/api/reports',
+    '/api/alerts',
+    '/api/missions',
+    '/api/safehouses',
+    '/api/resources',
+    '/api/dashboard/summary',
+    '/api/analytics?bucket=day&entity=report&days=7',
+    '/api/analytics?bucket=hour',
+    '/api/reports/triage?k=10',
+    '/api/distributions',
+    '/api/teams',
+    '/api/safehouses/nearest?lat=14.6&lon=121.0&k=3',
+    '/api/resources/nearest?lat=14.6&lon=121.0&k=3&category=water',
+]
+# Endpoints whose query is narrowed to the caller for citizens
+CITIZEN_ENDPOINTS = [
+    '/api/distributions',
+]
+
+
+@contextmanager
+def captured_selects():
+    """Collect (statement, parameters) of every SELECT run inside the block"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def full_scans(statement, parameters):
+    """Tables read with a full scan by the plan of one statement"""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            if connection.dialect.name == 'sqlite':
+                plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+                matches = [SQLITE_SCAN.match(row[-1]) for row in plan]
+                ordered_page = (not re.search(r'\bWHERE\b', statement)
+                                and re.search(r'\bORDER BY\b.*\bLIMIT\b', statement, re.S))
+                aggregate = re.search(r'\b(count|sum)\(', statement, re.I)
+                matches = [match for match in matches
+                           if match and not (ordered_page and 'INDEX' in match.group(0) and not match.group(2))
+                           and not (aggregate and match.group(2))]
+            else:
+                connection.exec_driver_sql('SET enable_seqscan = off')
+                plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+                matches = [POSTGRES_FULL_SCAN.search(row[0]) for row in plan]
+    return [match.group(1) for match in matches if match], plan
+
+
+def _seed():
+    with app.app_context():
+        user = User.query.filter_by(email='planner@civitas.test').first()
+        if user:
+            return
+        user = User(email='planner@civitas.test', name='Plan Checker', role='government',
+                    password_hash=generate_password_hash('password123'))
+        db.session.add(user)
+        db.session.flush()
+        for i in range(20):
+            db.session.add(Report(title=f'Report {i}', description='Flooding', location='Zone 1',
+                                  severity='high', user_id=user.id))
+            db.session.add(Alert(title=f'Alert {i}', message='Evacuate', severity='critical',
+                                 created_by=user.id))
+            db.session.add(Mission(title=f'Mission {i}', description='Rescue', location='Zone 1',
+                                   assigned_to=user.id, created_by=user.id))
+            db.session.add(Safehouse(name=f'Shelter {i}', location='Zone 2', capacity=100))
+            db.session.add(Resource(name=f'Water {i}', category='water', quantity=10, location='Depot'))
+        citizen = User(email='plan-recipient@civitas.test', name='Plan Recipient', role='citizen',
+                       password_hash=generate_password_hash('password123'))
+        db.session.add(citizen)
+        db.session.flush()
+        resource = Resource(name='Planned stock', category='water', quantity=100, location='Depot')
+        db.session.add(resource)
+        db.session.flush()
+        for i in range(20):
+            db.session.add(Distribution(resource_id=resource.id, recipient_id=(user.id, citizen.id)[i % 2],
+                                        quantity=1, location='Depot'))
+        db.session.commit()
+
+
+def _login(email):
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def test_api_queries_use_indexes():
+    """No API query may degrade to a full table scan"""
+    print("🔍 Checking API query plans...")
+    _seed()
+    client = _login('planner@civitas.test')
+    citizen = _login('plan-recipient@civitas.test')
+
+    # Follow-up requests exercise the cursor and delta-sync variants too
+    urls = list(ENDPOINTS)
+    for endpoint in ENDPOINTS[:5]:
+        first = client.get(endpoint + '?limit=5').get_json()
+        urls.append(f"{endpoint}?limit=5&after={first['next_cursor']}")
+        urls.append(f"{endpoint}?since={first['sync_token']}")
+    # The nearest lookups load their in-memory index once per process; after a
+    # write only the delta read runs per request, and that is what is checked
+    for url in ENDPOINTS[-2:]:
+        client.get(url)
+    with app.app_context():
+        Safehouse.query.first().current_occupancy += 1
+        Resource.query.first().quantity += 1
+        db.session.commit()
+
+    failures = []
+    with captured_selects() as statements:
+        for url in urls:
+            assert client.get(url).status_code == 200, url
+        for url in CITIZEN_ENDPOINTS:
+            assert citizen.get(url).status_code == 200, url
+
+    for statement, parameters in statements:
+        tables, plan = full_scans(statement, parameters)
+        if tables:
+            failures.append((tables, statement, plan))
+
+    for tables, statement, plan in failures:
+        print(f"❌ Full scan of {', '.join(tables)}:\n   {' '.join(statement.split())}")
+        for row in plan:
+            print(f"     {row}")
+    print(f"   {len(statements)} statements checked across {len(urls) + len(CITIZEN_ENDPOINTS)} requests")
+    assert not failures
+    print("✅ All API queries use indexes")
+
+
+if __name__ == "__main__":
+    test_api_queries_use_indexes()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+List Serialisation Test Script
+Compares CPU time and allocations of building a large report list from full
+ORM entities against the column-projected rows the list APIs now use, and
+checks the JSON provider produces the same documents as Flask's default
+"""
+
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.security import generate_password_hash
+
+from app import app, db, REPORT_LIST
+from models import Report, User
+
+ROWS = 2000
+
+
+def _user():
+    user = User.query.filter_by(email='serialise@civitas.test').first()
+    if user is None:
+        user = User(email='serialise@civitas.test', name='Serialise', role='citizen',
+                    password_hash=generate_password_hash('password123'))
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def _seed(user):
+    if Report.query.filter_by(user_id=user.id).count() >= ROWS:
+        return
+    start = datetime.utcnow() - timedelta(days=1)
+    db.session.execute(Report.__table__.insert(), [{
+        'title': f'Report {i}', 'description': 'Flooded street, water rising. ' * 40,
+        'location': f'Block {i % 50}', 'severity': 'high', 'status': 'pending', 'user_id': user.id,
+        'ai_summary': 'Flooding reported. ' * 20, 'created_at': start + timedelta(seconds=i),
+        'updated_at': start + timedelta(seconds=i),
+    } for i in range(ROWS)])
+    db.session.commit()
+
+
+def _orm_list(user_id):
+    return [{
+        'id': r.id,
+        'title': r.title,
+        'description': r.description,
+        'location': r.location,
+        'latitude': r.latitude,
+        'longitude': r.longitude,
+        'severity': r.severity,
+        'status': r.status,
+        'ai_summary': r.ai_summary,
+        'created_at': r.created_at.isoformat()
+    } for r in Report.query.filter_by(user_id=user_id).order_by(Report.id).all()]
+
+
+def _projected_list(user_id):
+    return REPORT_LIST.dump(REPORT_LIST.query(Report.user_id == user_id).order_by(Report.id).all())
+
+
+def _measure(build, user_id):
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.process_time()
+    items = build(user_id)
+    elapsed = time.process_time() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, elapsed, peak
+
+
+def test_projection_matches_and_is_cheaper():
+    print("📦 Building a large report list both ways...")
+    with app.app_context():
+        user = _user()
+        _seed(user)
+        orm_items, orm_time, orm_peak = _measure(_orm_list, user.id)
+        items, projected_time, projected_peak = _measure(_projected_list, user.id)
+
+    print(f"   ORM entities: {orm_time * 1000:.1f} ms CPU, {orm_peak / 1024:.0f} KiB peak")
+    print(f"   Projected rows: {projected_time * 1000:.1f} ms CPU, {projected_peak / 1024:.0f} KiB peak")
+    assert items == orm_items
+    assert projected_peak < orm_peak
+    assert projected_time < orm_time
+    print("✅ Projected rows give the same items with less CPU and memory")
+
+
+def test_json_provider_matches_default():
+    body = {'items': [{'id': 1, 'title': 'Flood', 'created_at': '2024-01-01T00:00:00'}],
+            'next_cursor': None, 'when': datetime(2024, 1, 1), 'counts': {2: 'b', 1: 'a'}}
+    with app.app_context():
+        default = DefaultJSONProvider(app)
+        assert json.loads(app.json.dumps(body)) == json.loads(default.dumps(body))
+        response = app.json.response(body)
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.get_data()) == json.loads(default.dumps(body))
+
+
+def test_list_api_shape():
+    with app.app_context():
+        _user()
+    client = app.test_client()
+    client.post('/login', data={'email': 'serialise@civitas.test', 'password': 'password123'})
+    for endpoint in ('/api/reports', '/api/alerts', '/api/missions', '/api/safehouses', '/api/resources'):
+        response = client.get(endpoint + '?limit=5')
+        assert response.status_code == 200
+        assert {'items', 'next_cursor', 'sync_token'} <= set(response.get_json())
+
+
+if __name__ == "__main__":
+    test_projection_matches_and_is_cheaper()
+    test_json_provider_matches_default()
+    test_list_api_shape()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Spatial Index Test Script
+Registers tens of thousands of safehouses, checks /api/safehouses/nearest
+against a brute-force scan and times lookups against the grid index
+"""
+
+import random
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from conditional import bump_versions
+from models import Safehouse, User
+from spatial import GridIndex, haversine_km, safehouse_index, resource_index
+
+SHELTERS = 20000
+CENTER = (40.7128, -74.0060)
+
+
+def _login():
+    with app.app_context():
+        if not User.query.filter_by(email='spatial@civitas.test').first():
+            db.session.add(User(email='spatial@civitas.test', name='Spatial', role='government',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': 'spatial@civitas.test', 'password': 'password123'})
+    return client
+
+
+def _seed_shelters():
+    with app.app_context():
+        if Safehouse.query.filter(Safehouse.name.like('Grid shelter %')).count() >= SHELTERS:
+            return
+        rng = random.Random(21)
+        rows = []
+        for i in range(SHELTERS):
+            capacity = rng.randint(20, 400)
+            rows.append({
+                'name': f'Grid shelter {i}', 'location': f'Sector {i % 97}',
+                'latitude': CENTER[0] + rng.uniform(-1.5, 1.5), 'longitude': CENTER[1] + rng.uniform(-1.5, 1.5),
+                'capacity': capacity, 'current_occupancy': rng.choice([capacity, rng.randint(0, capacity)]),
+                'status': 'operational',
+            })
+        connection = db.session.connection()
+        connection.execute(Safehouse.__table__.insert(), rows)
+        # Core inserts skip the flush hooks
+        bump_versions(connection, {Safehouse.__tablename__})
+        db.session.commit()
+
+
+def _brute_force(rows, latitude, longitude, k, min_free):
+    ranked = sorted((haversine_km(latitude, longitude, s.latitude, s.longitude), s.id) for s in rows
+                    if s.capacity - s.current_occupancy >= min_free)
+    return [row_id for _, row_id in ranked[:k]]
+
+
+def test_nearest_matches_brute_force():
+    print("🧭 Querying nearest safehouses with space...")
+    client = _login()
+    _seed_shelters()
+    safehouse_index.reset()
+    with app.app_context():
+        rows = db.session.query(Safehouse.id, Safehouse.latitude, Safehouse.longitude, Safehouse.capacity,
+                                Safehouse.current_occupancy) \
+            .filter(Safehouse.latitude.isnot(None), Safehouse.status != 'closed').all()
+
+    rng = random.Random(7)
+    timings = []
+    for _ in range(20):
+        latitude, longitude = CENTER[0] + rng.uniform(-1, 1), CENTER[1] + rng.uniform(-1, 1)
+        started = time.perf_counter()
+        response = client.get(f'/api/safehouses/nearest?lat={latitude}&lon={longitude}&k=5&min_free=50')
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        items = response.get_json()['items']
+        assert all(item['availability'] >= 50 for item in items)
+        assert [item['distance_km'] for item in items] == sorted(item['distance_km'] for item in items)
+        assert [item['id'] for item in items] == _brute_force(rows, latitude, longitude, 5, 50)
+
+    warm = sorted(timings[1:])[len(timings) // 2]
+    print(f"   First request (index load): {timings[0] * 1000:.1f} ms, median after: {warm * 1000:.2f} ms")
+    assert warm < 0.05
+    print("✅ Grid index agrees with a full scan")
+
+
+def test_index_follows_writes():
+    client = _login()
+    safehouse_index.reset()
+    response = client.post('/api/safehouses', json={'name': 'Pier shelter', 'location': 'Pier 1',
+                                                    'capacity': 10, 'latitude': -33.8568, 'longitude': 151.2153})
+    shelter_id = response.get_json()['id']
+    items = client.get('/api/safehouses/nearest?lat=-33.85&lon=151.21&k=1').get_json()['items']
+    assert items[0]['id'] == shelter_id and items[0]['availability'] == 10
+
+    with app.app_context():
+        shelter = db.session.get(Safehouse, shelter_id)
+        shelter.current_occupancy = 10
+        db.session.commit()
+    items = client.get('/api/safehouses/nearest?lat=-33.85&lon=151.21&k=1&max_km=50').get_json()['items']
+    assert items == []
+
+    with app.app_context():
+        db.session.delete(db.session.get(Safehouse, shelter_id))
+        db.session.commit()
+    items = client.get('/api/safehouses/nearest?lat=-33.85&lon=151.21&k=1&min_free=0&max_km=50').get_json()['items']
+    assert items == []
+
+
+def test_nearest_resources():
+    client = _login()
+    resource_index.reset()
+    client.post('/api/resources', json={'name': 'Water cache', 'category': 'water', 'quantity': 40,
+                                        'location': 'Depot', 'latitude': 51.5072, 'longitude': -0.1276})
+    client.post('/api/resources', json={'name': 'Med cache', 'category': 'medical', 'quantity': 5,
+                                        'location': 'Clinic', 'latitude': 51.5080, 'longitude': -0.1280})
+    items = client.get('/api/resources/nearest?lat=51.5&lon=-0.12&category=water&max_km=20').get_json()['items']
+    assert [item['name'] for item in items] == ['Water cache']
+
+
+def test_invalid_coordinates():
+    client = _login()
+    assert client.get('/api/safehouses/nearest?lat=100&lon=0').status_code == 400
+    assert client.get('/api/safehouses/nearest?lat=abc&lon=0').status_code == 400
+    assert client.post('/api/safehouses', json={'name': 'x', 'location': 'y', 'capacity': 1,
+                                                'latitude': 10}).status_code == 400
+
+
+def test_grid_index_moves_records():
+    grid = GridIndex()
+    grid.upsert({'id': 1, 'latitude': 0.01, 'longitude': 0.01})
+    grid.upsert({'id': 1, 'latitude': 10.01, 'longitude': 10.01})
+    assert len(grid) == 1
+    assert grid.nearest(10, 10, 1)[0][1]['id'] == 1
+    grid.upsert({'id': 1, 'latitude': None, 'longitude': None})
+    assert len(grid) == 0
+
+
+
+def test_sparse_grid_stops_early():
+    """Fewer matches than k, far-flung records: the search ends without walking every empty ring"""
+    grid = GridIndex()
+    rng = random.Random(21)
+    records = [{'id': i, 'latitude': rng.uniform(-1, 1), 'longitude': rng.uniform(-1, 1), 'free': i % 10}
+               for i in range(200)]
+    records.append({'id': 999, 'latitude': 80.0, 'longitude': 170.0, 'free': 9})
+    for record in records:
+        grid.upsert(record)
+
+    roomy = lambda record: record['free'] == 9
+    started = time.perf_counter()
+    found = grid.nearest(0, 0, 50, roomy)
+    elapsed = time.perf_counter() - started
+    expected = sorted((haversine_km(0, 0, r['latitude'], r['longitude']), r['id']) for r in records if roomy(r))
+    assert [record['id'] for _, record in found] == [record_id for _, record_id in expected]
+    assert grid.nearest(0, 0, 5, lambda record: False) == []
+    assert elapsed < 0.05
+
+
+if __name__ == "__main__":
+    test_nearest_matches_brute_force()
+    test_index_follows_writes()
+    test_nearest_resources()
+    test_invalid_coordinates()
+    test_grid_index_moves_records()
+    test_sparse_grid_stops_early()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Strategy Template Test Script
+Checks template selection and fallbacks of generate_prompt and that
+operators can add task types and roles from a JSON file
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import strategies
+
+
+def test_selected_template_is_filled():
+    text = strategies.render('the flooded school', 'evacuation', 'coordinator')
+    assert text.startswith('EVACUATION STRATEGY for the flooded school:\n\n1. THREAT ASSESSMENT')
+    assert '{context}' not in text
+    responder = strategies.render('Zone 3', 'rescue', 'responder')
+    assert responder.startswith('FIELD RESCUE OPERATIONS for Zone 3:')
+    print("✅ Only the selected template is rendered")
+
+
+def test_fallbacks():
+    # Unknown role -> coordinator of that task type; unknown task type -> generic
+    assert strategies.render('Zone 3', 'distribution', 'volunteer') == \
+        strategies.render('Zone 3', 'distribution', 'coordinator')
+    assert strategies.render('Zone 3', 'wildfire', 'responder').startswith(
+        'EMERGENCY RESPONSE STRATEGY for Zone 3:')
+    # Context text is inserted verbatim, never interpreted as a template
+    assert strategies.render('{role} {0}', 'rescue').startswith('RESCUE COORDINATION STRATEGY for {role} {0}:')
+    print("✅ Role and task type fallbacks")
+
+
+def test_operator_overrides():
+    path = os.path.join(tempfile.mkdtemp(), 'strategies.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'wildfire': {'coordinator': 'WILDFIRE PLAN for {context}: cut firebreaks around {context}.'},
+            'rescue': {'medic': 'TRIAGE for {context}'},
+        }, f)
+    compiled = strategies.load_strategies(override_path=path)
+    assert strategies.render('Ridge', 'wildfire', strategies=compiled) == \
+        'WILDFIRE PLAN for Ridge: cut firebreaks around Ridge.'
+    assert strategies.render('Camp', 'rescue', 'medic', strategies=compiled) == 'TRIAGE for Camp'
+    assert strategies.render('Camp', 'rescue', 'responder', strategies=compiled) == \
+        strategies.render('Camp', 'rescue', 'responder')
+    print("✅ Task types and roles added from configuration")
+
+
+def test_render_speed():
+    rounds = 10000
+    started = time.perf_counter()
+    for i in range(rounds):
+        strategies.render(f'Mission {i}', 'rescue', 'coordinator')
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"   {elapsed * 1e6:.2f} µs per strategy")
+    assert elapsed < 100e-6
+
+
+if __name__ == "__main__":
+    test_selected_template_is_filled()
+    test_fallbacks()
+    test_operator_overrides()
+    test_render_speed()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Live Event Stream Test Script
+Checks that /api/stream pushes committed alerts, mission status changes and
+safehouse occupancy, filters missions per user and resumes from Last-Event-ID
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Mission, Safehouse, StreamEvent
+
+_reader = ThreadPoolExecutor(max_workers=4)
+
+
+def _client(email, role):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name=email.split('@')[0], role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client
+
+
+def _user_id(email):
+    with app.app_context():
+        return User.query.filter_by(email=email).first().id
+
+
+def _next_event(chunks, timeout=5):
+    """Next non-keepalive chunk of a stream, failing instead of hanging"""
+    while True:
+        chunk = _reader.submit(next, chunks).result(timeout=timeout)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if not chunk.startswith(':'):
+            return chunk
+
+
+def _open(client, **kwargs):
+    response = client.get('/api/stream', **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert _next_event(chunks).startswith('retry:')
+    return response, chunks
+
+
+def test_new_alert_is_pushed():
+    print("📡 Testing live alert push...")
+    coordinator = _client('streamer@civitas.test', 'government')
+    citizen = _client('listener@civitas.test', 'citizen')
+    response, chunks = _open(citizen)
+    coordinator.post('/api/alerts', json={'title': 'Levee breach', 'message': 'Move to high ground'})
+    chunk = _next_event(chunks)
+    assert 'event: alert\n' in chunk and 'Levee breach' in chunk and '"action": "created"' in chunk
+    response.close()
+    print("✅ New alert pushed to an open stream")
+
+
+def test_mission_events_are_filtered_per_user():
+    coordinator = _client('streamer@civitas.test', 'government')
+    rescuer = _client('rescuer-stream@civitas.test', 'rescuer')
+    other = _client('other-stream@civitas.test', 'rescuer')
+    response, chunks = _open(rescuer, query_string={'channels': 'mission'})
+    other_response, other_chunks = _open(other, query_string={'channels': 'mission,alert'})
+
+    mission_id = coordinator.post('/api/missions', json={
+        'title': 'Evacuate clinic', 'description': 'Move patients', 'location': 'Zone 4',
+        'assigned_to': _user_id('rescuer-stream@civitas.test')
+    }).get_json()['id']
+    assert 'Evacuate clinic' in _next_event(chunks)
+
+    with app.app_context():
+        db.session.get(Mission, mission_id).status = 'completed'
+        db.session.commit()
+    chunk = _next_event(chunks)
+    assert '"action": "updated"' in chunk and '"status": "completed"' in chunk
+
+    # The other rescuer sees the next alert, but neither mission event before it
+    coordinator.post('/api/alerts', json={'title': 'Curfew', 'message': 'Stay indoors'})
+    assert 'Curfew' in _next_event(other_chunks)
+
+    # Reassigned: the previous assignee is told too, so their tab can drop it
+    with app.app_context():
+        db.session.get(Mission, mission_id).assigned_to = _user_id('other-stream@civitas.test')
+        db.session.commit()
+    for stream in (chunks, other_chunks):
+        chunk = _next_event(stream)
+        assert f'"previous_assigned_to": {_user_id("rescuer-stream@civitas.test")}' in chunk
+    response.close()
+    other_response.close()
+    print("✅ Mission events only reach the assignee and coordinators")
+
+
+def test_resume_from_last_event_id():
+    citizen = _client('listener@civitas.test', 'citizen')
+    with app.app_context():
+        last_id = db.session.query(db.func.max(StreamEvent.id)).scalar() or 0
+        shelter = Safehouse(name='Gym', location='Zone 2', capacity=50)
+        db.session.add(shelter)
+        db.session.commit()
+        shelter.current_occupancy = 12
+        db.session.commit()
+        shelter.facilities = 'water'  # not streamed
+        db.session.commit()
+
+    response, chunks = _open(citizen, headers={'Last-Event-ID': str(last_id)})
+    created, updated = _next_event(chunks), _next_event(chunks)
+    assert f'id: {last_id + 1}\n' in created and '"action": "created"' in created
+    assert '"current_occupancy": 12' in updated
+    response.close()
+    print("✅ Missed events replayed after Last-Event-ID")
+
+
+def test_invalid_parameters():
+    citizen = _client('listener@civitas.test', 'citizen')
+    assert citizen.get('/api/stream?channels=weather').status_code == 400
+    assert citizen.get('/api/stream', headers={'Last-Event-ID': 'abc'}).status_code == 400
+
+
+if __name__ == "__main__":
+    test_new_alert_is_pushed()
+    test_mission_events_are_filtered_per_user()
+    test_resume_from_last_event_id()
+    test_invalid_parameters()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Delta Sync Test Script
+Checks that a mission moved to another user, or unassigned, is sent to the
+previous assignee as deleted on their next delta sync, while deletions still
+reach everyone
+"""
+
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User, Mission, Tombstone
+from sync import SYNC_TOKEN_MAX_AGE, _serializer, prune_tombstones
+
+
+def _client(email, role='rescuer'):
+    with app.app_context():
+        if not User.query.filter_by(email=email).first():
+            db.session.add(User(email=email, name=email.split('@')[0], role=role,
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+        user_id = User.query.filter_by(email=email).first().id
+    client = app.test_client()
+    client.post('/login', data={'email': email, 'password': 'password123'})
+    return client, user_id
+
+
+def _delta(client, token):
+    body = client.get(f'/api/missions?since={token}').get_json()
+    return [item['id'] for item in body['items']], body['deleted']
+
+
+def _assign(mission_id, user_id):
+    with app.app_context():
+        db.session.get(Mission, mission_id).assigned_to = user_id
+        db.session.commit()
+
+
+def test_reassigned_mission_leaves_previous_assignee():
+    print("🔁 Testing delta sync after reassignment...")
+    dispatcher, _ = _client('sync-dispatch@civitas.test', 'government')
+    first, first_id = _client('sync-first@civitas.test')
+    second, second_id = _client('sync-second@civitas.test')
+    mission_id = dispatcher.post('/api/missions', json={
+        'title': 'Check levee', 'description': 'Walk the levee', 'location': 'River road',
+        'assigned_to': first_id,
+    }).get_json()['id']
+    first_token = first.get('/api/missions').get_json()['sync_token']
+    second_token = second.get('/api/missions').get_json()['sync_token']
+
+    _assign(mission_id, second_id)
+    items, deleted = _delta(first, first_token)
+    assert mission_id not in items and mission_id in deleted
+    items, deleted = _delta(second, second_token)
+    assert mission_id in items and mission_id not in deleted
+
+    # Handed back: the first assignee gets the row again, not a deletion
+    _assign(mission_id, first_id)
+    items, deleted = _delta(first, first_token)
+    assert mission_id in items and mission_id not in deleted
+    items, deleted = _delta(second, second_token)
+    assert mission_id in deleted
+
+    # Unassigned: gone from the first assignee's listing too
+    _assign(mission_id, None)
+    items, deleted = _delta(first, first_token)
+    assert mission_id not in items and mission_id in deleted
+    print("✅ Reassigned missions are removed from the previous assignee's cache")
+
+
+def test_deleted_mission_reaches_everyone():
+    dispatcher, dispatcher_id = _client('sync-dispatch@civitas.test', 'government')
+    outsider, _ = _client('sync-outsider@civitas.test')
+    mission_id = dispatcher.post('/api/missions', json={
+        'title': 'Sandbags', 'description': 'Fill sandbags', 'location': 'Depot', 'assigned_to': dispatcher_id,
+    }).get_json()['id']
+    token = outsider.get('/api/missions').get_json()['sync_token']
+    with app.app_context():
+        db.session.delete(db.session.get(Mission, mission_id))
+        db.session.commit()
+    assert mission_id in _delta(outsider, token)[1]
+
+
+
+def test_expired_token_and_old_tombstones():
+    client, _ = _client('sync-outsider@civitas.test')
+    with app.app_context():
+        expired = _serializer().dumps((datetime.utcnow() - SYNC_TOKEN_MAX_AGE - timedelta(hours=1)).isoformat())
+        recent = _serializer().dumps((datetime.utcnow() - SYNC_TOKEN_MAX_AGE + timedelta(hours=1)).isoformat())
+    response = client.get(f'/api/missions?since={expired}')
+    assert response.status_code == 400 and 'expired' in response.get_json()['error']
+    assert client.get(f'/api/missions?since={recent}').status_code == 200
+
+    with app.app_context():
+        old = Tombstone(entity='mission', entity_id=424242,
+                        deleted_at=datetime.utcnow() - SYNC_TOKEN_MAX_AGE - timedelta(days=1))
+        kept = Tombstone(entity='mission', entity_id=434343, deleted_at=datetime.utcnow() - timedelta(days=1))
+        db.session.add_all([old, kept])
+        db.session.commit()
+        old_id, kept_id = old.id, kept.id
+        assert prune_tombstones() >= 1
+        assert db.session.get(Tombstone, old_id) is None
+        assert db.session.get(Tombstone, kept_id) is not None
+
+
+if __name__ == "__main__":
+    test_reassigned_mission_leaves_previous_assignee()
+    test_deleted_mission_reaches_everyone()
+    test_expired_token_and_old_tombstones()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Text Pipeline Test Script
+Checks the proofread/rewrite stages against the per-call implementation
+they replaced and benchmarks the single-pass rewrite
+"""
+
+import re
+import time
+
+from werkzeug.security import generate_password_hash
+
+import text_pipeline
+from app import app, db
+from models import User, Alert
+
+MESSAGE = ("  urgent:   the bridge is broken and we need help quickly.  "
+           "don't cross it, we can't reach the Help desk ASAP  ")
+ALERT = ("Urgent: flood waters are rising on Main Street. Residents need to move to higher "
+         "ground quickly and avoid the river bridge.")
+
+
+def legacy_rewrite(text, tone='professional'):
+    """rewrite_text before the pipeline: one replace per entry and casing"""
+    rewritten = text
+    for old, new in text_pipeline.EMERGENCY_VOCABULARY.items():
+        rewritten = rewritten.replace(old, new)
+        rewritten = rewritten.replace(old.title(), new.title())
+        rewritten = rewritten.replace(old.upper(), new.upper())
+    if tone == 'professional':
+        for old, new in text_pipeline.CONTRACTIONS.items():
+            rewritten = rewritten.replace(old, new)
+    return rewritten
+
+
+def legacy_proofread(text, style='formal'):
+    cleaned = re.sub(r'\s+', ' ', text.strip())
+    if style == 'formal':
+        cleaned = re.sub(r'(?:^|[.!?])\s*([a-z])', lambda m: m.group(0).upper(), cleaned)
+        if cleaned and not cleaned[-1] in '.!?':
+            cleaned += '.'
+    return cleaned
+
+
+def test_matches_previous_output():
+    for style in ('formal', 'casual'):
+        assert text_pipeline.proofread(MESSAGE, style) == legacy_proofread(MESSAGE, style)
+    for tone in ('professional', 'casual'):
+        assert text_pipeline.rewrite(MESSAGE, tone) == legacy_rewrite(MESSAGE, tone)
+    print("✅ Pipeline output matches the previous implementation")
+
+
+def test_rewrite_respects_word_boundaries():
+    assert text_pipeline.rewrite('Helpful badges, HELP!') == 'Helpful badges, ASSISTANCE!'
+    assert text_pipeline.rewrite("Can't, WON'T") == "Cannot, WILL NOT"
+    print("✅ Only whole words are rewritten, casing kept")
+
+
+def test_alert_publishing_uses_pipeline():
+    with app.app_context():
+        if not User.query.filter_by(email='alerter@civitas.test').first():
+            db.session.add(User(email='alerter@civitas.test', name='Alert Author', role='government',
+                                password_hash=generate_password_hash('password123')))
+            db.session.commit()
+    client = app.test_client()
+    client.post('/login', data={'email': 'alerter@civitas.test', 'password': 'password123'})
+    body = client.post('/api/alerts', json={'title': 'Bridge', 'message': "Urgent: don't cross"}).get_json()
+    assert body['rewritten_message'] == 'Critical: do not cross'
+    with app.app_context():
+        assert db.session.get(Alert, body['id']).rewritten_message == 'Critical: do not cross'
+    print("✅ Alerts rewritten by the shared pipeline")
+
+
+def test_rewrite_throughput():
+    """One pass beats one replace per entry and casing as the vocabulary grows"""
+    vocabulary = dict(text_pipeline.EMERGENCY_VOCABULARY)
+    vocabulary.update({f'term{i}': f'phrase {i}' for i in range(300)})
+    stage = text_pipeline.Replace(vocabulary)
+    rounds = 2000
+
+    def legacy(text):
+        for old, new in vocabulary.items():
+            text = text.replace(old, new).replace(old.title(), new.title()).replace(old.upper(), new.upper())
+        return text
+
+    for label, rewrite, other in (('current vocabulary', text_pipeline.rewrite, legacy_rewrite),
+                                  (f'{len(vocabulary)} entries', stage, legacy)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            other(ALERT)
+        before = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            rewrite(ALERT)
+        after = time.perf_counter() - started
+        print(f"   {label}: {rounds / before:,.0f} -> {rounds / after:,.0f} messages/s")
+    assert after < before
+    print("✅ Single-pass rewrite scales with vocabulary size")
+
+
+def main():
+    print("✏️ Testing text pipeline...")
+    test_matches_previous_output()
+    test_rewrite_respects_word_boundaries()
+    test_alert_publishing_uses_pipeline()
+    test_rewrite_throughput()
+
+
+if __name__ == "__main__":
+    main()
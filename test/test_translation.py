@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Translation Engine Test Script
+Checks word-boundary, phrase and case handling of the phrase translator and
+benchmarks it against the old one-str.replace-per-entry loop
+"""
+
+import json
+import os
+import time
+
+from translation import TRANSLATIONS_DIR, PhraseTranslator, load_translators, translate
+
+SAMPLE = ("Emergency: flood waters rising near the fire station. Follow the evacuation route "
+          "to the nearest shelter, give first aid if you can and stay calm. ")
+
+
+def legacy_translate(text, phrases):
+    """The loop translate_text used before the trie engine"""
+    translated = text.lower()
+    for en_word, translated_word in phrases.items():
+        translated = translated.replace(en_word, translated_word)
+    return translated
+
+
+def test_whole_words_only():
+    assert translate('The fireman fought the fire', 'es') == 'The fireman fought the fuego'
+    assert translate('Helpful helpers help', 'fr') == 'Helpful helpers aide'
+    print("✅ Substrings of longer words are left alone")
+
+
+def test_longest_phrase_wins():
+    assert translate('Take the evacuation route now', 'es') == 'Take the ruta de evacuación now'
+    assert translate('Evacuation, route 9', 'es') == 'Evacuación, route 9'
+    assert translate('Evacuation   route', 'fr') == "Itinéraire d'évacuation"
+    print("✅ Multi-word phrases matched across whitespace only")
+
+
+def test_case_is_preserved():
+    assert translate('FIRE! Fire! fire!', 'es') == 'FUEGO! Fuego! fuego!'
+    assert translate('Stay calm and call for help', 'fr') == 'Restez calme and call for aide'
+    print("✅ Source capitalisation carried over")
+
+
+def test_unknown_language_returns_text():
+    assert translate('Flood warning', 'xx') == 'Flood warning'
+    assert {'es', 'fr'} <= set(load_translators())
+
+
+def test_throughput_against_legacy_loop():
+    """Thousands of entries: one pass must beat one replace per entry"""
+    with open(os.path.join(TRANSLATIONS_DIR, 'es.json'), encoding='utf-8') as f:
+        phrases = json.load(f)
+    phrases.update({f'term{i:05d}': f'termino{i:05d}' for i in range(5000)})
+    translator = PhraseTranslator(phrases)
+    text = SAMPLE * 20
+    rounds = 50
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        legacy_translate(text, phrases)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        translator.translate(text)
+    compiled = time.perf_counter() - started
+
+    words = len(text.split()) * rounds
+    print(f"   Dictionary: {translator.size} entries, {words} words translated")
+    print(f"   Legacy loop: {words / legacy:,.0f} words/s")
+    print(f"   Trie engine: {words / compiled:,.0f} words/s ({legacy / compiled:.1f}x)")
+    assert compiled < legacy
+    print("✅ Trie engine faster than the replace loop")
+
+
+def main():
+    print("🌐 Testing translation engine...")
+    test_whole_words_only()
+    test_longest_phrase_wins()
+    test_case_is_preserved()
+    test_unknown_language_returns_text()
+    test_throughput_against_legacy_loop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Text pipeline
+Proofreading and rewriting are built from small stages whose regexes are
+compiled once at import. Word replacements for a whole vocabulary (in its
+lower, Title and UPPER forms) are folded into one alternation, so each
+rewrite is a single pass over the text however many entries there are.
+Shared by /api/ai/proofread, /api/ai/rewrite and alert publishing.
+"""
+
+import re
+
+# Plain-language rewrites for emergency messages
+EMERGENCY_VOCABULARY = {
+    'urgent': 'critical',
+    'help': 'assistance',
+    'problem': 'emergency situation',
+    'bad': 'concerning',
+    'need': 'require',
+    'quickly': 'immediately',
+    'ASAP': 'immediately',
+    'broken': 'damaged',
+}
+
+CONTRACTIONS = {
+    "can't": 'cannot',
+    "won't": 'will not',
+    "don't": 'do not',
+}
+
+WHITESPACE = re.compile(r'\s+')
+SENTENCE_START = re.compile(r'(?:^|[.!?])\s*[a-z]')
+
+
+def _trie_pattern(words):
+    """Regex alternation of words factored by common prefix, so matching a
+    position costs one branch per character instead of one per word"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+def _capitalise(word):
+    return word[:1].upper() + word[1:].lower()
+
+
+class Replace:
+    """Stage replacing whole words from a mapping in a single pass"""
+
+    def __init__(self, mapping):
+        self.mapping = {}
+        for old, new in mapping.items():
+            # Casings handled: as given, Capitalised, UPPER
+            for variant_old, variant_new in ((old.upper(), new.upper()), (_capitalise(old), _capitalise(new)),
+                                             (old, new)):
+                self.mapping[variant_old] = variant_new
+        self.pattern = re.compile(r'\b' + _trie_pattern(self.mapping) + r'\b')
+
+    def __call__(self, text):
+        return self.pattern.sub(lambda m: self.mapping[m.group()], text)
+
+
+def normalise_whitespace(text):
+    return WHITESPACE.sub(' ', text.strip())
+
+
+def capitalise_sentences(text):
+    return SENTENCE_START.sub(lambda m: m.group().upper(), text)
+
+
+def terminate_sentence(text):
+    if text and text[-1] not in '.!?':
+        return text + '.'
+    return text
+
+
+class Pipeline:
+    """Stages applied left to right"""
+
+    def __init__(self, *stages):
+        self.stages = stages
+
+    def __call__(self, text):
+        for stage in self.stages:
+            text = stage(text)
+        return text
+
+
+PROOFREAD = {
+    'formal': Pipeline(normalise_whitespace, capitalise_sentences, terminate_sentence),
+}
+PROOFREAD_DEFAULT = Pipeline(normalise_whitespace)
+
+REWRITE = {
+    'professional': Pipeline(Replace({**EMERGENCY_VOCABULARY, **CONTRACTIONS})),
+}
+REWRITE_DEFAULT = Pipeline(Replace(EMERGENCY_VOCABULARY))
+
+
+def proofread(text, style='formal'):
+    """Normalise whitespace and, for formal style, sentence case and punctuation"""
+    return PROOFREAD.get(style, PROOFREAD_DEFAULT)(text)
+
+
+def rewrite(text, tone='professional'):
+    """Plain-language vocabulary, plus expanded contractions for a professional tone"""
+    return REWRITE.get(tone, REWRITE_DEFAULT)(text)
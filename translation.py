@@ -0,0 +1,100 @@
+"""
+Phrase translation
+Emergency phrase dictionaries are loaded from data/translations/<lang>.json
+once and compiled into a word trie per language. Text is translated in a
+single left-to-right pass that always takes the longest phrase starting at
+each word, only matches whole words (so "fireman" is left alone) and keeps
+the capitalisation of the source.
+"""
+
+import json
+import os
+import re
+
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'translations')
+
+# Words may carry inner apostrophes or hyphens ("don't", "built-in")
+WORD = re.compile(r"\w+(?:['’-]\w+)*")
+
+_END = object()  # trie key marking the end of a phrase
+
+
+def _match_case(source, translated):
+    if source.isupper() and len(source) > 1:
+        return translated.upper()
+    if source[:1].isupper():
+        return translated[:1].upper() + translated[1:]
+    return translated
+
+
+class PhraseTranslator:
+    """Single-pass, word-boundary phrase translator for one language"""
+
+    def __init__(self, phrases):
+        self.trie = {}
+        self.size = 0
+        for source, translated in phrases.items():
+            words = [word.lower() for word in WORD.findall(source)]
+            if not words:
+                continue
+            node = self.trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[_END] = translated
+            self.size += 1
+
+    def translate(self, text):
+        words = list(WORD.finditer(text))
+        pieces = []
+        position = 0
+        index = 0
+        while index < len(words):
+            node = self.trie
+            match = None
+            cursor = index
+            while cursor < len(words):
+                # Phrases only span words separated by whitespace
+                if cursor > index and text[words[cursor - 1].end():words[cursor].start()].strip():
+                    break
+                node = node.get(words[cursor].group().lower())
+                if node is None:
+                    break
+                cursor += 1
+                if _END in node:
+                    match = (cursor, node[_END])
+
+            if match is None:
+                index += 1
+                continue
+            end_index, translated = match
+            start, end = words[index].start(), words[end_index - 1].end()
+            pieces.append(text[position:start])
+            pieces.append(_match_case(text[start:end], translated))
+            position = end
+            index = end_index
+
+        pieces.append(text[position:])
+        return ''.join(pieces)
+
+
+def load_translators(directory=TRANSLATIONS_DIR):
+    """Compile every <lang>.json dictionary in directory"""
+    translators = {}
+    if not os.path.isdir(directory):
+        return translators
+    for name in sorted(os.listdir(directory)):
+        language, extension = os.path.splitext(name)
+        if extension != '.json':
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            translators[language] = PhraseTranslator(json.load(f))
+    return translators
+
+
+TRANSLATORS = load_translators()
+
+
+def translate(text, target_language):
+    """Translate text, or return it unchanged when no dictionary exists"""
+    translator = TRANSLATORS.get(target_language)
+    return translator.translate(text) if translator else text
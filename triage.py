@@ -0,0 +1,224 @@
+"""
+Report triage
+Reports are scored when they are written, never when read. Each batch is
+scored at once over NumPy arrays from severity, urgent words in the title
+and description, the number of other open reports within CLUSTER_KM (many
+reports close together are one big incident) and closeness to an open
+safehouse, where vulnerable evacuees are gathered. Open reports near a
+changed one are re-scored in the same pass, since their cluster changed.
+
+Waiting raises priority by AGE_PER_HOUR per hour. Every report ages at the
+same rate, so ordering by score + AGE_PER_HOUR * age is the same as ordering
+by triage_key = score - AGE_PER_HOUR * hours since TRIAGE_EPOCH, which never
+needs updating; the triage queue reads the top of the (status, triage_key)
+index. Allocation ages needs with the same AGE_PER_HOUR, so both rank alike.
+"""
+
+import math
+import re
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import bindparam, event, inspect, select, update
+
+from allocation import SEVERITY_PRIORITY, AGE_PER_HOUR
+from conditional import bump_versions
+from models import db, Report
+from spatial import KM_PER_DEGREE, haversine_matrix, safehouse_index
+
+OPEN_STATUSES = ('pending', 'verified')  # reports that count towards a cluster
+QUEUE_STATUS = 'pending'  # reports in the triage queue
+SCORE_INPUTS = ('severity', 'title', 'description', 'status', 'latitude', 'longitude')
+
+URGENT_KEYWORDS = {
+    'not breathing': 0.4, 'unconscious': 0.3, 'trapped': 0.3, 'drown': 0.3, 'bleeding': 0.25,
+    'injur': 0.2, 'fire': 0.2, 'collapse': 0.2, 'child': 0.15, 'elderly': 0.15, 'pregnan': 0.15,
+    'disabled': 0.15, 'rising': 0.1,
+}
+KEYWORD_CAP = 0.5
+_URGENT = re.compile('|'.join(map(re.escape, URGENT_KEYWORDS)))
+
+CLUSTER_KM = 1.0
+CLUSTER_CAP = 20  # other reports nearby at which the cluster bonus is full
+CLUSTER_WEIGHT = 0.5
+SITE_KM = 5.0  # safehouses further away add nothing
+SITE_WEIGHT = 0.25
+TRIAGE_EPOCH = datetime(2024, 1, 1)
+BLOCK = 512  # reports per distance matrix
+LOAD_CHUNK = 500  # ids per IN (...) query
+MAX_TRIAGE = 100
+
+_FIELDS = ('id', 'created_at', 'ai_priority_score', 'triage_key') + SCORE_INPUTS
+
+
+def keyword_weight(text):
+    """Urgency added by the words in a report, each counted once"""
+    matched = set(_URGENT.findall((text or '').lower()))
+    return min(sum(URGENT_KEYWORDS[word] for word in matched), KEYWORD_CAP)
+
+
+def priority_scores(severities, texts, neighbours, site_km):
+    """Priority of each report before waiting time is added"""
+    severity = np.array([SEVERITY_PRIORITY.get(value, 0.5) for value in severities])
+    keywords = np.array([keyword_weight(text) for text in texts])
+    cluster = CLUSTER_WEIGHT * np.minimum(np.log1p(neighbours) / math.log1p(CLUSTER_CAP), 1.0)
+    proximity = SITE_WEIGHT * np.clip(1 - np.asarray(site_km, dtype=float) / SITE_KM, 0, 1)
+    return severity + keywords + cluster + proximity
+
+
+def _hours(moments):
+    return np.array([(moment - TRIAGE_EPOCH).total_seconds() / 3600 for moment in moments])
+
+
+def triage_keys(scores, created_at):
+    """Time-invariant sort keys: a higher key is more urgent at any moment"""
+    return scores - AGE_PER_HOUR * _hours(created_at)
+
+
+def current_priority(triage_key, now=None):
+    """Score plus waiting time at now, from a stored triage key"""
+    return triage_key + AGE_PER_HOUR * _hours([now or datetime.utcnow()])[0]
+
+
+def _located(rows):
+    lats = np.array([row['latitude'] for row in rows], dtype=float)
+    lons = np.array([row['longitude'] for row in rows], dtype=float)
+    return lats, lons
+
+
+def _open_near(connection, lats, lons, km):
+    """(ids, lats, lons) of open reports in the bounding box of the points, padded by km"""
+    pad_lat = km / KM_PER_DEGREE
+    edge = min(89.0, np.abs(lats).max() + pad_lat)
+    pad_lon = km / (KM_PER_DEGREE * max(math.cos(math.radians(edge)), 0.01))
+    table = Report.__table__
+    rows = connection.execute(select(table.c.id, table.c.latitude, table.c.longitude).where(
+        table.c.status.in_(OPEN_STATUSES),
+        table.c.latitude.between(float(lats.min() - pad_lat), float(lats.max() + pad_lat)),
+        table.c.longitude.between(float(lons.min() - pad_lon), float(lons.max() + pad_lon)),
+    )).all()
+    return (np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([row[1] for row in rows], dtype=float), np.array([row[2] for row in rows], dtype=float))
+
+
+def _within(lats, lons, other_lats, other_lons, km):
+    """Others within km of each point, and which others are within km of any point"""
+    counts = np.zeros(len(lats), dtype=np.int64)
+    near = np.zeros(len(other_lats), dtype=bool)
+    for start in range(0, len(lats), BLOCK):
+        close = haversine_matrix(lats[start:start + BLOCK], lons[start:start + BLOCK], other_lats, other_lons) <= km
+        counts[start:start + BLOCK] = close.sum(axis=1)
+        near |= close.any(axis=0)
+    return counts, near
+
+
+def _load(connection, ids):
+    table = Report.__table__
+    columns = [table.c[name] for name in _FIELDS]
+    rows = []
+    for start in range(0, len(ids), LOAD_CHUNK):
+        chunk = [int(report_id) for report_id in ids[start:start + LOAD_CHUNK]]
+        rows += [dict(zip(_FIELDS, row)) for row in connection.execute(select(*columns).where(table.c.id.in_(chunk)))]
+    return rows
+
+
+def _site_km(lats, lons):
+    """Distance from each point to the nearest safehouse that is not closed"""
+    sites = [record for record in safehouse_index.values()
+             if record['status'] != 'closed' and record['latitude'] is not None and record['longitude'] is not None]
+    distances = np.full(len(lats), np.inf)
+    if sites:
+        site_lats, site_lons = _located(sites)
+        for start in range(0, len(lats), BLOCK):
+            distances[start:start + BLOCK] = haversine_matrix(lats[start:start + BLOCK], lons[start:start + BLOCK],
+                                                              site_lats, site_lons).min(axis=1)
+    return distances
+
+
+def score_reports(connection, ids, points=()):
+    """Score the given reports, and re-score open reports whose cluster they (or points) change.
+
+    points are extra (latitude, longitude) pairs whose neighbours are
+    re-scored, e.g. where a report was deleted. Runs in the caller's
+    transaction and leaves updated_at alone, since scores are not synced;
+    returns how many reports got a new score.
+    """
+    rows = _load(connection, list(dict.fromkeys(ids)))
+    seeds = [row for row in rows if row['latitude'] is not None and row['longitude'] is not None]
+    seed_lats, seed_lons = _located(seeds)
+    seed_lats = np.append(seed_lats, [point[0] for point in points])
+    seed_lons = np.append(seed_lons, [point[1] for point in points])
+    if len(seed_lats):
+        # Neighbours of the seeds and, for their own counts, everything within two radii
+        candidate_ids, candidate_lats, candidate_lons = _open_near(connection, seed_lats, seed_lons, 2 * CLUSTER_KM)
+        _, near = _within(seed_lats, seed_lons, candidate_lats, candidate_lons, CLUSTER_KM)
+        known = {row['id'] for row in rows}
+        rows += _load(connection, [report_id for report_id in candidate_ids[near] if report_id not in known])
+    if not rows:
+        return 0
+
+    neighbours = np.zeros(len(rows), dtype=np.int64)
+    site_km = np.full(len(rows), np.inf)
+    located = [n for n, row in enumerate(rows) if row['latitude'] is not None and row['longitude'] is not None]
+    if located:
+        lats, lons = _located([rows[n] for n in located])
+        counts, _ = _within(lats, lons, candidate_lats, candidate_lons, CLUSTER_KM)
+        is_open = np.array([rows[n]['status'] in OPEN_STATUSES for n in located])
+        neighbours[located] = np.maximum(counts - is_open, 0)  # an open report is its own candidate
+        site_km[located] = _site_km(lats, lons)
+
+    scores = priority_scores([row['severity'] for row in rows],
+                             [f"{row['title']} {row['description']}" for row in rows], neighbours, site_km)
+    keys = triage_keys(scores, [row['created_at'] or datetime.utcnow() for row in rows])
+    changed = [{'report_id': row['id'], 'score': round(float(score), 6), 'key': float(key)}
+               for row, score, key in zip(rows, scores, keys)
+               if row['ai_priority_score'] is None or row['triage_key'] is None
+               or abs(row['ai_priority_score'] - score) > 1e-6 or abs(row['triage_key'] - key) > 1e-6]
+    if changed:
+        table = Report.__table__
+        connection.execute(update(table).where(table.c.id == bindparam('report_id'))
+                           .values(ai_priority_score=bindparam('score'), triage_key=bindparam('key'),
+                                   updated_at=table.c.updated_at), changed)
+    return len(changed)
+
+
+def score_unscored(batch=1000):
+    """Score open reports written without a score (e.g. before triage existed); returns how many"""
+    table = Report.__table__
+    scored = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(select(table.c.id).where(
+            table.c.status.in_(OPEN_STATUSES), table.c.triage_key.is_(None)).limit(batch))]
+        if not ids:
+            return scored
+        connection = db.session.connection()
+        scored += score_reports(connection, ids)
+        bump_versions(connection, {Report.__tablename__})
+        db.session.commit()
+
+
+def _score_flushed(session, flush_context):
+    ids, points = [], []
+    for obj in session.new:
+        if isinstance(obj, Report):
+            ids.append(obj.id)
+    for obj in session.dirty:
+        if not isinstance(obj, Report):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in SCORE_INPUTS):
+            continue
+        ids.append(obj.id)
+        latitude, longitude = state.attrs.latitude.history, state.attrs.longitude.history
+        if latitude.deleted and longitude.deleted and None not in (latitude.deleted[0], longitude.deleted[0]):
+            points.append((latitude.deleted[0], longitude.deleted[0]))  # neighbours left behind
+    for obj in session.deleted:
+        if isinstance(obj, Report):
+            values = inspect(obj).dict
+            if values.get('latitude') is not None and values.get('longitude') is not None:
+                points.append((values['latitude'], values['longitude']))
+    if ids or points:
+        score_reports(session.connection(), ids, points)
+
+
+event.listen(db.session, 'after_flush', _score_flushed)